@@ -5,16 +5,10 @@ import os
 import re
 import json
 from streamlit_agraph import agraph, Node, Edge, Config
-from langchain_neo4j import Neo4jGraph
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
-DEBUG_MODE = True # True로 설정하면 상세 로그 출력
-
-def log_debug(message: str):
-    """디버그 모드가 활성화된 경우에만 메시지를 출력합니다."""
-    if DEBUG_MODE:
-        print(f"🐛 DEBUG: {message}")
+from utils.debug_log import log_debug # 디버깅용 (끄려면 utils.debug_log.DEBUG_MODE = False)
 
 scripts_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts")
 if scripts_path not in sys.path:
@@ -125,6 +119,7 @@ if pending_input or user_input:
             message_placeholder = st.empty()
             full_response_content = ""
             new_state = get_initial_state()
+            explanation_stream = None
 
             try:
                 current_state = st.session_state.conversation_state
@@ -154,6 +149,8 @@ if pending_input or user_input:
                 full_response_content = f"죄송합니다, 앱 처리 중 예상치 못한 오류가 발생했습니다: {e}"
                 log_debug(f"Error during response generation: {e}")
                 message_placeholder.error(full_response_content)
+                if explanation_stream is not None:
+                    explanation_stream.close() # 지금까지의 스트림 사용량을 프로필에 저장한 뒤 다시 읽도록
                 st.session_state.conversation_state = get_initial_state()
 
         # AI 응답(최종 텍스트)을 기록에 추가
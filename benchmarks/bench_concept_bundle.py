@@ -0,0 +1,140 @@
+import os
+import sys
+import time
+import argparse
+import importlib
+import statistics
+
+# 개념 묶음 조회 벤치마크
+# intelligent_tutor가 한 개념에 대해 그래프에서 가져오는 데이터(정의/예시, 시각화 경로, 선수 개념)를
+#   - 기존 방식: 4번의 순차 쿼리
+#   - 묶음 방식: get_concept_bundle 1번 (메모리 그래프 엔진을 끄고 Cypher 묶음 쿼리로 측정)
+# 으로 가져올 때의 그래프 왕복 횟수와 소요 시간을 비교합니다. (실제 Neo4j 필요, .env 사용)
+#
+# 실행: python benchmarks/bench_concept_bundle.py --runs 20 일차방정식 각뿔대
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "scripts"), BENCH_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from utils import debug_log
+from bench_stats import percentile
+
+tutor = importlib.import_module("06_tutor_rag")
+debug_log.DEBUG_MODE = False
+
+# 묶음 조회 도입 전 intelligent_tutor가 실행하던 쿼리들
+LEGACY_CORE_QUERY = """
+MATCH (c:CoreConcept {name: $name})
+RETURN c.name AS name, c.definition AS definition
+"""
+LEGACY_EXAMPLE_QUERY = """
+MATCH (concept:Concept)-[:IS_EXAMPLE_OF]->(core:CoreConcept {name: $name})
+RETURN concept.definition AS example
+LIMIT 3
+"""
+LEGACY_VISUALIZATION_QUERY = """
+MATCH (target:CoreConcept {name: $concept})
+OPTIONAL MATCH path_prereq = (prereq:CoreConcept)-[:IS_PREREQUISITE_OF*1..2]->(target)
+OPTIONAL MATCH path_dep = (target)-[:IS_PREREQUISITE_OF*1..1]->(dependent:CoreConcept)
+WITH target,
+     collect(nodes(path_prereq)) + collect(nodes(path_dep)) AS node_lists,
+     collect(relationships(path_prereq)) + collect(relationships(path_dep)) AS rel_lists
+UNWIND node_lists AS node_list
+UNWIND node_list AS n
+WITH target, collect(DISTINCT n) AS all_nodes, rel_lists
+UNWIND rel_lists AS rel_list
+UNWIND rel_list AS r
+WITH all_nodes + target AS final_nodes_list, collect(DISTINCT r) AS final_rels
+WITH [n IN final_nodes_list | {id: n.name, label: n.name}] AS nodes,
+     [r IN final_rels | {source: startNode(r).name, target: endNode(r).name, label: '선수개념'}] AS edges
+RETURN nodes, edges
+"""
+LEGACY_PREREQ_QUERY = """
+MATCH path = (prereq:CoreConcept)-[:IS_PREREQUISITE_OF*1..2]->(target:CoreConcept {name: $concept})
+WITH prereq, length(path) AS dist
+RETURN DISTINCT prereq.name AS name, prereq.definition AS definition, dist
+ORDER BY dist
+"""
+
+
+class CountingGraph:
+    """graph.query 호출 횟수(= 그래프 왕복 횟수)를 세는 래퍼"""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.round_trips = 0
+
+    def query(self, query, params=None):
+        self.round_trips += 1
+        return self.inner.query(query, params=params or {})
+
+
+def run_legacy(graph, name: str):
+    core = graph.query(LEGACY_CORE_QUERY, {"name": name})
+    if not core:
+        return
+    graph.query(LEGACY_EXAMPLE_QUERY, {"name": name})
+    graph.query(LEGACY_VISUALIZATION_QUERY, {"concept": name})
+    graph.query(LEGACY_PREREQ_QUERY, {"concept": name})
+
+
+def run_bundle(graph, name: str):
+    tutor.get_concept_bundle(name)
+
+
+def measure(label: str, fn, graph: CountingGraph, names: list, runs: int) -> dict:
+    timings = []
+    graph.round_trips = 0
+    for _ in range(runs):
+        for name in names:
+            start = time.perf_counter()
+            fn(graph, name)
+            timings.append((time.perf_counter() - start) * 1000)
+    lookups = runs * len(names)
+    result = {
+        "label": label,
+        "round_trips_per_lookup": graph.round_trips / lookups,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": statistics.median(timings),
+        "p95_ms": percentile(timings, 0.95),
+    }
+    print(f"{label:<8} 왕복 {result['round_trips_per_lookup']:.1f}회/조회 | "
+          f"평균 {result['mean_ms']:.2f}ms | p50 {result['p50_ms']:.2f}ms | p95 {result['p95_ms']:.2f}ms")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="개념 묶음 조회 벤치마크")
+    parser.add_argument("concepts", nargs="*", help="조회할 개념 이름 (생략 시 그래프에서 10개 선택)")
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    graph = CountingGraph(tutor.graph)
+    tutor.graph = graph
+    tutor.USE_GRAPH_ENGINE = False # 켜져 있으면 get_concept_bundle이 메모리 그래프에서 처리되어 Cypher 묶음 쿼리를 재지 못함
+
+    names = args.concepts or [
+        r["name"] for r in graph.inner.query(
+            "MATCH (c:CoreConcept)<-[:IS_PREREQUISITE_OF]-() RETURN DISTINCT c.name AS name LIMIT 10")
+    ]
+    print(f"개념 {len(names)}개 x {args.runs}회\n")
+
+    # 연결/플랜 캐시 예열
+    for name in names:
+        run_legacy(graph, name)
+        run_bundle(graph, name)
+
+    legacy = measure("기존", run_legacy, graph, names, args.runs)
+    bundle = measure("묶음", run_bundle, graph, names, args.runs)
+    if not bundle["round_trips_per_lookup"]:
+        print("\n⚠️ 묶음 방식의 그래프 왕복이 0회입니다. (그래프에 없는 개념이거나 Cypher 경로를 거치지 않음)")
+        return
+    print(f"\n왕복 횟수 {legacy['round_trips_per_lookup'] / bundle['round_trips_per_lookup']:.1f}배 감소, "
+          f"평균 소요 시간 {legacy['mean_ms'] / bundle['mean_ms']:.2f}배 빨라짐")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import os
+import sys
+import time
+import io
+import argparse
+import importlib
+import contextlib
+import statistics
+
+# 진단 답변 처리 LLM 호출 벤치마크
+# WAITING_DIAGNOSTIC 상태에서 학생 답변을 분석할 때
+#   - 기존 방식: classify_continuation_intent -> assess_understanding 순차 2회 호출
+#   - 통합 방식: diagnose_response 구조화 출력 1회 호출
+# 의 소요 시간(= 첫 설명 토큰 전까지의 LLM 대기 시간)을 비교합니다.
+#   - 기본: 실제 OpenAI API 호출 (.env 사용)
+#   - --replay 또는 TUTOR_BACKEND=replay_backends:create_backends: 가짜 LLM(benchmarks/replay_backends.py)이
+#     사례마다 기대 결과를 정해진 지연으로 답하므로 네트워크 없이 CI에서 같은 비교를 재현합니다.
+#
+# 실행: python benchmarks/bench_diagnostic_call.py --runs 5
+#       python benchmarks/bench_diagnostic_call.py --replay --first-token-ms 300 --token-ms 15
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "scripts"), BENCH_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+from utils import debug_log
+from bench_stats import percentile
+
+REPLAY_BACKEND = "replay_backends:create_backends"
+tutor = None # main()에서 백엔드를 정한 뒤 불러옴
+replay_backends = None # 가짜 LLM으로 실행할 때만
+
+# (선수 개념 목록, 학생 답변, 기대 의도, 기대 이해도)
+CASES = [
+    (["방정식", "일차식"], "방정식은 아는데 일차식은 모르겠어요", "continue", {"방정식": True, "일차식": False}),
+    (["방정식", "일차식"], "응", "continue", {"방정식": True, "일차식": True}),
+    (["항", "계수"], "아니", "continue", {"항": False, "계수": False}),
+    (["좌표평면"], "기억 안나요", "continue", {"좌표평면": False}),
+    (["다각형"], "근데 원주율은 뭐야?", "new_question", None),
+]
+
+
+def load_tutor(replay: bool):
+    global tutor, replay_backends
+    if replay:
+        os.environ["TUTOR_BACKEND"] = REPLAY_BACKEND
+        os.environ.setdefault("OPENAI_API_KEY", "replay") # 가짜 백엔드는 사용하지 않음
+    if os.getenv("TUTOR_BACKEND") == REPLAY_BACKEND:
+        replay_backends = importlib.import_module("replay_backends")
+    with contextlib.redirect_stdout(io.StringIO()):
+        tutor = importlib.import_module("06_tutor_rag")
+    debug_log.DEBUG_MODE = False
+    return tutor
+
+
+def replay_replies(expected_intent: str, expected_map: dict) -> dict:
+    """가짜 LLM이 세 프롬프트 모두 사례의 기대 결과를 답하도록 하는 대본 (정확도가 아니라 호출 수/지연만 비교)"""
+    understanding = expected_map or {}
+    return {
+        "intent.do_you_know": {"primary_intent": expected_intent, "clarification_question": None, "topic": "none"},
+        "assess_understanding": understanding,
+        "diagnose_response": {
+            "primary_intent": expected_intent, "topic": "none",
+            "understanding": [{"name": name, "understood": known} for name, known in understanding.items()],
+        },
+    }
+
+
+def run_legacy(prereq_names: list, response: str) -> tuple:
+    intent = tutor.classify_continuation_intent(response, ", ".join(prereq_names), "do_you_know", "none")
+    understanding = tutor.assess_understanding(response, prereq_names)
+    return intent["primary_intent"], understanding
+
+
+def run_combined(prereq_names: list, response: str) -> tuple:
+    diagnosis = tutor.diagnose_response(response, prereq_names, "none")
+    if diagnosis is None:
+        return None, None
+    return diagnosis["intent"]["primary_intent"], diagnosis["understanding_map"]
+
+
+def measure(label: str, fn, runs: int) -> dict:
+    timings = []
+    agree = 0
+    llm_calls = 0
+    for _ in range(runs):
+        for prereq_names, response, expected_intent, expected_map in CASES:
+            if replay_backends:
+                replay_backends.CONFIG.replies = replay_replies(expected_intent, expected_map)
+                replay_backends.CONFIG.take_counts()
+            start = time.perf_counter()
+            intent, understanding = fn(prereq_names, response)
+            timings.append((time.perf_counter() - start) * 1000)
+            if replay_backends:
+                llm_calls += sum(replay_backends.CONFIG.take_counts()[0].values())
+            if intent == expected_intent and (expected_map is None or understanding == expected_map):
+                agree += 1
+    total = runs * len(CASES)
+    result = {
+        "label": label,
+        "mean_ms": statistics.mean(timings),
+        "p50_ms": statistics.median(timings),
+        "p95_ms": percentile(timings, 0.95),
+        "accuracy": agree / total,
+        "llm_calls_per_case": llm_calls / total if replay_backends else None,
+    }
+    calls = f" | LLM {result['llm_calls_per_case']:.1f}회/사례" if replay_backends else ""
+    print(f"{label:<8} 평균 {result['mean_ms']:.0f}ms | p50 {result['p50_ms']:.0f}ms | "
+          f"p95 {result['p95_ms']:.0f}ms | 기대 결과 일치 {agree}/{total}{calls}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="진단 답변 처리 LLM 호출 벤치마크")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--replay", action="store_true", help="실제 API 대신 가짜 LLM으로 실행 (오프라인, CI용)")
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="가짜 LLM 첫 토큰 지연")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="가짜 LLM 토큰당 지연")
+    args = parser.parse_args()
+
+    load_tutor(args.replay)
+    if replay_backends:
+        replay_backends.CONFIG.first_token_ms = args.first_token_ms
+        replay_backends.CONFIG.token_ms = args.token_ms
+        print(f"가짜 LLM: 첫 토큰 {args.first_token_ms:.0f}ms + 토큰당 {args.token_ms:.0f}ms")
+    print(f"사례 {len(CASES)}개 x {args.runs}회\n")
+    legacy = measure("기존(2회)", run_legacy, args.runs)
+    combined = measure("통합(1회)", run_combined, args.runs)
+    reduction = 1 - combined["mean_ms"] / legacy["mean_ms"] if legacy["mean_ms"] else 0.0
+    print(f"\n평균 지연 {legacy['mean_ms'] - combined['mean_ms']:.0f}ms 감소 ({reduction * 100:.0f}%), "
+          f"p50 {legacy['p50_ms'] - combined['p50_ms']:.0f}ms 감소")
+    return legacy, combined
+
+
+if __name__ == "__main__":
+    main()
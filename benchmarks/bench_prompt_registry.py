@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+import argparse
+import statistics
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+# 프롬프트 체인 준비 비용 마이크로벤치마크 (LLM/네트워크 호출 없음)
+# 한 턴에서 흔히 거치는 프롬프트(라우터 -> 개념 추출 -> 의도 분류 -> 설명)를
+#   - 기존 방식: 호출할 때마다 ChatPromptTemplate.from_messages + `prompt | llm | parser` 생성
+#   - 등록소 방식: PromptRegistry가 한 번 만든 체인 재사용
+# 으로 준비/실행할 때의 턴당 파이썬 오버헤드를 비교합니다. LLM은 즉시 응답하는 가짜 모델을 사용합니다.
+#
+# 실행: python benchmarks/bench_prompt_registry.py --turns 500
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.prompts import TUTOR_PROMPTS
+from utils.prompt_registry import PromptRegistry
+
+# (프롬프트 이름, 입력 변수)
+TURN_STEPS = [
+    ("router", {"input": "일차방정식이 뭐야?", "mode": "IDLE", "queue_status": "비어있음", "last_explained": "없음"}),
+    ("extract_concept", {"question": "일차방정식이 뭐야?"}),
+    ("intent.shall_i_explain", {"response": "네", "next_concept": "일차식", "last_explained_concept": "방정식"}),
+    ("explanation.first", {"concept_name": "일차방정식", "definition": "미지수의 최고 차수가 1인 방정식", "examples": ["2x + 3 = 7"]}),
+]
+
+
+def legacy_chain(llm, name: str):
+    prompt = ChatPromptTemplate.from_messages(TUTOR_PROMPTS[name])
+    return prompt | llm | StrOutputParser()
+
+
+def run_turn(get_chain, invoke: bool):
+    for name, inputs in TURN_STEPS:
+        chain = get_chain(name)
+        if invoke:
+            chain.invoke(inputs)
+
+
+def measure(label: str, get_chain, turns: int, invoke: bool) -> float:
+    timings = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        run_turn(get_chain, invoke)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    mean_us = statistics.mean(timings)
+    print(f"{label:<16} 평균 {mean_us:8.1f}µs/턴 | p50 {statistics.median(timings):8.1f}µs")
+    return mean_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description="프롬프트 체인 준비 비용 마이크로벤치마크")
+    parser.add_argument("--turns", type=int, default=500)
+    args = parser.parse_args()
+
+    llm = FakeListChatModel(responses=['{"task": "tutor_flow", "topic": "none"}'])
+    registry = PromptRegistry(llm, TUTOR_PROMPTS)
+    registry.warm_up()
+
+    print(f"턴당 프롬프트 {len(TURN_STEPS)}개 x {args.turns}턴\n")
+    for invoke in (False, True):
+        print("[체인 준비 + 가짜 LLM 실행]" if invoke else "[체인 준비만]")
+        before = measure("기존(매번 생성)", lambda name: legacy_chain(llm, name), args.turns, invoke)
+        after = measure("등록소(재사용)", registry.chain, args.turns, invoke)
+        print(f"→ 턴당 {before - after:.1f}µs 절약 ({before / after:.1f}배)\n")
+
+    print(f"등록된 프롬프트 {len(registry.versions())}개, 생성된 체인 {registry.compiled}개")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+import io
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+import importlib
+import contextlib
+
+# 대화 재생 벤치마크 (오프라인, 결정적)
+# scenarios/*.json의 대본 대화를 process_turn으로 여러 번 재생하면서 턴마다
+#   - 지연 시간: process_turn 반환까지 / 첫 조각까지(TTFT) / 응답 스트림 끝까지
+#   - LLM 호출 수(프롬프트별), 그래프 왕복 수
+# 를 재고 p50/p95/p99로 요약합니다. LLM과 Neo4j는 replay_backends.py의 가짜 백엔드로 대체되며
+# 지연 시간은 옵션으로 정합니다. (API 키, 네트워크, Neo4j 불필요 -> CI에서 06_tutor_rag.py 변경마다 측정)
+#
+# 실행: python benchmarks/bench_replay_conversation.py --runs 20
+#       python benchmarks/bench_replay_conversation.py --first-token-ms 500 --graph-ms 50 --json out.json
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(BENCH_DIR)
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "scripts"), BENCH_DIR):
+    if path not in sys.path:
+        sys.path.append(path)
+
+import replay_backends
+from bench_stats import percentile
+from utils import debug_log, student_profile
+from utils.explanation_cache import ExplanationCache, PrebuiltExplanations
+
+SCENARIO_DIR = os.path.join(BENCH_DIR, "scenarios")
+PREFETCH_WAIT_SECONDS = 30
+
+
+def summarize(values: list) -> dict:
+    return {
+        "p50": percentile(values, 0.50),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "mean": sum(values) / len(values) if values else None,
+    }
+
+
+def load_scenarios(paths: list) -> list:
+    scenarios = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            scenario = json.load(f)
+        if "turns" in scenario: # 그래프 fixture 등 대본이 아닌 파일은 건너뜀
+            scenario.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+            scenarios.append(scenario)
+    return scenarios
+
+
+def load_tutor(args, workdir: str):
+    """가짜 백엔드를 주입하고, 디스크 부작용(프로필/캐시/스냅샷)을 임시 폴더로 돌린 튜터 모듈"""
+    os.environ["TUTOR_BACKEND"] = "replay_backends:create_backends"
+    os.environ.setdefault("OPENAI_API_KEY", "replay") # 가짜 백엔드는 사용하지 않음
+    student_profile.PROFILE_FILE = os.path.join(workdir, "user_profile.json")
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        tutor = importlib.import_module("06_tutor_rag")
+    debug_log.DEBUG_MODE = False
+    tutor.USE_GRAPH_ENGINE = not args.cypher_bundle
+    tutor.GRAPH_SNAPSHOT_FILE = os.path.join(workdir, "concept_graph_snapshot.json")
+    tutor.prebuilt_explanations = PrebuiltExplanations(os.path.join(workdir, "explanation_variants.json"))
+    return tutor
+
+
+def reset_run(tutor, workdir: str, run: int, warm_cache: bool):
+    """매 실행을 새 학생/새 세션으로 시작 (프로필 삭제, 캐시는 --warm-cache가 아니면 비움)"""
+    if os.path.exists(student_profile.PROFILE_FILE):
+        os.remove(student_profile.PROFILE_FILE)
+    if not warm_cache or run == 0:
+        tutor.explanation_cache = ExplanationCache(db_path=os.path.join(workdir, f"explanation_cache_{run}.sqlite3"))
+
+
+def play_turn(tutor, state: dict, turn: dict, use_async: bool = False) -> tuple:
+    """한 턴을 재생하고 (측정값, 새 상태)를 반환합니다. (응답 스트림은 app.py처럼 끝까지 소비)"""
+    replay_backends.CONFIG.replies = turn.get("replies", {})
+    replay_backends.CONFIG.take_counts()
+
+    started = time.perf_counter()
+    if use_async:
+        result = asyncio.run(tutor.aprocess_turn(turn["input"], state))
+    else:
+        result = tutor.process_turn(turn["input"], state)
+    returned_ms = (time.perf_counter() - started) * 1000
+
+    ttft_ms = None
+    stream = result.get("explanation_stream")
+    if stream is not None:
+        for _ in stream:
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+    elif result.get("response_text"):
+        ttft_ms = returned_ms
+    total_ms = (time.perf_counter() - started) * 1000
+
+    # 학생이 응답을 읽는 동안 끝나는 미리 가져오기까지 이 턴의 비용으로 셈
+    tutor.explanation_prefetcher.wait_idle(PREFETCH_WAIT_SECONDS)
+    llm_calls, graph_queries = replay_backends.CONFIG.take_counts()
+
+    new_state = result.get("new_state", state)
+    return {
+        "input": turn["input"],
+        "mode": new_state.get("mode"),
+        "returned_ms": returned_ms,
+        "ttft_ms": ttft_ms,
+        "total_ms": total_ms,
+        "llm_calls": sum(llm_calls.values()),
+        "llm_calls_by_prompt": llm_calls,
+        "graph_round_trips": sum(graph_queries.values()),
+    }, new_state
+
+
+def run_scenario(tutor, scenario: dict, runs: int, workdir: str, warm_cache: bool, verbose: bool, use_async: bool = False) -> list:
+    """[[턴 측정값, ...] (실행 1), ...]"""
+    results = []
+    for run in range(runs):
+        reset_run(tutor, workdir, run, warm_cache)
+        output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with output:
+            state = tutor.get_initial_state()
+            turns = []
+            for turn in scenario["turns"]:
+                measured, state = play_turn(tutor, state, turn, use_async)
+                turns.append(measured)
+        results.append(turns)
+    return results
+
+
+def report(scenario: dict, results: list) -> dict:
+    print(f"\n📋 {scenario['name']} ({len(results)}회 재생)")
+    print(f"{'턴':<28} {'모드':<22} {'반환 p50/p95/p99 (ms)':>26} {'TTFT p50/p95/p99 (ms)':>26} {'LLM':>5} {'그래프':>6}")
+    turn_summaries = []
+    for i, turn in enumerate(scenario["turns"]):
+        samples = [run[i] for run in results]
+        returned = summarize([s["returned_ms"] for s in samples])
+        ttft = summarize([s["ttft_ms"] for s in samples if s["ttft_ms"] is not None])
+        llm_calls = summarize([s["llm_calls"] for s in samples])
+        graph_round_trips = summarize([s["graph_round_trips"] for s in samples])
+        fmt = lambda m: " / ".join("-" if m[k] is None else f"{m[k]:.0f}" for k in ("p50", "p95", "p99"))
+        print(f"{turn['input'][:26]:<28} {str(samples[-1]['mode']):<22} {fmt(returned):>26} {fmt(ttft):>26} "
+              f"{llm_calls['mean']:>5.1f} {graph_round_trips['mean']:>6.1f}")
+        turn_summaries.append({
+            "input": turn["input"], "mode": samples[-1]["mode"],
+            "returned_ms": returned, "ttft_ms": ttft,
+            "total_ms": summarize([s["total_ms"] for s in samples]),
+            "llm_calls": llm_calls, "graph_round_trips": graph_round_trips,
+            "llm_calls_by_prompt": samples[-1]["llm_calls_by_prompt"],
+        })
+
+    all_samples = [s for run in results for s in run]
+    overall = {
+        "returned_ms": summarize([s["returned_ms"] for s in all_samples]),
+        "ttft_ms": summarize([s["ttft_ms"] for s in all_samples if s["ttft_ms"] is not None]),
+        "total_ms": summarize([s["total_ms"] for s in all_samples]),
+        "llm_calls_per_turn": summarize([s["llm_calls"] for s in all_samples]),
+        "graph_round_trips_per_turn": summarize([s["graph_round_trips"] for s in all_samples]),
+    }
+    print(f"→ 전체 턴: TTFT p50 {overall['ttft_ms']['p50']:.0f}ms / p95 {overall['ttft_ms']['p95']:.0f}ms / "
+          f"p99 {overall['ttft_ms']['p99']:.0f}ms | 턴당 LLM {overall['llm_calls_per_turn']['mean']:.2f}회, "
+          f"그래프 {overall['graph_round_trips_per_turn']['mean']:.2f}회")
+    return {"name": scenario["name"], "runs": len(results), "turns": turn_summaries, "overall": overall}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="대본 대화 재생 벤치마크 (가짜 LLM/그래프, 오프라인)")
+    parser.add_argument("scenarios", nargs="*", help="대본 JSON 파일 (기본: benchmarks/scenarios/*.json)")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--first-token-ms", type=float, default=300.0, help="가짜 LLM 첫 토큰 지연")
+    parser.add_argument("--token-ms", type=float, default=15.0, help="가짜 LLM 토큰당 지연")
+    parser.add_argument("--filler-tokens", type=int, default=120, help="대본에 없는 긴 응답(설명 등)의 토큰 수")
+    parser.add_argument("--graph-ms", type=float, default=20.0, help="가짜 그래프 쿼리 1회 지연")
+    parser.add_argument("--cypher-bundle", action="store_true", help="메모리 그래프 엔진 대신 Cypher 묶음 조회 사용")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="process_turn 대신 aprocess_turn으로 재생")
+    parser.add_argument("--warm-cache", action="store_true", help="설명 캐시를 실행 간에 유지 (기본: 매 실행 비움)")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일 경로 (CI 비교용)")
+    parser.add_argument("--verbose", action="store_true", help="튜터 로그 출력")
+    args = parser.parse_args()
+
+    config = replay_backends.CONFIG
+    config.first_token_ms = args.first_token_ms
+    config.token_ms = args.token_ms
+    config.filler_tokens = args.filler_tokens
+    config.graph_ms = args.graph_ms
+
+    scenario_paths = args.scenarios or sorted(glob.glob(os.path.join(SCENARIO_DIR, "*.json")))
+    scenarios = load_scenarios(scenario_paths)
+
+    workdir = tempfile.mkdtemp(prefix="tutor_replay_")
+    try:
+        tutor = load_tutor(args, workdir)
+        print(f"가짜 LLM: 첫 토큰 {config.first_token_ms:.0f}ms + 토큰당 {config.token_ms:.0f}ms | "
+              f"가짜 그래프: 쿼리당 {config.graph_ms:.0f}ms | "
+              f"{'Cypher 묶음 조회' if args.cypher_bundle else '메모리 그래프 엔진'} | "
+              f"{'aprocess_turn (동시 실행)' if args.use_async else 'process_turn (동기)'}")
+        with contextlib.redirect_stdout(io.StringIO()):
+            tutor.get_graph_engine() # 시작 시 그래프 로드는 턴 측정에서 제외
+        replay_backends.CONFIG.take_counts()
+
+        reports = []
+        for scenario in scenarios:
+            results = run_scenario(tutor, scenario, args.runs, workdir, args.warm_cache, args.verbose, args.use_async)
+            reports.append(report(scenario, results))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({
+                "config": {
+                    "first_token_ms": config.first_token_ms, "token_ms": config.token_ms,
+                    "filler_tokens": config.filler_tokens, "graph_ms": config.graph_ms,
+                    "cypher_bundle": args.cypher_bundle, "warm_cache": args.warm_cache, "async": args.use_async,
+                },
+                "scenarios": reports,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 결과 저장: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
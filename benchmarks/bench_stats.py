@@ -0,0 +1,11 @@
+import math
+
+# 벤치마크 공용 통계 함수
+
+
+def percentile(values: list, q: float):
+    """최근접 순위 분위수 (값이 없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(max(math.ceil(q * len(ordered)) - 1, 0), len(ordered) - 1)]
@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import random
+import argparse
+
+# 응답 스트림 결합기 벤치마크
+# 긴 설명 스트림(토큰 조각 수천~수만 개)에 대해
+#   - 기존: 조각마다 stream_content += chunk, 끝에서 " ".join(stream_content.split())로 전체 정규화
+#   - 개선: utils/stream_combiner.StreamCombiner (길이 제한 꼬리 버퍼 + 조각 리스트 join)
+# 의 조각당 평균 시간과 스트림 전체 시간을 비교하고, 두 구현이 내보내는 조각이 같은지 확인합니다.
+#
+# 실행: python benchmarks/bench_stream_combiner.py --tokens 2000 20000 100000 --repeat 5
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.stream_combiner import StreamCombiner
+
+SUFFIX = "\n\n이 개념이 이해되셨나요? 다음으로 '일차방정식'을 설명해드릴까요?"
+WORDS = ["일차방정식", "은", "미지수", "x", "의", "차수가", "1", "인", "방정식", "입니다.",
+         "예를", "들어", "2x + 3 = 7", "에서", "양변에서", "3을", "빼면", "2x = 4", "가", "됩니다."]
+
+
+def make_chunks(n_tokens: int, seed: int, include_suffix: bool) -> list:
+    """LLM 스트림처럼 앞/뒤 공백과 줄바꿈이 섞인 토큰 조각"""
+    rng = random.Random(seed)
+    chunks = []
+    for _ in range(n_tokens):
+        word = rng.choice(WORDS)
+        r = rng.random()
+        if r < 0.7:
+            chunks.append(" " + word)
+        elif r < 0.85:
+            chunks.append(word)
+        elif r < 0.95:
+            chunks.append(word + "\n")
+        else:
+            chunks.append("\n\n")
+    if include_suffix:
+        # 모델이 후속 질문까지 직접 쓴 경우 (공백이 조금 다르게)
+        chunks.extend(SUFFIX.replace("  ", " ").split(" "))
+        chunks = chunks[:-1] + [" " + chunks[-1]]
+    return chunks
+
+
+def legacy_combined(prefix: str, stream, suffix: str):
+    """06_tutor_rag.py의 기존 combined_stream_generator"""
+    if prefix:
+        yield prefix
+    stream_content = ""
+    for chunk in stream:
+        stream_content += chunk
+        yield chunk
+    if suffix:
+        stream_content_normalized = " ".join(stream_content.split())
+        response_text_normalized = " ".join(suffix.split())
+        if not stream_content_normalized.endswith(response_text_normalized):
+            yield suffix
+
+
+def combiner_combined(prefix: str, stream, suffix: str):
+    combiner = StreamCombiner(stream, prefix=prefix, suffix=suffix)
+    yield from combiner
+    combiner.text # 캐시/로그용 전체 텍스트 (join 한 번)
+
+
+def measure(fn, chunks: list) -> tuple:
+    """(전체 ms, 가장 느린 조각 간격 us, 내보낸 조각)"""
+    out = []
+    worst = 0.0
+    started = last = time.perf_counter()
+    for piece in fn("좋아요! ", iter(chunks), SUFFIX):
+        now = time.perf_counter()
+        worst = max(worst, now - last)
+        out.append(piece)
+        last = time.perf_counter()
+    return (time.perf_counter() - started) * 1000, worst * 1e6, out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="응답 스트림 결합기 벤치마크 (기존 vs StreamCombiner)")
+    parser.add_argument("--tokens", type=int, nargs="+", default=[2000, 20000, 100000], help="스트림 조각 수")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'조각 수':>8} {'suffix 포함':>10} {'기존 ms':>10} {'개선 ms':>10} {'배율':>6} "
+          f"{'기존 최대 간격 us':>17} {'개선 최대 간격 us':>17}")
+    for n_tokens in args.tokens:
+        for include_suffix in (False, True):
+            chunks = make_chunks(n_tokens, seed=n_tokens, include_suffix=include_suffix)
+            legacy_ms, combiner_ms, legacy_gap, combiner_gap = [], [], [], []
+            for _ in range(args.repeat):
+                ms, gap, legacy_out = measure(legacy_combined, chunks)
+                legacy_ms.append(ms)
+                legacy_gap.append(gap)
+                ms, gap, combiner_out = measure(combiner_combined, chunks)
+                combiner_ms.append(ms)
+                combiner_gap.append(gap)
+                if legacy_out != combiner_out:
+                    raise SystemExit(f"❌ 출력 불일치 (조각 {n_tokens}개, suffix 포함={include_suffix})")
+            legacy, combiner = min(legacy_ms), min(combiner_ms)
+            print(f"{n_tokens:>8} {str(include_suffix):>10} {legacy:>10.2f} {combiner:>10.2f} "
+                  f"{legacy / combiner:>5.1f}x {min(legacy_gap):>17.0f} {min(combiner_gap):>17.0f}")
+    print("✅ 두 구현의 출력이 모두 같습니다.")
+
+
+if __name__ == "__main__":
+    main()
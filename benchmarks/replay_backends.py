@@ -0,0 +1,246 @@
+import os
+import re
+import sys
+import json
+import time
+import asyncio
+import threading
+from collections import Counter
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+
+# 오프라인 재생용 가짜 LLM / 가짜 그래프 (네트워크, API 키, Neo4j 불필요)
+# 06_tutor_rag.py는 TUTOR_BACKEND="replay_backends:create_backends"일 때 이 모듈의 create_backends()로
+# (llm, graph)를 만듭니다. 응답과 지연 시간은 모두 CONFIG로 정해지므로 같은 대본은 항상 같은 흐름을 탑니다.
+#
+# - ReplayChatModel: PromptRegistry가 체인에 붙인 "prompt:<이름>" 태그(스트리밍 호출은 태그가 전달되지 않으므로
+#   TUTOR_PROMPTS 템플릿과 메시지 대조)로 어떤 프롬프트인지 알아내고
+#   현재 턴 대본(CONFIG.replies) -> 기본 응답(DEFAULT_REPLIES) 순으로 응답을 고릅니다.
+#   지연 = 첫 토큰 지연 + 토큰 수 x 토큰당 지연 (invoke는 전체를 기다린 뒤 반환, stream은 토큰마다 반환)
+# - ReplayGraph: concept_graph.py / 06의 Cypher 쿼리를 고정 그래프(fixture JSON)로 응답하고 쿼리마다 지연을 줍니다.
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.concept_graph import (
+    ConceptGraph, GENERATION_QUERY, NODES_QUERY, EDGES_QUERY, EXAMPLES_QUERY,
+)
+from utils.usage import STEP_TAG_PREFIX
+from utils.prompts import TUTOR_PROMPTS
+
+DEFAULT_GRAPH_FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios", "graph_fixture.json")
+
+FILLER_SENTENCE = "차근차근 예시와 함께 살펴보면 이 개념은 생각보다 어렵지 않아요."
+
+# 프롬프트 이름 -> 대본에 없을 때의 기본 응답 (None이면 FILLER 문장으로 만든 긴 설명)
+DEFAULT_REPLIES = {
+    "router": '{"task": "tutor_flow", "topic": "none"}',
+    "extract_concept": "개념없음",
+    "intent.do_you_know": '{"primary_intent": "continue", "clarification_question": null, "topic": "none"}',
+    "intent.shall_i_explain": '{"primary_intent": "continue", "clarification_question": null, "topic": "none"}',
+    "intent.post_explanation": '{"primary_intent": "new_question", "clarification_question": null, "topic": "none"}',
+    "assess_understanding": "{}",
+    "diagnose_response": '{"primary_intent": "continue", "topic": "none", "understanding": []}',
+    "generate_problem.first": '{"problem": "2x + 3 = 11 일 때 x의 값은?", "answer": "4", "key_concept": "일차방정식"}',
+    "generate_problem.repeat": '{"problem": "3x - 2 = 10 일 때 x의 값은?", "answer": "4", "key_concept": "일차방정식"}',
+}
+
+
+def _template_regex(template: str) -> str:
+    """ChatPromptTemplate(f-string) 템플릿 -> 변수 자리에 무엇이든 들어가는 정규식"""
+    parts = []
+    for token in re.split(r"(\{\{|\}\}|\{[^{}]*\})", template):
+        if token == "{{":
+            parts.append(re.escape("{"))
+        elif token == "}}":
+            parts.append(re.escape("}"))
+        elif token.startswith("{") and token.endswith("}"):
+            parts.append("(?:.*?)")
+        else:
+            parts.append(re.escape(token))
+    return "".join(parts)
+
+
+# 프롬프트 이름 -> 렌더링된 메시지 전체와 일치하는 정규식
+PROMPT_PATTERNS = {
+    name: re.compile("\x00".join(_template_regex(template) for _, template in messages), re.DOTALL)
+    for name, messages in TUTOR_PROMPTS.items()
+}
+
+
+def prompt_name_of(messages) -> str:
+    text = "\x00".join(str(m.content) for m in messages)
+    return next((name for name, pattern in PROMPT_PATTERNS.items() if pattern.fullmatch(text)), "other")
+
+
+class ReplayConfig:
+    """가짜 백엔드 설정 + 호출 통계 (하네스가 턴마다 replies를 바꾸고 통계를 읽음)"""
+
+    def __init__(self):
+        self.first_token_ms = 300.0   # LLM 첫 토큰까지 지연
+        self.token_ms = 15.0          # 토큰당 지연
+        self.filler_tokens = 120      # 대본에 없는 긴 응답(설명 등)의 토큰 수
+        self.graph_ms = 20.0          # 그래프 쿼리 1회(왕복) 지연
+        self.graph_fixture = DEFAULT_GRAPH_FIXTURE
+        self.replies = {}             # 현재 턴 대본: 프롬프트 이름 -> 응답
+        self.llm_calls = Counter()    # 프롬프트 이름 -> 호출 수
+        self.graph_queries = Counter()
+        self._lock = threading.Lock()
+
+    def count_llm(self, name: str):
+        with self._lock:
+            self.llm_calls[name] += 1
+
+    def count_graph(self, kind: str):
+        with self._lock:
+            self.graph_queries[kind] += 1
+
+    def take_counts(self) -> tuple:
+        """(LLM 호출 통계, 그래프 쿼리 통계)를 반환하고 0으로 되돌립니다."""
+        with self._lock:
+            llm_calls, graph_queries = dict(self.llm_calls), dict(self.graph_queries)
+            self.llm_calls.clear()
+            self.graph_queries.clear()
+        return llm_calls, graph_queries
+
+
+CONFIG = ReplayConfig()
+
+
+def _sleep_ms(ms: float):
+    if ms > 0:
+        time.sleep(ms / 1000)
+
+
+def _tokens(text: str) -> list:
+    """공백 단위로 자른 토큰 (공백은 앞 토큰에 붙임)"""
+    parts = text.split(" ")
+    return [p + " " for p in parts[:-1]] + [parts[-1]]
+
+
+class ReplayChatModel(BaseChatModel):
+    """프롬프트 이름별 대본 응답을 정해진 지연으로 돌려주는 가짜 채팅 모델"""
+
+    @property
+    def _llm_type(self) -> str:
+        return "tutor-replay"
+
+    def _reply(self, messages, run_manager=None) -> tuple:
+        tags = getattr(run_manager, "tags", None) or []
+        name = next((t[len(STEP_TAG_PREFIX):] for t in tags if t.startswith(STEP_TAG_PREFIX)), None)
+        name = name or prompt_name_of(messages)
+        CONFIG.count_llm(name)
+        reply = CONFIG.replies.get(name, DEFAULT_REPLIES.get(name))
+        if reply is None:
+            sentences = max(1, CONFIG.filler_tokens // len(_tokens(FILLER_SENTENCE)))
+            reply = " ".join([FILLER_SENTENCE] * sentences)
+        elif not isinstance(reply, str):
+            reply = json.dumps(reply, ensure_ascii=False)
+        return name, reply
+
+    @staticmethod
+    def _usage(messages, tokens: list) -> dict:
+        input_tokens = sum(len(str(m.content)) for m in messages) // 2
+        return {"input_tokens": input_tokens, "output_tokens": len(tokens), "total_tokens": input_tokens + len(tokens)}
+
+    def _result(self, messages, reply: str) -> ChatResult:
+        message = AIMessage(content=reply, usage_metadata=self._usage(messages, _tokens(reply)),
+                            response_metadata={"model_name": "gpt-4o-mini"})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        _, reply = self._reply(messages, run_manager)
+        _sleep_ms(CONFIG.first_token_ms + CONFIG.token_ms * len(_tokens(reply)))
+        return self._result(messages, reply)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        _, reply = self._reply(messages, run_manager)
+        await asyncio.sleep((CONFIG.first_token_ms + CONFIG.token_ms * len(_tokens(reply))) / 1000)
+        return self._result(messages, reply)
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        _, reply = self._reply(messages, run_manager)
+        tokens = _tokens(reply)
+        _sleep_ms(CONFIG.first_token_ms)
+        for i, token in enumerate(tokens):
+            if i:
+                _sleep_ms(CONFIG.token_ms)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        # 마지막 조각에 사용량 (ChatOpenAI stream_usage=True와 같은 형식)
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata=self._usage(messages, tokens), response_metadata={"model_name": "gpt-4o-mini"}))
+
+    def with_structured_output(self, schema, **kwargs):
+        """대본의 JSON 응답을 스키마로 검증하여 반환 (실제 모델의 구조화 출력과 같은 결과 형식)"""
+        return self | RunnableLambda(lambda message: schema.model_validate_json(message.content))
+
+
+class ReplayGraph:
+    """GraphClient.query 대신 고정 그래프로 응답하는 가짜 그래프 (쿼리 1회 = 왕복 1회)"""
+
+    def __init__(self, fixture_path: str):
+        with open(fixture_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.generation = data.get("generation", "replay")
+        self.concepts = data["concepts"] # [{"name", "definition", "domain", "examples"}, ...]
+        names = [c["name"] for c in self.concepts]
+        ids = {name: i for i, name in enumerate(names)}
+        self.edges = [tuple(e) for e in data["edges"]] # [(선수 개념, 후속 개념), ...]
+        self.engine = ConceptGraph(
+            names, [c["definition"] for c in self.concepts], [c.get("domain") for c in self.concepts],
+            [c.get("examples", []) for c in self.concepts],
+            [(ids[a], ids[b]) for a, b in self.edges], self.generation,
+        )
+
+    def query(self, query: str, params: dict = None) -> list:
+        params = params or {}
+        kind, rows = self._answer(query, params)
+        CONFIG.count_graph(kind)
+        _sleep_ms(CONFIG.graph_ms)
+        return rows
+
+    def _answer(self, query: str, params: dict) -> tuple:
+        if query == GENERATION_QUERY:
+            return "generation", [{"generation": self.generation}]
+        if query == NODES_QUERY:
+            return "load_graph", [{"name": c["name"], "definition": c["definition"], "domain": c.get("domain")}
+                                  for c in sorted(self.concepts, key=lambda c: c["name"])]
+        if query == EDGES_QUERY:
+            return "load_graph", [{"source": a, "target": b} for a, b in self.edges]
+        if query == EXAMPLES_QUERY:
+            limit = params.get("example_limit", 3)
+            return "load_graph", [{"name": c["name"], "examples": c.get("examples", [])[:limit]} for c in self.concepts]
+        if "RETURN c.name AS name" in query and "$name" not in query:
+            return "concept_names", [{"name": c["name"]} for c in self.concepts]
+        if "prerequisites" in query and "$name" in query:
+            # 06의 개념 묶음 조회 (USE_GRAPH_ENGINE=False일 때) - 그래프 엔진으로 같은 결과를 만듦
+            bundle = self.engine.get_bundle(params["name"], self._bundle_depth(query))
+            if bundle is None:
+                return "concept_bundle", []
+            return "concept_bundle", [{
+                "name": bundle["name"], "definition": bundle["definition"], "examples": bundle["examples"],
+                "prerequisites": bundle["prerequisites"],
+                "edges": [{"source": e["source"], "target": e["target"]} for e in bundle["learning_path"]["edges"]],
+            }]
+        raise ValueError(f"ReplayGraph가 모르는 쿼리입니다:\n{query.strip()[:200]}")
+
+    @staticmethod
+    def _bundle_depth(query: str) -> int:
+        marker = "IS_PREREQUISITE_OF*1.."
+        start = query.index(marker) + len(marker)
+        end = start
+        while end < len(query) and query[end].isdigit():
+            end += 1
+        return int(query[start:end])
+
+
+def create_backends(usage_callback=None):
+    """06_tutor_rag.create_backends()가 TUTOR_BACKEND로 호출하는 팩토리"""
+    llm = ReplayChatModel(callbacks=[usage_callback] if usage_callback else None)
+    return llm, ReplayGraph(CONFIG.graph_fixture)
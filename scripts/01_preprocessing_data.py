@@ -1,6 +1,23 @@
 import os
+import sys
 import json
 import re
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+# utils 패키지를 불러오기 위해 프로젝트 루트를 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.columnar import write_columnar
+
+DEFAULT_OUTPUT_FILE = os.path.join(PROJECT_ROOT, "data", "processed_data.jsonl")
+
+# 전처리 규칙(기준 목록, 추출 필드)을 바꾸면 올려서 매니페스트에 저장된 결과를 모두 다시 만들게 합니다.
+PREPROCESS_VERSION = 1
 
 # --- 기준 정보 (Ground Truth): 진짜 '2022 개정 교육과정 (중1)' 성취기준 내용 ---
 STANDARDS_2022_SET = {
@@ -48,37 +65,123 @@ def get_true_2022_standard(source_info):
     return None
 
 # --- 메인 로직 ---
-RAW_DATA_DIRECTORY = "/Users/Seohyeon/Desktop/math/TL_06.중학교 1학년_03.수학_01.텍스트" 
-OUTPUT_FILE_PATH = "/Users/Seohyeon/math-tutor-rag/data/processed_data.jsonl" 
-
-with open(OUTPUT_FILE_PATH, 'w', encoding='utf-8') as outfile:
-    print(f"'{RAW_DATA_DIRECTORY}'에서 '진짜 2022' 데이터만 선별하여 추출합니다...")
-    total_files = 0
-    processed_count = 0
-    
-    for dirpath, _, filenames in os.walk(RAW_DATA_DIRECTORY):
+# 원본 JSON 파일들을 프로세스 풀에서 나눠 파싱하고, 결과는 파일 경로 순서대로 합쳐 항상 같은 출력 파일을 만듭니다.
+# 매니페스트(출력 파일 옆 .manifest.json)에 파일별 (mtime, 크기, 내용 해시, 추출 결과)를 저장하므로
+# 다시 실행하면 새로 생기거나 바뀐 파일만 파싱하고 나머지는 저장된 결과를 그대로 씁니다.
+#   - mtime과 크기가 같으면 파일을 읽지 않고 건너뜀
+#   - 다르면 파일을 읽어 해시를 비교하고, 내용이 같으면(복사/touch 등) 파싱 없이 저장된 결과를 재사용
+
+def process_file(task):
+    """(상대 경로, 절대 경로, 이전 매니페스트 항목) -> 매니페스트 항목 (프로세스 풀 작업 단위)"""
+    rel_path, file_path, old = task
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+    entry = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hash": hashlib.sha256(raw).hexdigest(), "record": None}
+    if old and not old.get("error") and old.get("hash") == entry["hash"]:
+        entry["record"] = old.get("record")
+        entry["reused"] = True # 내용이 같아 파싱하지 않음 (매니페스트에는 저장하지 않음)
+        return rel_path, entry
+    try:
+        data = json.loads(raw.decode('utf-8'))
+        achievement_standard = get_true_2022_standard(data['source_data_info'])
+        # 진짜 2022 기준이 아닌 파일은 record 없음 (다음 실행에서도 다시 파싱하지 않음)
+        if achievement_standard is not None:
+            entry["record"] = {
+                "source_file": os.path.basename(file_path), "grade": data['raw_data_info']['grade'],
+                "semester": data['raw_data_info']['semester'],
+                "achievement_code": achievement_standard['code'],
+                "achievement_desc": achievement_standard['desc'],
+                "text_description": data['learning_data_info']['text_description']
+            }
+    except (ValueError, KeyError, TypeError) as e:
+        # 형식이 잘못된 파일 하나가 전체 실행을 멈추지 않도록 기록만 하고 건너뜀 (다음 실행에서 다시 시도)
+        entry["record"] = None
+        entry["error"] = f"{type(e).__name__}: {e}"
+    return rel_path, entry
+
+def list_raw_files(raw_dir):
+    """{상대 경로: 절대 경로} (JSON 파일만)"""
+    files = {}
+    for dirpath, _, filenames in os.walk(raw_dir):
         for filename in filenames:
-            if not filename.endswith(".json"): continue
-            total_files += 1
-            file_path = os.path.join(dirpath, filename)
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                achievement_standard = get_true_2022_standard(data['source_data_info'])
-                
-                # 진짜 2022 기준이 아닌 파일은 건너뜀
-                if achievement_standard is None:
-                    continue
-                
-                processed_record = {
-                    "source_file": filename, "grade": data['raw_data_info']['grade'],
-                    "semester": data['raw_data_info']['semester'],
-                    "achievement_code": achievement_standard['code'],
-                    "achievement_desc": achievement_standard['desc'],
-                    "text_description": data['learning_data_info']['text_description']
-                }
-                outfile.write(json.dumps(processed_record, ensure_ascii=False) + '\n')
-                processed_count += 1
-
-print(f"\n총 {total_files}개의 파일 중 {processed_count}개의 '진짜 2022' 파일만 처리 완료.")
-print(f"'{OUTPUT_FILE_PATH}' 파일 생성이 완료되었습니다!")
\ No newline at end of file
+            if filename.endswith(".json"):
+                file_path = os.path.join(dirpath, filename)
+                files[os.path.relpath(file_path, raw_dir)] = file_path
+    return files
+
+def load_manifest(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == PREPROCESS_VERSION:
+            return manifest
+    return {"version": PREPROCESS_VERSION, "files": {}}
+
+def write_atomic(path, write_fn):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        write_fn(f)
+    os.replace(tmp_path, path)
+
+def preprocess(raw_dir, output_path, workers=None, chunksize=64, force=False):
+    manifest_path = os.path.splitext(output_path)[0] + ".manifest.json"
+    manifest = {"version": PREPROCESS_VERSION, "files": {}} if force else load_manifest(manifest_path)
+    previous = manifest["files"]
+
+    print(f"'{raw_dir}'에서 '진짜 2022' 데이터만 선별하여 추출합니다...")
+    files = list_raw_files(raw_dir)
+    todo = []
+    for rel_path in sorted(files):
+        stat = os.stat(files[rel_path])
+        old = previous.get(rel_path)
+        if old is None or old.get("error") or old["mtime_ns"] != stat.st_mtime_ns or old["size"] != stat.st_size:
+            todo.append((rel_path, files[rel_path], old))
+    print(f"JSON 파일 {len(files)}개 중 확인할 파일 {len(todo)}개 (mtime/크기 변경 없음 {len(files) - len(todo)}개 건너뜀)")
+
+    started = time.time()
+    results = {}
+    reused = 0
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # chunksize개씩 묶어 작업자에게 보내고, map은 입력 순서대로 결과를 돌려줌
+            for i, (rel_path, entry) in enumerate(executor.map(process_file, todo, chunksize=chunksize), start=1):
+                reused += entry.pop("reused", False)
+                results[rel_path] = entry
+                if i % 1000 == 0:
+                    print(f"   ... {i} / {len(todo)} 파일 파싱 ({i / (time.time() - started):.0f}개/초) ...")
+
+    # 사라진 파일은 매니페스트에서 제거, 결과는 경로 순서대로 합침
+    merged = {rel_path: results.get(rel_path, previous.get(rel_path)) for rel_path in sorted(files)}
+    errors = {rel_path: entry["error"] for rel_path, entry in merged.items() if entry.get("error")}
+    records = [entry["record"] for entry in merged.values() if entry.get("record")]
+
+    write_atomic(output_path, lambda f: f.writelines(json.dumps(r, ensure_ascii=False) + '\n' for r in records))
+    # 열 형식 저장본 (02/03 단계가 JSON 파싱 없이 성취기준별 문장을 바로 읽음)
+    columnar_path = os.path.splitext(output_path)[0] + ".columnar"
+    index = write_columnar(records, columnar_path)
+    write_atomic(manifest_path, lambda f: json.dump({"version": PREPROCESS_VERSION, "files": merged}, f, ensure_ascii=False))
+
+    elapsed = time.time() - started
+    for rel_path, error in errors.items():
+        print(f"⚠️ 파싱 실패 (다음 실행에서 다시 시도): {rel_path} ({error})")
+    print(f"\n총 {len(files)}개의 파일 중 {len(records)}개의 '진짜 2022' 파일만 처리 완료. "
+          f"(파싱 {len(todo) - reused}개, 내용 같음(해시 일치) {reused}개, {elapsed:.1f}초{f', {len(todo) / elapsed:.0f}개/초' if todo and elapsed > 0 else ''})")
+    print(f"'{output_path}' 파일 생성이 완료되었습니다!")
+    print(f"열 형식 저장본: '{columnar_path}' (성취기준 {len(index['standards'])}개, 고유 문자열 {index['strings']}개)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="AI-Hub 원본 JSON에서 2022 개정 중1 성취기준 데이터만 추출")
+    parser.add_argument("--input-dir", required=True, help="원본 JSON 폴더 (예: 'TL_06.중학교 1학년_03.수학_01.텍스트')")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT_FILE, help="출력 JSONL 경로 (같은 위치에 .manifest.json, .columnar/ 도 생성)")
+    parser.add_argument("--workers", type=int, default=None, help="파싱 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--chunksize", type=int, default=64, help="작업자에게 한 번에 보낼 파일 수")
+    parser.add_argument("--force", action="store_true", help="매니페스트를 무시하고 모든 파일을 다시 파싱")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    if not os.path.isdir(args.input_dir):
+        sys.exit(f"원본 폴더가 없습니다: {args.input_dir}")
+    preprocess(args.input_dir, args.output, args.workers, args.chunksize, args.force)
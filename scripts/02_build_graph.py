@@ -1,8 +1,18 @@
 import json
-from neo4j import GraphDatabase
+import time
+import argparse
 import hashlib
 from dotenv import load_dotenv
 import os
+import sys
+
+# utils 패키지를 불러오기 위해 프로젝트 루트를 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.graph_client import GraphClient
+from utils.columnar import ColumnarCorpus
 
 load_dotenv()
 
@@ -10,7 +20,9 @@ load_dotenv()
 NEO4J_URI = os.getenv('NEO4J_URI')
 NEO4J_USER = os.getenv('NEO4J_USER')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
-INPUT_FILE_PATH = "/Users/Seohyeon/math-tutor-rag/data/processed_data.jsonl"
+INPUT_FILE_PATH = os.path.join(PROJECT_ROOT, "data", "processed_data.jsonl") # 01_preprocessing_data.py의 기본 출력
+COLUMNAR_PATH = os.path.splitext(INPUT_FILE_PATH)[0] + ".columnar" # 01이 함께 만드는 열 형식 저장본 (있으면 우선 사용)
+DEFAULT_BATCH_SIZE = 1000
 
 DOMAIN_MAP = {
     "01": "수와 연산",
@@ -19,73 +31,149 @@ DOMAIN_MAP = {
     "04": "자료와 가능성"
 }
 
-class Neo4jGraph:
-    def __init__(self, uri, user, password):
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
-    def close(self):
-        self._driver.close()
-    def run_query(self, query, parameters=None):
-        with self._driver.session() as session:
-            result = session.run(query, parameters)
-            # 쓰기/읽기 모두에 대응할 수 있도록 데이터를 반환하고, 호출하는 쪽에서 사용 여부 결정
-            return [record for record in result]
-    def clear_database(self):
-        print("기존 데이터베이스를 초기화합니다...")
-        query = "MATCH (n) DETACH DELETE n"
-        self.run_query(query)
-        print("초기화 완료.")
-
-def build_graph(graph_db):
-    graph_db.clear_database()
-    print(f"'{INPUT_FILE_PATH}' 파일을 읽어 그래프 생성을 시작합니다...")
-    
-    total_lines = sum(1 for line in open(INPUT_FILE_PATH, 'r', encoding='utf-8'))
-    line_counter = 0
-    
-    with open(INPUT_FILE_PATH, 'r', encoding='utf-8') as f:
+# MERGE가 인덱스를 타도록 키 속성에 유니크 제약 (없으면 행마다 전체 노드 스캔)
+CONSTRAINT_QUERIES = [
+    "CREATE CONSTRAINT achievement_standard_code IF NOT EXISTS FOR (s:AchievementStandard) REQUIRE s.code IS UNIQUE",
+    "CREATE CONSTRAINT concept_id IF NOT EXISTS FOR (c:Concept) REQUIRE c.concept_id IS UNIQUE",
+]
+
+STANDARDS_QUERY = """
+UNWIND $rows AS row
+MERGE (s:AchievementStandard {code: row.code})
+SET s.description = row.desc, s.domain = row.domain, s.grade = row.grade, s.semester = row.semester
+"""
+
+CONCEPTS_QUERY = """
+UNWIND $rows AS row
+MERGE (c:Concept {concept_id: row.id})
+SET c.name = row.name, c.definition = row.def, c.grade = row.grade,
+    c.semester = row.semester, c.domain = row.domain, c.text_snippets = [row.def]
+"""
+
+LINKS_QUERY = """
+UNWIND $rows AS row
+MATCH (c:Concept {concept_id: row.id})
+MATCH (s:AchievementStandard {code: row.code})
+MERGE (c)-[:BELONGS_TO]->(s)
+"""
+
+def iter_source_records(path):
+    """전처리 결과를 한 건씩 읽습니다. path가 열 형식 폴더면 mmap으로 (JSON 파싱 없음), 아니면 JSONL을 한 줄씩"""
+    if os.path.isdir(path):
+        with ColumnarCorpus(path) as corpus:
+            yield from corpus.rows()
+        return
+    with open(path, 'r', encoding='utf-8') as f:
         for line in f:
-            line_counter += 1
-            record = json.loads(line)
-
-            # record에서 데이터를 추출해서 각 변수에 할당
-            ach_code = record.get("achievement_code")
-            ach_desc = record.get("achievement_desc")
-            text_desc = record.get("text_description")
-            
-            if ach_code == "N/A":
-                continue # 성취기준 코드 없으면 건너뛰기? 굳이하지말까..
-            
-            domain_code = ach_code[2:4]
-            domain_name = DOMAIN_MAP.get(domain_code, "기타")
-            
-            concept_id = "concept_" + hashlib.md5(text_desc.encode()).hexdigest()
-
-            # 쿼리를 하나로 합쳐서 DB 통신을 한 번만 하도록 수정
-            combined_query = """
-            MERGE (s:AchievementStandard {code: $code})
-            SET s.description = $desc, s.domain = $domain, s.grade = $grade, s.semester = $semester
-
-            MERGE (c:Concept {concept_id: $id})
-            SET c.name = $name, c.definition = $def, c.grade = $grade, 
-                c.semester = $semester, c.domain = $domain, c.text_snippets = [$text]
-
-            MERGE (c)-[:BELONGS_TO]->(s)
-            """
-            parameters = {
-                "code": ach_code, "desc": ach_desc, "domain": domain_name,
-                "grade": record.get("grade"), "semester": record.get("semester"),
-                "id": concept_id, "name": text_desc[:30] + "...", 
-                "def": text_desc, "text": text_desc
-            }
-            graph_db.run_query(combined_query, parameters)
-
-            if line_counter % 500 == 0:
-                print(f"   ... {line_counter} / {total_lines} 라인 처리 중 ...")
-
-    print("그래프 생성이 완료되었습니다!")
+            yield json.loads(line)
+
+def iter_records(path):
+    """전처리 결과를 (성취기준, Concept) 행으로 변환 (파일은 한 번만 읽음)"""
+    for record in iter_source_records(path):
+        # record에서 데이터를 추출해서 각 변수에 할당
+        ach_code = record.get("achievement_code")
+        text_desc = record.get("text_description")
+
+        if ach_code == "N/A":
+            continue # 성취기준 코드 없으면 건너뛰기? 굳이하지말까..
+
+        domain_name = DOMAIN_MAP.get(ach_code[2:4], "기타")
+        yield {
+            "code": ach_code, "desc": record.get("achievement_desc"), "domain": domain_name,
+            "grade": record.get("grade"), "semester": record.get("semester"),
+            "id": "concept_" + hashlib.md5(text_desc.encode()).hexdigest(),
+            "name": text_desc[:30] + "...", "def": text_desc,
+        }
+
+class BatchLoader:
+    """
+    행을 batch_size개씩 모아 UNWIND 쿼리 3개(성취기준/Concept/BELONGS_TO)를 한 쓰기 트랜잭션으로 보냅니다.
+    배치 안에서 같은 성취기준 코드, 같은 concept_id는 한 행으로 합치되 마지막 행의 값을 보내므로
+    (행마다 SET하던 예전과 같이 나중 행이 이김) 중복 문장은 한 번만 쓰고,
+    관계는 (concept_id, 성취기준) 쌍마다 한 번 보내 여러 성취기준에 속한 문장도 모두 연결합니다.
+    """
+
+    def __init__(self, session, batch_size=DEFAULT_BATCH_SIZE):
+        self.session = session
+        self.batch_size = batch_size
+        self.seen_codes = set()
+        self.seen_ids = set()
+        self.seen_links = set()
+        self._standards, self._concepts, self._links = {}, {}, []
+        self.rows = 0
+        self.duplicates = 0
+        self.transactions = 0
+
+    def add(self, row):
+        self.rows += 1
+        self.seen_codes.add(row["code"])
+        self._standards[row["code"]] = row
+        if row["id"] in self.seen_ids:
+            self.duplicates += 1
+        self.seen_ids.add(row["id"])
+        self._concepts[row["id"]] = row
+        link = (row["id"], row["code"])
+        if link not in self.seen_links:
+            self.seen_links.add(link)
+            self._links.append({"id": row["id"], "code": row["code"]})
+        if self.rows % self.batch_size == 0:
+            self.flush()
+
+    def flush(self):
+        if not (self._standards or self._concepts or self._links):
+            return
+        standards, concepts, links = list(self._standards.values()), list(self._concepts.values()), self._links
+        self._standards, self._concepts, self._links = {}, {}, []
+        self.session.execute_write(self._write_batch, standards, concepts, links)
+        self.transactions += 1
+
+    @staticmethod
+    def _write_batch(tx, standards, concepts, links):
+        # 관리형 트랜잭션: 일시적 오류면 드라이버가 배치 전체를 다시 실행 (MERGE라 재실행해도 안전)
+        tx.run(STANDARDS_QUERY, rows=standards).consume()
+        tx.run(CONCEPTS_QUERY, rows=concepts).consume()
+        tx.run(LINKS_QUERY, rows=links).consume()
+
+def clear_database(graph_db):
+    print("기존 데이터베이스를 초기화합니다...")
+    graph_db.write("MATCH (n) DETACH DELETE n")
+    print("초기화 완료.")
+
+def default_input_path():
+    return COLUMNAR_PATH if os.path.exists(os.path.join(COLUMNAR_PATH, "index.json")) else INPUT_FILE_PATH
+
+def build_graph(graph_db, input_path=None, batch_size=DEFAULT_BATCH_SIZE):
+    input_path = input_path or default_input_path()
+    clear_database(graph_db)
+    for query in CONSTRAINT_QUERIES:
+        graph_db.write(query)
+    print(f"'{input_path}' 파일을 읽어 그래프 생성을 시작합니다... (배치 크기 {batch_size})")
+
+    started = time.time()
+    with graph_db.session() as session:
+        loader = BatchLoader(session, batch_size)
+        for row in iter_records(input_path):
+            loader.add(row)
+            if loader.rows % batch_size == 0:
+                elapsed = time.time() - started
+                print(f"   ... {loader.rows} 라인 처리 중 ({loader.rows / elapsed:.0f}행/초) ...")
+        loader.flush()
+
+    elapsed = time.time() - started
+    print(f"그래프 생성이 완료되었습니다! ({loader.rows}행, 성취기준 {len(loader.seen_codes)}개, "
+          f"Concept {len(loader.seen_ids)}개 (중복 {loader.duplicates}행 제외), 관계 {len(loader.seen_links)}개, "
+          f"트랜잭션 {loader.transactions}회, {elapsed:.1f}초, {loader.rows / elapsed if elapsed > 0 else 0:.0f}행/초)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="전처리 결과로 성취기준/Concept 그래프 생성")
+    parser.add_argument("--input", default=None,
+                        help="전처리된 JSONL 파일 또는 열 형식 폴더 (기본: data/processed_data.columnar, 없으면 data/processed_data.jsonl)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="트랜잭션 하나에 보낼 행 수")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    db = Neo4jGraph(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
-    build_graph(db)
-    db.close()
\ No newline at end of file
+    args = parse_args()
+    db = GraphClient(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, name="build_graph")
+    build_graph(db, args.input, args.batch_size)
+    db.close()
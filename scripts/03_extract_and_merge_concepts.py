@@ -1,9 +1,23 @@
 import os
+import sys
 import json
+import time
+import argparse
 import openai
-from neo4j import GraphDatabase
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+# utils 패키지를 불러오기 위해 프로젝트 루트를 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.concept_graph import stamp_generation
+from utils.rate_limit import TokenBucket, retry_with_backoff
+from utils.graph_client import GraphClient
+from utils.extraction_cache import EXTRACTION_CACHE_FILE, ExtractionCache
+from utils.columnar import COLUMNAR_DIR, ColumnarCorpus
+
 #환경설정
 load_dotenv()
 NEO4J_URI = os.getenv('NEO4J_URI')
@@ -11,8 +25,17 @@ NEO4J_USER = os.getenv('NEO4J_USER')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
 openai.api_key = os.getenv('OPENAI_API_KEY')
 
+# 추출 프롬프트/모델을 바꾸면 버전을 올려야 캐시된 결과를 다시 쓰지 않습니다.
+EXTRACTION_PROMPT_VERSION = "v1"
+EXTRACTION_MODEL = "gpt-4o-mini"
+CACHE_FILE = os.path.join(PROJECT_ROOT, EXTRACTION_CACHE_FILE)
+CORPUS_PATH = os.path.join(PROJECT_ROOT, COLUMNAR_DIR) # 01이 만드는 열 형식 저장본 (없으면 그래프에서 문장 조회)
+
+# 일시적인 오류(속도 제한, 연결 끊김, 서버 오류, 깨진 JSON)만 재시도
+RETRYABLE_ERRORS = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError, json.JSONDecodeError)
+
 # LLM 호출함수
-def extract_core_concepts_with_llm(texts):
+def call_extraction_llm(texts):
     system_prompt = """
     당신은 중학교 수학 교과서의 '소단원 목차'를 만드는 편집자입니다.
     주어진 문장들을 바탕으로, 학생들이 실제로 배우게 될 '소단원의 제목'이 될 만한 구체적인 학습 개념을 1~2개 정도 추출해주세요.
@@ -31,89 +54,161 @@ def extract_core_concepts_with_llm(texts):
     """
     
     user_prompt = "다음 문장들에서 핵심 개념을 추출해줘:\n\n" + "\n".join(texts)
+    response = openai.chat.completions.create(
+        model=EXTRACTION_MODEL,
+        messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
+        response_format={"type": "json_object"}
+    )
+    result_json = response.choices[0].message.content
+    result_data = json.loads(result_json)
+    concepts = result_data.get("concepts", result_data)
+    if isinstance(concepts, dict): return [concepts]
+    elif isinstance(concepts, list): return concepts
+    else: return []
+
+def extract_core_concepts_with_llm(texts, limiter=None, retries=3, label=""):
+    """속도 제한(limiter) 안에서 호출하고 일시적 오류는 백오프 후 재시도. 최종 실패 시 빈 리스트"""
+    def attempt():
+        if limiter:
+            limiter.acquire()
+        return call_extraction_llm(texts)
+
+    def on_retry(attempt_no, error, wait):
+        print(f"  ⚠️ {label} LLM 호출 실패 ({type(error).__name__}: {error}), {wait:.1f}초 후 재시도 ({attempt_no}/{retries})")
+
     try:
-        response = openai.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}],
-            response_format={"type": "json_object"}
-        )
-        result_json = response.choices[0].message.content
-        result_data = json.loads(result_json)
-        concepts = result_data.get("concepts", result_data)
-        if isinstance(concepts, dict): return [concepts]
-        elif isinstance(concepts, list): return concepts
-        else: return []
+        return retry_with_backoff(attempt, retries=retries, retry_on=RETRYABLE_ERRORS, on_retry=on_retry)
     except Exception as e:
         print(f"LLM 호출 중 오류 발생: {e}")
         return []
 
-class Neo4jGraph:
-    def __init__(self, uri, user, password):
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
-    def close(self):
-        self._driver.close()
-    def run_query(self, query, parameters=None):
-        with self._driver.session() as session:
-            result = session.run(query, parameters)
-            # 쓰기 작업 후에도 요약 정보 등이 필요할 수 있으므로, 항상 결과를 리스트로 반환
-            return [record for record in result]
-
-def link_concepts(graph_db):
-    print("그래프에서 모든 성취기준을 가져옵니다...")
-    # 필요한 속성만 가져오기
-    query = "MATCH (s:AchievementStandard) RETURN s.code AS code, s.domain AS domain, s.grade AS grade, s.semester AS semester"
-    standards = graph_db.run_query(query)
-    
-    for standard_record in standards:
-        ach_code = standard_record["code"]
-        print(f"\n--- 성취기준 '{ach_code}' 처리 중 ---")
-
+def fetch_standards(graph_db, corpus=None):
+    """
+    성취기준별 속성과 연결된 Concept 문장 (쿼리 한 번).
+    corpus(열 형식 저장본)가 있으면 문장은 그래프 대신 저장본의 성취기준 행 범위에서 바로 읽습니다.
+    """
+    if corpus is not None:
         query = """
-        MATCH (c:Concept)-[:BELONGS_TO]->(s:AchievementStandard {code: $code})
-        RETURN c.definition AS text
+        MATCH (s:AchievementStandard)
+        RETURN s.code AS code, s.domain AS domain, s.grade AS grade, s.semester AS semester
+        ORDER BY code
         """
-        raw_concept_records = graph_db.run_query(query, parameters={"code": ach_code})
+        return [
+            {"code": r["code"], "domain": r["domain"], "grade": r["grade"], "semester": r["semester"],
+             "texts": corpus.texts(r["code"])}
+            for r in graph_db.run_query(query)
+        ]
+
+    query = """
+    MATCH (s:AchievementStandard)
+    OPTIONAL MATCH (c:Concept)-[:BELONGS_TO]->(s)
+    WITH s, collect(c.definition) AS texts
+    RETURN s.code AS code, s.domain AS domain, s.grade AS grade, s.semester AS semester, texts
+    ORDER BY code
+    """
+    return [
+        {"code": r["code"], "domain": r["domain"], "grade": r["grade"], "semester": r["semester"], "texts": r["texts"]}
+        for r in graph_db.run_query(query)
+    ]
+
+def merge_core_concepts(graph_db, standard, core_concepts):
+    for concept in core_concepts:
+        merge_query = """
+        MERGE (core:CoreConcept {name: $name})
+        ON CREATE SET core.definition = $definition,
+                      core.domain = $domain,
+                      core.grade = $grade,
+                      core.semester = $semester
         
-        if not raw_concept_records:
-            print("  -> 연결된 Concept이 없어 건너뜁니다.")
-            continue
-            
-        raw_texts = [rec["text"] for rec in raw_concept_records]
-            
-        print(f"  -> {len(raw_texts)}개의 문장을 LLM으로 분석합니다...")
-        core_concepts = extract_core_concepts_with_llm(raw_texts)
+        WITH core
+        MATCH (raw:Concept)-[:BELONGS_TO]->(s:AchievementStandard {code: $ach_code})
+        WHERE raw.definition IN $raw_definitions
         
-        if not core_concepts:
-            print("  -> LLM이 핵심 개념을 추출하지 못했습니다.")
-            continue
-            
-        print(f"  -> 추출된 핵심 개념: {[c['name'] for c in core_concepts]}")
-
-        for concept in core_concepts:
-            merge_query = """
-            MERGE (core:CoreConcept {name: $name})
-            ON CREATE SET core.definition = $definition,
-                          core.domain = $domain,
-                          core.grade = $grade,
-                          core.semester = $semester
-            
-            WITH core
-            MATCH (raw:Concept)-[:BELONGS_TO]->(s:AchievementStandard {code: $ach_code})
-            WHERE raw.definition IN $raw_definitions
-            
-            MERGE (raw)-[:IS_EXAMPLE_OF]->(core)
-            """
-            graph_db.run_query(merge_query, parameters={
-                "name": concept["name"], "definition": concept["definition"],
-                "domain": standard_record["domain"], 
-                "grade": standard_record["grade"], # standard_record에서 직접 가져옴
-                "semester": standard_record["semester"], # standard_record에서 직접 가져옴
-                "ach_code": ach_code, 
-                "raw_definitions": raw_texts
-            })
-    print("\n핵심 개념 추출 및 연결 작업이 완료되었습니다!")
+        MERGE (raw)-[:IS_EXAMPLE_OF]->(core)
+        """
+        graph_db.run_query(merge_query, parameters={
+            "name": concept["name"], "definition": concept["definition"],
+            "domain": standard["domain"],
+            "grade": standard["grade"],
+            "semester": standard["semester"],
+            "ach_code": standard["code"],
+            "raw_definitions": standard["texts"]
+        })
+
+def link_concepts(graph_db, workers=4, requests_per_minute=300, retries=3, cache=None, force=False, corpus=None):
+    """
+    성취기준마다 LLM으로 핵심 개념을 추출해 CoreConcept로 병합합니다.
+    LLM 호출은 workers개 스레드에서 동시에 (전체 속도는 requests_per_minute 이하),
+    Neo4j 쓰기는 메인 스레드에서 성취기준 순서대로 진행합니다.
+    cache가 있으면 입력(문장/프롬프트 버전/모델)이 같은 성취기준은 LLM 없이 저장된 결과로 쓰기만 다시 합니다.
+    """
+    print("그래프에서 모든 성취기준을 가져옵니다...")
+    standards = fetch_standards(graph_db, corpus)
+    todo = [s for s in standards if s["texts"]]
+    for standard in standards:
+        if not standard["texts"]:
+            print(f"  -> '{standard['code']}': 연결된 Concept이 없어 건너뜁니다.")
+    cached = {s["code"]: cache.get(s["texts"]) for s in todo} if cache and not force else {}
+    misses = [s for s in todo if cached.get(s["code"]) is None]
+    print(f"성취기준 {len(standards)}개 중 {len(todo)}개 처리: 캐시 재사용 {len(todo) - len(misses)}개, "
+          f"LLM 분석 {len(misses)}개 (동시 {workers}개, 분당 최대 {requests_per_minute}회, 재시도 {retries}회)")
+
+    limiter = TokenBucket.per_minute(requests_per_minute, burst=workers)
+    started = time.time()
+    extracted = 0
+    linked = 0
+
+    def extract(standard):
+        return extract_core_concepts_with_llm(standard["texts"], limiter, retries, label=f"'{standard['code']}'")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        # map은 제출 순서대로 결과를 돌려주므로 쓰기 순서가 매 실행 같음 (먼저 끝난 결과는 앞 순서를 기다림)
+        results = executor.map(extract, misses)
+        for i, standard in enumerate(todo, start=1):
+            core_concepts = cached.get(standard["code"])
+            from_cache = core_concepts is not None
+            if not from_cache:
+                core_concepts = next(results)
+                if core_concepts and cache:
+                    cache.put(standard["texts"], core_concepts, code=standard["code"])
+
+            elapsed = time.time() - started
+            rate = i / elapsed if elapsed > 0 else 0.0
+            print(f"\n--- [{i}/{len(todo)}] 성취기준 '{standard['code']}' ({len(standard['texts'])}개 문장, {rate:.2f}개/초) ---")
+
+            if not core_concepts:
+                print("  -> LLM이 핵심 개념을 추출하지 못했습니다.")
+                continue
+
+            print(f"  -> {'캐시된' if from_cache else '추출된'} 핵심 개념: {[c['name'] for c in core_concepts]}")
+            merge_core_concepts(graph_db, standard, core_concepts)
+            extracted += 1
+            linked += len(core_concepts)
+
+    elapsed = time.time() - started
+    print(f"\n핵심 개념 추출 및 연결 작업이 완료되었습니다! "
+          f"(성취기준 {extracted}/{len(todo)}개, 핵심 개념 {linked}개, {elapsed:.1f}초, "
+          f"{len(todo) / elapsed if elapsed > 0 else 0:.2f}개/초, 스레드 합계 속도 제한 대기 {limiter.waited_seconds:.1f}초)")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="성취기준별 핵심 개념 추출 및 CoreConcept 병합")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 보낼 LLM 요청 수")
+    parser.add_argument("--rpm", type=float, default=300, help="분당 최대 LLM 요청 수")
+    parser.add_argument("--retries", type=int, default=3, help="일시적 오류 시 재시도 횟수")
+    parser.add_argument("--force", action="store_true", help="추출 캐시를 무시하고 모든 성취기준을 다시 추출 (결과는 캐시에 저장)")
+    parser.add_argument("--corpus", default=CORPUS_PATH, help="성취기준별 문장을 읽을 열 형식 저장본 (없으면 그래프에서 조회)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    db = Neo4jGraph(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
-    link_concepts(db)
+    args = parse_args()
+    db = GraphClient(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, name="extract_concepts")
+    cache = ExtractionCache(CACHE_FILE, EXTRACTION_PROMPT_VERSION, EXTRACTION_MODEL)
+    corpus = ColumnarCorpus.open_if_exists(args.corpus)
+    if corpus is None:
+        print(f"열 형식 저장본이 없어 그래프에서 문장을 조회합니다: {args.corpus}")
+    link_concepts(db, args.workers, args.rpm, args.retries, cache=cache, force=args.force, corpus=corpus)
+    if corpus is not None:
+        corpus.close()
+    # 튜터의 메모리 그래프가 다시 읽어가도록 세대 값 갱신
+    stamp_generation(db.run_query)
     db.close()
\ No newline at end of file
@@ -1,8 +1,21 @@
 import os
+import sys
+import ast
+import argparse
 import openai
-from neo4j import GraphDatabase
+from collections import Counter
 from dotenv import load_dotenv
 
+# utils 패키지를 불러오기 위해 프로젝트 루트를 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.concept_graph import ConceptGraph, SNAPSHOT_FILE, stamp_generation
+from utils.reachability import compare_with_rows
+from utils.graph_client import GraphClient
+from utils.graph_analytics import REPORT_FILE, analyze_graph, check_report, fetch_related_pairs, write_report
+
 load_dotenv()
 NEO4J_URI = os.getenv('NEO4J_URI')
 NEO4J_USER = os.getenv('NEO4J_USER')
@@ -45,7 +58,6 @@ PREREQUISITE_RULES = {
     "평행선": ["직선"],
     "동위각": ["평행선"],
     "엇각": ["평행선"],
-    "수선": ["직선"],
     "맞꼭지각": ["교점"],
     
     # 다각형
@@ -153,193 +165,251 @@ RELATED_CONCEPTS = {
     ("분배법칙", "이항"): "식의 변형",
 }
 
-class Neo4jGraph:
-    def __init__(self, uri, user, password):
-        self._driver = GraphDatabase.driver(uri, auth=(user, password))
-    
-    def close(self):
-        self._driver.close()
-    
-    def run_query(self, query, parameters=None):
-        with self._driver.session() as session:
-            result = session.run(query, parameters)
-            return [record for record in result]
+# ============ 규칙 검사 (로드 시) ============
+def find_duplicate_rule_keys(source_path, var_names=("PREREQUISITE_RULES", "RELATED_CONCEPTS")):
+    """
+    dict 리터럴에서 같은 키가 두 번 나오면 앞의 값이 조용히 사라지므로, 소스를 파싱해 중복 키를 찾습니다.
+    반환: [(변수 이름, 키, [줄 번호, ...]), ...]
+    """
+    with open(source_path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    duplicates = []
+    for node in tree.body:
+        # RULES = {...} 와 RULES: dict = {...} 모두 검사
+        if isinstance(node, ast.Assign):
+            targets = node.targets
+        elif isinstance(node, ast.AnnAssign):
+            targets = [node.target]
+        else:
+            continue
+        names = [t.id for t in targets if isinstance(t, ast.Name) and t.id in var_names]
+        if not names or not isinstance(node.value, ast.Dict):
+            continue
+        lines = {}
+        for key in node.value.keys:
+            if key is None: # **다른_dict 펼치기는 검사하지 않음
+                continue
+            try:
+                value = ast.literal_eval(key)
+            except ValueError: # 상수가 아닌 키는 식 그대로 비교
+                value = ast.unparse(key)
+            lines.setdefault(value, []).append(key.lineno)
+        duplicates += [(names[0], key, linenos) for key, linenos in lines.items() if len(linenos) > 1]
+    return duplicates
+
+def check_rules():
+    duplicates = find_duplicate_rule_keys(os.path.abspath(__file__))
+    if duplicates:
+        details = "\n".join(f"  - {var}[{key!r}]: {', '.join(map(str, linenos))}번째 줄" for var, key, linenos in duplicates)
+        raise ValueError(f"규칙에 중복 키가 있습니다 (마지막 값만 적용됨). 하나로 합쳐주세요:\n{details}")
+
+check_rules()
+
+# ============ 규칙 적용 ============
+PREREQUISITE_QUERY = """
+UNWIND $rows AS row
+MATCH (from:CoreConcept {name: row.prereq})
+MATCH (to:CoreConcept {name: row.concept})
+MERGE (from)-[r:IS_PREREQUISITE_OF]->(to)
+ON CREATE SET 
+    r.confidence = 1.0,
+    r.source = 'rule-based',
+    r.created_at = datetime()
+RETURN count(r) AS linked
+"""
 
+RELATED_QUERY = """
+UNWIND $rows AS row
+MATCH (c1:CoreConcept {name: row.c1})
+MATCH (c2:CoreConcept {name: row.c2})
+MERGE (c1)-[r:RELATED_TO]-(c2)
+ON CREATE SET 
+    r.description = row.desc,
+    r.created_at = datetime()
+RETURN count(r) AS linked
+"""
+
+def apply_rules(graph_db, query: str, rows: list) -> tuple:
+    """규칙 행을 한 번에 MERGE하고 (새로 만든 관계 수, 이미 있던 관계 수)를 반환 (생성 수는 쿼리 요약의 relationships_created)"""
+    if not rows:
+        return 0, 0
+    records, counters = graph_db.write_with_counters(query, {"rows": rows})
+    created = counters["relationships_created"]
+    return created, records[0]["linked"] - created
+
+def fetch_concept_names(graph_db) -> set:
+    """모든 CoreConcept 이름 (쿼리 한 번, 규칙의 양 끝 개념은 이 집합으로 로컬에서 확인)"""
+    return {r["name"] for r in graph_db.run_query("MATCH (c:CoreConcept) RETURN c.name AS name")}
+
+def resolve_rules(pairs, names: set):
+    """
+    pairs: [(규칙 행, (개념 이름, ...)), ...] -> (양 끝이 모두 있는 행, {없는 이름: 그 이름을 쓰는 규칙 수})
+    """
+    resolved = []
+    unresolved = Counter()
+    for row, endpoints in pairs:
+        missing = [name for name in endpoints if name not in names]
+        if missing:
+            unresolved.update(missing)
+        else:
+            resolved.append(row)
+    return resolved, unresolved
+
+def report_unresolved(unresolved: Counter, skipped: int):
+    if not unresolved:
+        return
+    print(f"✗ 그래프에 없는 개념 {len(unresolved)}개 때문에 규칙 {skipped}개를 건너뜁니다:")
+    for name, count in sorted(unresolved.items(), key=lambda item: (-item[1], item[0])):
+        print(f"  - {name} (규칙 {count}개)")
 
 #PREREQUISITE_RULES에 정의된 내용에 따라, 
 #개념들 사이에 '선수 지식(IS_PREREQUISITE_OF)' 관계를 생성
-def create_prerequisite_relationships(graph_db):
-    """규칙 기반 선수 관계 생성"""
+def create_prerequisite_relationships(graph_db, names: set = None):
+    """규칙 기반 선수 관계 생성 (양 끝 개념을 로컬에서 확인한 뒤 UNWIND 한 번으로 기록)"""
     print("=== 선수 관계(IS_PREREQUISITE_OF) 생성 중 ===\n")
-    
-    created_count = 0
-    failed_count = 0
-    
-    for concept, prerequisites in PREREQUISITE_RULES.items():
-        for prereq in prerequisites:
-            try:
-                query = """
-                MATCH (from:CoreConcept {name: $prereq})
-                MATCH (to:CoreConcept {name: $concept})
-                MERGE (from)-[r:IS_PREREQUISITE_OF]->(to)
-                ON CREATE SET 
-                    r.confidence = 1.0,
-                    r.source = 'rule-based',
-                    r.created_at = datetime()
-                RETURN from.name AS from_name, to.name AS to_name
-                """
-                result = graph_db.run_query(query, {
-                    "prereq": prereq,
-                    "concept": concept
-                })
-                
-                if result:
-                    print(f"✓ {prereq} → {concept}")
-                    created_count += 1
-                else:
-                    print(f"✗ 개념을 찾을 수 없음: {prereq} 또는 {concept}")
-                    failed_count += 1
-                    
-            except Exception as e:
-                print(f"✗ 오류 ({prereq} → {concept}): {e}")
-                failed_count += 1
-    
-    print(f"\n총 {created_count}개 관계 생성, {failed_count}개 실패\n")
+    names = fetch_concept_names(graph_db) if names is None else names
+    
+    pairs = [
+        ({"prereq": prereq, "concept": concept}, (prereq, concept))
+        for concept, prerequisites in PREREQUISITE_RULES.items()
+        for prereq in prerequisites
+    ]
+    rows, unresolved = resolve_rules(pairs, names)
+    report_unresolved(unresolved, len(pairs) - len(rows))
+    
+    created, existing = apply_rules(graph_db, PREREQUISITE_QUERY, rows)
+    print(f"\n총 {created}개 관계 생성 (이미 있음 {existing}개), {len(pairs) - len(rows)}개 실패 (규칙 {len(pairs)}개)\n")
 
 #RELATED_CONCEPTS 규칙에 따라, '관련 개념(RELATED_TO)' 관계를 생성
-def create_related_relationships(graph_db):
-    """관련 개념 관계 생성"""
+def create_related_relationships(graph_db, names: set = None):
+    """관련 개념 관계 생성 (UNWIND 한 번)"""
     print("=== 관련 개념(RELATED_TO) 관계 생성 중 ===\n")
+    names = fetch_concept_names(graph_db) if names is None else names
     
-    created_count = 0
-    
-    for (concept1, concept2), description in RELATED_CONCEPTS.items():
-        try:
-            query = """
-            MATCH (c1:CoreConcept {name: $c1})
-            MATCH (c2:CoreConcept {name: $c2})
-            MERGE (c1)-[r:RELATED_TO]-(c2)
-            ON CREATE SET 
-                r.description = $desc,
-                r.created_at = datetime()
-            RETURN c1.name AS c1_name, c2.name AS c2_name
-            """
-            result = graph_db.run_query(query, {
-                "c1": concept1,
-                "c2": concept2,
-                "desc": description
-            })
-            
-            if result:
-                print(f"✓ {concept1} ↔ {concept2} ({description})")
-                created_count += 1
-                
-        except Exception as e:
-            print(f"✗ 오류 ({concept1} ↔ {concept2}): {e}")
+    pairs = [
+        ({"c1": concept1, "c2": concept2, "desc": description}, (concept1, concept2))
+        for (concept1, concept2), description in RELATED_CONCEPTS.items()
+    ]
+    rows, unresolved = resolve_rules(pairs, names)
+    report_unresolved(unresolved, len(pairs) - len(rows))
     
-    print(f"\n총 {created_count}개 관계 생성\n")
+    created, existing = apply_rules(graph_db, RELATED_QUERY, rows)
+    print(f"\n총 {created}개 관계 생성 (이미 있음 {existing}개)\n")
 
-def analyze_coverage(graph_db):
-    """관계 생성 커버리지 분석"""
-    print("=== 커버리지 분석 ===\n")
-    
-    # 전체 개념 수
-    total_query = "MATCH (c:CoreConcept) RETURN count(c) AS total"
-    total = graph_db.run_query(total_query)[0]["total"]
-    
-    # 선수 관계가 있는 개념 수
-    with_prereq_query = """
-    MATCH (c:CoreConcept)
-    WHERE EXISTS((c)-[:IS_PREREQUISITE_OF]->()) 
-       OR EXISTS(()-[:IS_PREREQUISITE_OF]->(c))
-    RETURN count(DISTINCT c) AS count
-    """
-    with_prereq = graph_db.run_query(with_prereq_query)[0]["count"]
-    
-    # 관련 관계가 있는 개념 수
-    with_related_query = """
-    MATCH (c:CoreConcept)
-    WHERE EXISTS((c)-[:RELATED_TO]-())
-    RETURN count(DISTINCT c) AS count
-    """
-    with_related = graph_db.run_query(with_related_query)[0]["count"]
-    
-    # 고립된 개념 (관계 없음)
-    isolated_query = """
-    MATCH (c:CoreConcept)
-    WHERE NOT EXISTS((c)-[:IS_PREREQUISITE_OF]->())
-      AND NOT EXISTS(()-[:IS_PREREQUISITE_OF]->(c))
-      AND NOT EXISTS((c)-[:RELATED_TO]-())
-    RETURN c.name AS name, c.domain AS domain
-    ORDER BY c.domain, c.name
-    """
-    isolated = graph_db.run_query(isolated_query)
-    
+def print_coverage(report: dict):
+    """관계 생성 커버리지 분석 (분석 보고서 출력)"""
+    print("\n=== 커버리지 분석 ===\n")
+    
+    total = report["concepts"]
+    coverage = report["coverage"]
+    if not total:
+        print("CoreConcept가 없습니다.")
+        return
     print(f"전체 개념 수: {total}")
-    print(f"선수 관계 포함: {with_prereq} ({with_prereq/total*100:.1f}%)")
-    print(f"관련 관계 포함: {with_related} ({with_related/total*100:.1f}%)")
-    print(f"\n고립된 개념 ({len(isolated)}개):")
-    
-    current_domain = None
-    for record in isolated:
-        if record["domain"] != current_domain:
-            current_domain = record["domain"]
-            print(f"\n[{current_domain}]")
-        print(f"  - {record['name']}")
+    print(f"선수 관계 포함: {coverage['with_prerequisite']} ({coverage['with_prerequisite']/total*100:.1f}%)")
+    print(f"관련 관계 포함: {coverage['with_related']} ({coverage['with_related']/total*100:.1f}%)")
+    
+    print("\n영역별:")
+    for domain, stats in report["domains"].items():
+        print(f"  [{domain}] {stats['total']}개, 선수 관계 {stats['with_prerequisite']}개, "
+              f"관련 관계 {stats['with_related']}개, 고립 {len(stats['isolated'])}개")
+    
+    print(f"\n고립된 개념 ({coverage['isolated']}개):")
+    for domain, stats in report["domains"].items():
+        if stats["isolated"]:
+            print(f"\n[{domain}]")
+            for name in stats["isolated"]:
+                print(f"  - {name}")
 
-def verify_relationships(graph_db):
-    """관계 유효성 검증"""
-    print("\n=== 관계 유효성 검증 ===\n")
-    
-    # 순환 참조 검사
-    cycle_query = """
-    MATCH path = (c:CoreConcept)-[:IS_PREREQUISITE_OF*]->(c)
-    RETURN [node in nodes(path) | node.name] AS cycle
-    LIMIT 5
+def build_reachability_index(graph_db, generation):
+    """선수 관계 그래프와 도달 가능성 인덱스를 빌드하고, Cypher 결과와 대조한 뒤 스냅샷으로 저장"""
+    print("\n=== 도달 가능성 인덱스 빌드 ===\n")
+    
+    engine = ConceptGraph.from_neo4j(graph_db.run_query, generation)
+    index = engine.reachability
+    print(f"개념 {len(engine)}개, 선수 관계 {len(engine.edges)}개, 최대 거리 {index.max_depth}단계")
+    
+    # 인덱스보다 한 단계 더 깊게 탐색하여, 인덱스가 놓친 선수 개념이 없는지도 확인
+    validate_query = f"""
+    MATCH path = (p:CoreConcept)-[:IS_PREREQUISITE_OF*1..{index.max_depth + 1}]->(t:CoreConcept)
+    RETURN t.name AS target, p.name AS prereq, min(length(path)) AS dist
     """
-    cycles = graph_db.run_query(cycle_query)
+    mismatches = compare_with_rows(index, engine.ids, graph_db.run_query(validate_query))
+    if mismatches:
+        print(f"✗ Cypher 결과와 불일치 ({len(mismatches)}개), 스냅샷을 저장하지 않습니다:")
+        for target, prereq, expected, actual in mismatches[:10]:
+            print(f"  {prereq} → {target}: Cypher {expected}, 인덱스 {actual}")
+        return None
+    print("✓ Cypher 결과와 일치")
+    
+    snapshot_path = os.path.join(PROJECT_ROOT, SNAPSHOT_FILE)
+    engine.save_snapshot(snapshot_path)
+    print(f"✓ 스냅샷 저장: {snapshot_path}")
+    return engine
+
+def verify_relationships(report: dict):
+    """관계 유효성 검증 (강연결 요소, 최장 선수 관계 사슬)"""
+    print("\n=== 관계 유효성 검증 ===\n")
     
+    # 순환 참조 검사: 서로가 서로의 선수 개념인 개념 묶음 (강연결 요소)
+    cycles = report["cycles"]
     if cycles:
         print(f"⚠️  순환 참조 발견 ({len(cycles)}개):")
-        for record in cycles:
-            print(f"  {' → '.join(record['cycle'])}")
+        for names in cycles[:5]:
+            print(f"  {' ↔ '.join(names)}")
     else:
         print("✓ 순환 참조 없음")
     
-    # 선수 관계 깊이 확인
-    depth_query = """
-    MATCH (c:CoreConcept)
-    OPTIONAL MATCH path = (c)-[:IS_PREREQUISITE_OF*]->(end)
-    WHERE NOT EXISTS(()-[:IS_PREREQUISITE_OF]->(c))
-    WITH c, length(path) AS depth
-    RETURN c.name AS root, max(depth) AS max_depth
-    ORDER BY max_depth DESC
-    LIMIT 5
-    """
-    depths = graph_db.run_query(depth_query)
-    
-    print("\n최대 선수 관계 깊이:")
-    for record in depths:
-        if record["max_depth"]:
-            print(f"  {record['root']}: {record['max_depth']}단계")
+    # 선수 관계 깊이 확인: 가장 긴 선수 관계 사슬 (순환 묶음은 한 단계로 계산)
+    print(f"\n최대 선수 관계 깊이: {report['max_chain_length']}단계")
+    for chain in report["longest_chains"]:
+        print(f"  {chain['length']}단계: {' → '.join(chain['path'])}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="선수/관련 개념 관계 생성 및 그래프 분석")
+    parser.add_argument("--report", default=os.path.join(PROJECT_ROOT, REPORT_FILE), help="분석 보고서(JSON) 저장 경로")
+    parser.add_argument("--max-cycles", type=int, default=0, help="허용할 순환 참조 묶음 수 (넘으면 종료 코드 1)")
+    parser.add_argument("--max-isolated-ratio", type=float, default=None, help="허용할 고립된 개념 비율 (예: 0.2)")
+    parser.add_argument("--max-chain-length", type=int, default=None, help="허용할 최장 선수 관계 사슬 길이")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    db = Neo4jGraph(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    args = parse_args()
+    db = GraphClient(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, name="prerequisite_links")
     
     try:
-        # 1. 선수 관계 생성
-        create_prerequisite_relationships(db)
+        # 1. 선수 관계 생성 (개념 이름은 한 번만 조회해 두 단계가 공유)
+        concept_names = fetch_concept_names(db)
+        create_prerequisite_relationships(db, concept_names)
         
         # 2. 관련 개념 관계 생성
-        create_related_relationships(db)
+        create_related_relationships(db, concept_names)
+        
+        # 3. 튜터의 메모리 그래프가 다시 읽어가도록 세대 값 갱신
+        generation = stamp_generation(db.run_query)
+        print(f"\n그래프 세대 갱신: {generation}")
         
-        # 3. 커버리지 분석
-        analyze_coverage(db)
+        # 4. 도달 가능성 인덱스 빌드 + 검증 + 스냅샷 저장
+        engine = build_reachability_index(db, generation)
         
-        # 4. 유효성 검증
-        verify_relationships(db)
+        # 5. 그래프 분석 (간선 목록을 한 번 읽어 메모리에서 계산) + 커버리지 + 유효성 검증
+        if engine is None:
+            engine = ConceptGraph.from_neo4j(db.run_query, generation)
+        report = analyze_graph(engine, fetch_related_pairs(db.run_query))
+        print_coverage(report)
+        verify_relationships(report)
         
-        print("\n✅ 모든 작업이 완료되었습니다!")
+        failures = check_report(report, args.max_cycles, args.max_isolated_ratio, args.max_chain_length)
+        report["failures"] = failures
+        write_report(report, args.report)
+        print(f"\n분석 보고서 저장: {args.report} ({report['elapsed_ms']:.1f}ms)")
         
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+    
+    if failures:
+        print("\n✗ 그래프 검사 실패:")
+        for failure in failures:
+            print(f"  - {failure}")
+        sys.exit(1)
+    print("\n✅ 모든 작업이 완료되었습니다!")
@@ -1,19 +1,30 @@
-#디버깅용
-DEBUG_MODE = True # True로 설정하면 상세 로그 출력
-
-def log_debug(message: str):
-    """디버그 모드가 활성화된 경우에만 메시지를 출력합니다."""
-    if DEBUG_MODE:
-        print(f"🐛 DEBUG: {message}")
-
 import os
 import json
+import time
+import copy
+import uuid
+import asyncio
+import importlib
+import threading
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-from langchain_neo4j import Neo4jGraph
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import StrOutputParser
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from utils.debug_log import log_debug # 디버깅용 (끄려면 utils.debug_log.DEBUG_MODE = False)
 from utils.student_profile import load_profile, save_profile
+from utils.fast_router import fast_route, get_fast_router_stats
+from utils.turn_context import TurnContext, memoized, timed_stage
+from utils.metrics import TurnMetrics, start_metrics_server
+from utils.cassette import CassetteGraph, cassette_from_env, http_clients
+from utils.graph_client import GraphClient
+from utils.usage import UsageCallbackHandler, UsageLedger, usage_scope, current_ledger, new_usage
+from utils.concept_index import ConceptIndex
+from utils.concept_graph import ConceptGraph, SNAPSHOT_FILE, fetch_generation
+from utils.prompts import EXPLANATION_PROMPT_VERSION, TUTOR_PROMPTS, explanation_inputs
+from utils.prompt_registry import PromptRegistry
+from utils.explanation_cache import ExplanationCache, PrebuiltExplanations, count_bucket, variant_for, replay_stream, record_stream
+from utils.prefetch import ExplanationPrefetcher
+from utils.stream_combiner import StreamCombiner
 
 load_dotenv()
 
@@ -22,106 +33,230 @@ NEO4J_USER = os.getenv('NEO4J_USER')
 NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
 
 #LLM, graphDB 초기화
-llm = ChatOpenAI(model='gpt-4o-mini', temperature=0.3)
-graph = Neo4jGraph(url=NEO4J_URI, username=NEO4J_USER, password=NEO4J_PASSWORD)
+usage_callback = UsageCallbackHandler() # 모든 LLM 호출의 토큰 사용량/비용을 현재 턴 장부에 기록 (utils/usage.py)
 
+def create_backends():
+    """
+    (llm, graph)를 만듭니다.
+    (신규) TUTOR_BACKEND="모듈:함수"가 설정되어 있으면 그 함수(usage_callback)가 만든 (llm, graph)를 사용합니다.
+    (예: benchmarks/bench_replay_conversation.py가 오프라인 재생용 가짜 LLM/그래프를 주입)
+    (신규) TUTOR_CASSETTE_MODE=record/replay이면 실제 LLM/Neo4j 호출을 카세트에 녹화하거나 카세트에서 재생합니다. (utils/cassette.py)
+    """
+    factory = os.getenv("TUTOR_BACKEND")
+    if factory:
+        module_name, _, func_name = factory.partition(":")
+        return getattr(importlib.import_module(module_name), func_name or "create_backends")(usage_callback)
+
+    llm_kwargs = dict(model='gpt-4o-mini', temperature=0.3, stream_usage=True, callbacks=[usage_callback]) # stream_usage: 스트리밍 호출도 사용량 수신
+    cassette = cassette_from_env()
+    if cassette is None:
+        return ChatOpenAI(**llm_kwargs), GraphClient(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, name="tutor")
+    if cassette.mode == "replay":
+        # 네트워크/API 키 없이 실행 (실패 시 재시도하지 않고 바로 카세트 누락 오류)
+        llm_kwargs.update(api_key=os.getenv("OPENAI_API_KEY") or "cassette-replay", max_retries=0)
+        return ChatOpenAI(**llm_kwargs, **http_clients(cassette)), CassetteGraph(None, cassette)
+    return (ChatOpenAI(**llm_kwargs, **http_clients(cassette)),
+            CassetteGraph(GraphClient(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, name="tutor"), cassette))
+
+llm, graph = create_backends()
+prompt_registry = PromptRegistry(llm, TUTOR_PROMPTS) # 프롬프트 체인은 처음 사용할 때 한 번만 생성하여 재사용
+start_metrics_server() # TUTOR_METRICS_PORT가 설정된 경우에만 /metrics 제공 (Prometheus 텍스트)
+
+
+# 0. 메모리 내 그래프 엔진 (시작 시 한 번 로드, 세대 스탬프가 바뀌면 다시 로드)
+USE_GRAPH_ENGINE = True
+GRAPH_SNAPSHOT_FILE = SNAPSHOT_FILE # 04 단계가 도달 가능성 인덱스와 함께 저장
+GRAPH_GENERATION_CHECK_SECONDS = 30 # 이 주기마다 세대 값만 확인 (가벼운 쿼리 1회)
+_graph_engine = None
+_graph_engine_checked_at = 0.0
+_graph_engine_lock = threading.Lock()
+
+def _graph_query(query: str, params: dict = None) -> list:
+    return graph.query(query, params=params or {})
+
+def get_graph_engine() -> ConceptGraph:
+    """메모리 내 그래프를 반환합니다. 사용할 수 없으면 None (Cypher 조회로 대체)."""
+    global _graph_engine, _graph_engine_checked_at
+    if not USE_GRAPH_ENGINE:
+        return None
+    if _graph_engine is not None and time.monotonic() - _graph_engine_checked_at < GRAPH_GENERATION_CHECK_SECONDS:
+        return _graph_engine
+
+    with _graph_engine_lock:
+        if _graph_engine is not None and time.monotonic() - _graph_engine_checked_at < GRAPH_GENERATION_CHECK_SECONDS:
+            return _graph_engine
+        _graph_engine_checked_at = time.monotonic()
+        try:
+            generation = fetch_generation(_graph_query)
+            if _graph_engine is None or _graph_engine.generation != generation:
+                started = time.perf_counter()
+                _graph_engine = ConceptGraph.load(_graph_query, GRAPH_SNAPSHOT_FILE, generation)
+                log_debug(f"메모리 그래프 로드 완료: 개념 {len(_graph_engine)}개, 선수 관계 {len(_graph_engine.edges)}개, "
+                          f"세대 {generation} ({(time.perf_counter() - started) * 1000:.1f}ms)")
+                if _concept_index.rebuild(_graph_engine.names):
+                    log_debug(f"개념 이름 인덱스 재구축 완료 (패턴 {_concept_index.size}개)")
+        except Exception as e:
+            print(f"⚠️ 메모리 그래프 로드 오류: {e}")
+            if _graph_engine is None and os.path.exists(GRAPH_SNAPSHOT_FILE):
+                _graph_engine = ConceptGraph.load_snapshot(GRAPH_SNAPSHOT_FILE)
+                _concept_index.rebuild(_graph_engine.names)
+                log_debug("Neo4j 대신 그래프 스냅샷 파일을 사용합니다.")
+    return _graph_engine
+
+# 0-1. 로컬 개념 이름 인덱스 (CoreConcept 이름/별칭 트라이)
+CONCEPT_INDEX_REFRESH_SECONDS = 300 # (그래프 엔진 미사용 시) 이 주기마다 이름 목록을 확인
+_concept_index = ConceptIndex()
+_concept_index_checked_at = 0.0
+
+def get_concept_index() -> ConceptIndex:
+    """CoreConcept 이름 인덱스를 반환합니다. (그래프가 바뀌면 재구축)"""
+    global _concept_index_checked_at
+    if get_graph_engine() is not None:
+        return _concept_index # 그래프 엔진이 다시 로드될 때 함께 재구축됨
+
+    now = time.monotonic()
+    if now - _concept_index_checked_at >= CONCEPT_INDEX_REFRESH_SECONDS:
+        _concept_index_checked_at = now
+        try:
+            names = [r["name"] for r in graph.query("MATCH (c:CoreConcept) RETURN c.name AS name")]
+            if _concept_index.rebuild(names):
+                log_debug(f"개념 이름 인덱스 재구축 완료 (패턴 {_concept_index.size}개)")
+        except Exception as e:
+            print(f"⚠️ 개념 이름 인덱스 갱신 오류: {e}")
+    return _concept_index
 
 #1. 사용자 질문에서 핵심 개념 추출
+def _resolve_concept_locally(user_question: str):
+    """(신규) 질문에 개념 이름이 그대로 있으면 LLM 호출 없이 로컬 인덱스로 해결"""
+    local_concept = get_concept_index().resolve(user_question)
+    if local_concept:
+        log_debug(f"개념 추출(로컬 인덱스): '{local_concept}'")
+    return local_concept
+
 def extract_concept(user_question: str) -> str:
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """당신은 중학교 수학 질문 분석 전문가입니다.
-질문에서 학생이 궁금해하는 '핵심 수학 개념'을 추출하세요.
-반드시 개념 이름만 반환하고, 다른 말은 절대 하지 마세요.
-
-규칙:
-1. 개념을 *정확히* 추출해야 합니다. (예: '각뿔대'를 '각뿔'로 추출하면 안 됩니다.)
-2. 질문이 개념 그 자체인 경우, 해당 개념을 그대로 반환하세요.
-3. 두 개념의 '차이'나 '비교'를 묻는 경우, 'A와 B' 형식으로 두 개념을 모두 반환하세요.
-4. **(신규) '넓이', '부피', '구하는 법' 등 속성이나 방법을 묻는 경우, 이를 포함하여 추출하세요.**
-
-예시:
-질문: "일차방정식이 뭐야?" → 일차방정식
-질문: "계수를 어떻게 구해?" → 계수 구하는 법
-질문: "정비례와 반비례 차이가 뭐야?" → 정비례와 반비례
-질문: "함수랑 방정식이랑 뭐가 달라?" → 함수와 방정식
-질문: "각뿔대가 뭐야?" → 각뿔대
-질문: "미적분이 뭐야?" → 미적분
-질문: **"각뿔의 부피는 뭐야?" → 각뿔의 부피**
-질문: **"원기둥 넓이 어떻게 구해?" → 원기둥 넓이 구하는 법**
-
-개념을 찾을 수 없으면 "개념없음"이라고만 출력하세요.
-"""),
-        ("user", "{question}")
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
-    concept = chain.invoke({"question": user_question}).strip()
-    return concept
+    local_concept = _resolve_concept_locally(user_question)
+    if local_concept:
+        return local_concept
+    return prompt_registry.chain("extract_concept").invoke({"question": user_question}).strip()
+
+async def aextract_concept(user_question: str) -> str:
+    """extract_concept의 비동기 버전 (aprocess_turn에서 사용)"""
+    local_concept = _resolve_concept_locally(user_question)
+    if local_concept:
+        return local_concept
+    return (await prompt_registry.chain("extract_concept").ainvoke({"question": user_question})).strip()
+
+
+# 2. 개념 묶음 조회 (정의 + 예시 + 선수 개념 + 시각화 경로를 한 번의 Cypher로)
+EXAMPLE_LIMIT = 3
+VISUALIZATION_PREREQ_DEPTH = 2
+
+def _concept_bundle_query(depth: int) -> str:
+    """depth 단계까지의 선수 개념을 포함하는 묶음 조회 쿼리"""
+    return f"""
+    MATCH (c:CoreConcept {{name: $name}})
+
+    // 1. 예시 (짧은 문장 우선)
+    CALL {{
+        WITH c
+        OPTIONAL MATCH (ex:Concept)-[:IS_EXAMPLE_OF]->(c)
+        WITH ex ORDER BY size(ex.definition), ex.definition
+        RETURN collect(ex.definition)[0..$example_limit] AS examples
+    }}
+
+    // 2. 선수 개념 (depth 단계까지, 최단 거리)
+    CALL {{
+        WITH c
+        OPTIONAL MATCH path = (p:CoreConcept)-[:IS_PREREQUISITE_OF*1..{int(depth)}]->(c)
+        WITH p, min(length(path)) AS dist
+        ORDER BY dist, p.name
+        RETURN collect(CASE WHEN p IS NULL THEN null
+                            ELSE {{name: p.name, definition: p.definition, depth: dist}} END) AS prerequisites
+    }}
+
+    // 3. 시각화용 관계 (선수 {VISUALIZATION_PREREQ_DEPTH}단계 + 후속 1단계)
+    CALL {{
+        WITH c
+        OPTIONAL MATCH vp = (:CoreConcept)-[:IS_PREREQUISITE_OF*1..{VISUALIZATION_PREREQ_DEPTH}]->(c)
+        UNWIND coalesce(relationships(vp), []) AS r
+        RETURN collect(DISTINCT r) AS prereq_rels
+    }}
+    CALL {{
+        WITH c
+        OPTIONAL MATCH (c)-[r:IS_PREREQUISITE_OF]->(:CoreConcept)
+        RETURN collect(DISTINCT r) AS dependent_rels
+    }}
+
+    RETURN c.name AS name, c.definition AS definition, examples, prerequisites,
+           [r IN prereq_rels + dependent_rels | {{source: startNode(r).name, target: endNode(r).name}}] AS edges
+    """
 
+def _build_learning_path(target_name: str, edges: list) -> dict:
+    """관계 목록으로 streamlit-agraph 형식의 노드/엣지를 만듭니다."""
+    if not edges:
+        return {"nodes": [], "edges": []}
+    node_ids = []
+    for e in edges:
+        for node_id in (e["source"], e["target"]):
+            if node_id not in node_ids:
+                node_ids.append(node_id)
+    if target_name not in node_ids:
+        node_ids.append(target_name)
+    return {
+        "nodes": [{"id": n, "label": n} for n in node_ids],
+        "edges": [{"source": e["source"], "target": e["target"], "label": "선수개념"} for e in edges],
+    }
 
-# 2. 선수 개념 찾기 (그래프 탐색)
-def get_prerequisites(concept_name: str, depth: int = 2) -> list:
-    """개념의 선수 지식을 depth 단계만큼 찾기"""
-    query = f"""
-    MATCH path = (prereq:CoreConcept)-[:IS_PREREQUISITE_OF*1..{depth}]->(target:CoreConcept {{name: $concept}})
-    WITH prereq, length(path) AS dist
-    RETURN DISTINCT prereq.name AS name, prereq.definition AS definition, dist
-    ORDER BY dist
+def get_concept_bundle(concept_name: str, depth: int = 2) -> dict:
     """
-    
+    개념의 정의, 예시, 선수 개념(깊이 포함), 시각화 경로를 한 번의 그래프 왕복으로 가져옵니다.
+    개념이 그래프에 없으면 None을 반환합니다.
+    (메모리 그래프를 사용할 수 있으면 그래프 왕복 없이 로컬에서 처리)
+    """
+    engine = get_graph_engine()
+    if engine is not None:
+        return engine.get_bundle(concept_name, depth)
+
     try:
-        results = graph.query(query, params={"concept": concept_name})
-        return [{"name": r["name"], "definition": r["definition"], "depth": r["dist"]} 
-                for r in results]
+        results = graph.query(_concept_bundle_query(depth),
+                              params={"name": concept_name, "example_limit": EXAMPLE_LIMIT})
     except Exception as e:
-        print(f"⚠️ 그래프 탐색 오류: {e}")
+        print(f"⚠️ 개념 묶음 조회 오류: {e}")
+        return None
+
+    if not results:
+        return None
+
+    row = results[0]
+    return {
+        "name": row["name"],
+        "definition": row["definition"],
+        "examples": row["examples"] or [],
+        "prerequisites": [
+            {"name": p["name"], "definition": p["definition"], "depth": p["depth"]}
+            for p in row["prerequisites"]
+        ],
+        "learning_path": _build_learning_path(row["name"], row["edges"]),
+    }
+
+# 2-1. 선수 개념 찾기 (개념 묶음의 일부)
+def get_prerequisites(concept_name: str, depth: int = 2, ctx: TurnContext = None) -> list:
+    """개념의 선수 지식을 depth 단계만큼 찾기"""
+    bundle = memoized(ctx, "concept_bundle", get_concept_bundle, concept_name, max(depth, 2))
+    if not bundle:
         return []
+    return [p for p in bundle["prerequisites"] if p["depth"] <= depth]
 
-# 시각화를 위한 경로 탐색 (신규)
-def get_path_for_visualization(concept_name: str) -> dict:
+# 시각화를 위한 경로 탐색 (개념 묶음의 일부)
+def get_path_for_visualization(concept_name: str, ctx: TurnContext = None) -> dict:
     """
     시각화를 위해 특정 개념의 로컬 학습 경로(선수/후속)를 조회합니다.
     (streamlit-agraph 형식에 맞는 노드와 엣지 반환)
     """
-    query = """
-    MATCH (target:CoreConcept {name: $concept})
-    // 1. 선수 개념 (2단계 뒤까지)
-    OPTIONAL MATCH path_prereq = (prereq:CoreConcept)-[:IS_PREREQUISITE_OF*1..2]->(target)
-    // 2. 후속 개념 (1단계 앞까지)
-    OPTIONAL MATCH path_dep = (target)-[:IS_PREREQUISITE_OF*1..1]->(dependent:CoreConcept)
-    
-    // 모든 노드와 관계 수집
-    WITH target, 
-         collect(nodes(path_prereq)) + collect(nodes(path_dep)) AS node_lists,
-         collect(relationships(path_prereq)) + collect(relationships(path_dep)) AS rel_lists
-    
-    // 노드 리스트를 풀어서 유니크하게 만들기
-    UNWIND node_lists AS node_list
-    UNWIND node_list AS n
-    WITH target, collect(DISTINCT n) AS all_nodes, rel_lists
-    
-    // 관계 리스트를 풀어서 유니크하게 만들기
-    UNWIND rel_lists AS rel_list
-    UNWIND rel_list AS r
-    WITH all_nodes + target AS final_nodes_list, collect(DISTINCT r) AS final_rels
-    
-    // 최종 노드/엣지 포맷팅
-    WITH [n IN final_nodes_list | {id: n.name, label: n.name}] AS nodes,
-         [r IN final_rels | {source: startNode(r).name, target: endNode(r).name, label: '선수개념'}] AS edges
-         
-    RETURN nodes, edges
-    """
-    try:
-        results = graph.query(query, params={"concept": concept_name})
-        if results and results[0]["nodes"]:
-            log_debug(f"'{concept_name}'의 시각화 경로 조회 성공")
-            return {
-                "nodes": results[0]["nodes"],
-                "edges": results[0]["edges"]
-            }
-    except Exception as e:
-        print(f"⚠️ 시각화 경로 탐색 오류: {e}")
-    
+    bundle = memoized(ctx, "concept_bundle", get_concept_bundle, concept_name, 2)
+    if bundle and bundle["learning_path"]["nodes"]:
+        log_debug(f"'{concept_name}'의 시각화 경로 조회 성공")
+        return bundle["learning_path"]
     return {"nodes": [], "edges": []}
 
 # 진단 질문 생성
@@ -137,28 +272,7 @@ def generate_diagnostic_question(target_concept: str, prerequisites: list):
     
     prereq_info = "\n".join([f"- {p['name']}: {p['definition']}" for p in immediate_prereqs])
     
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """당신은 따뜻하고 친절한 수학 선생님입니다.
-학생이 '{target_concept}'을 물어봤을 때, 이 개념을 이해하기 위해 먼저 알아야 할 선수 지식을 자연스럽게 확인하고 싶습니다.
-
-규칙:
-1. 학생의 기분을 상하게 하지 말고, 격려하는 톤으로 질문하세요
-2. "혹시 기억나시나요?", "먼저 확인해볼까요?" 같은 부드러운 표현 사용
-3. 선수 개념 1~2개만 언급 (너무 많으면 부담)
-4. 질문은 한 문장으로 간결하게
-
-예시:
-"좋은 질문이에요! 일차방정식을 제대로 이해하려면 '방정식'과 '일차식' 개념부터 확인해보면 좋은데, 혹시 이 개념들은 기억나시나요?"
-"""),
-        ("user", """목표 개념: {target_concept}
-선수 개념들:
-{prereq_info}
-
-위 선수 개념을 확인하는 자연스러운 질문을 생성하세요.""")
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
-    return chain.stream({
+    return prompt_registry.stream("diagnostic_question", {
         "target_concept": target_concept,
         "prereq_info": prereq_info
     })
@@ -166,38 +280,13 @@ def generate_diagnostic_question(target_concept: str, prerequisites: list):
 # 4. 이해도 판단
 def assess_understanding(user_response: str, prereq_names: list) -> dict:
     """학생 답변을 보고 각 선수 개념별 이해 여부 판단"""
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """당신은 학생의 이해도를 평가하는 전문가입니다.
-학생이 여러 개념에 대해 답변했을 때, **각 개념별로** 이해 여부를 판단하세요.
-
-판단 기준:
-- 명확한 긍정 (알아요, 이해해요, 응, 네, 그래, 맞아 등) → true
-- 명확한 부정 (몰라요, 모르겠어요, 아니요, 아니, 기억 안나 등) → false
-- 애매한 표현 / 언급 없음 / 위 긍정/부정에 해당 안 됨 → null
-
-**중요**: 학생이 "아니", "응" 이라고만 답해도 각각 false/true로 명확히 판단해야 합니다!
-
-**예시**:
-"A는 알아요, B는 모르겠어요" → {{"A": true, "B": false}}
-"A가 뭐였더라" → {{"A": false, (다른 개념): null}}
-"응" → (모든 언급된 개념): true
-"아니" → (모든 언급된 개념): false
-
-출력은 반드시 JSON만 출력하세요:
-{{"개념1": false, "개념2": true, "개념3": null}}
-"""),
-        ("user", """선수 개념들: {prereq_names}
-학생 답변: {response}
-
-각 개념별 이해 여부를 JSON으로 반환하세요.""")
-    ])
-
-    chain = prompt | llm | StrOutputParser()
-    result_str = chain.invoke({
+    result_str = prompt_registry.chain("assess_understanding").invoke({
         "prereq_names": prereq_names,
         "response": user_response
     }).strip()
+    return _parse_assessment(result_str, prereq_names)
 
+def _parse_assessment(result_str: str, prereq_names: list) -> dict:
     try:
         understanding_map = json.loads(result_str)
         for name in prereq_names:
@@ -209,110 +298,53 @@ def assess_understanding(user_response: str, prereq_names: list) -> dict:
         print(f"   LLM 응답: {result_str}")
         return {name: None for name in prereq_names}
 
-# 5. 그래프에서 개념 정보 (정의, 관련 예시) 가져오기
-def retrieve_concept_from_graph(concept_name: str) -> dict:
-    core_query = """
-    MATCH (c:CoreConcept {name: $name}) 
-    RETURN c.name AS name, c.definition AS definition
-    """
-    core_result = graph.query(core_query, params={"name": concept_name})
-    
-    if not core_result:
+# 5. 그래프에서 개념 정보 (정의, 관련 예시) 가져오기 (개념 묶음의 일부)
+def retrieve_concept_from_graph(concept_name: str, ctx: TurnContext = None) -> dict:
+    bundle = memoized(ctx, "concept_bundle", get_concept_bundle, concept_name, 2)
+    if not bundle:
         return None
-    
-    example_query = """
-    MATCH (concept:Concept)-[:IS_EXAMPLE_OF]->(core:CoreConcept {name: $name})
-    RETURN concept.definition AS example
-    LIMIT 3
-    """
-    examples = graph.query(example_query, params={"name": concept_name})
-    
     return {
-        "name": core_result[0]["name"],
-        "definition": core_result[0]["definition"],
-        "examples": [ex["example"] for ex in examples] if examples else []
+        "name": bundle["name"],
+        "definition": bundle["definition"],
+        "examples": bundle["examples"]
     }
     
 
 # 6. 맞춤 설명 생성 (stream모드)
+RETRY_EXPLANATION_VARIANTS = 3 # 재설명 변형 개수 (설명 횟수에 따라 순환)
+explanation_cache = ExplanationCache()
+prebuilt_explanations = PrebuiltExplanations() # 07_pregenerate_explanations.py 결과
+prebuilt_explanations.load()
+
 def generate_explanation(concept_info: dict, count: int = 0):
-    """그래프 데이터 기반 쉬운 설명 생성 (스트림 반환)"""
+    """그래프 데이터 기반 쉬운 설명 생성 (스트림 반환, 사전 생성/캐시 적중 시 저장된 설명 재생)"""
     concept_name = concept_info["name"]
-    definition = concept_info["definition"]
-    examples = concept_info.get("examples", [])
-    
-    examples_text = "\n".join([f"- {ex}" for ex in examples]) if examples else "예시 없음"
-    
-    system_message = """당신은 중학생 눈높이에 맞춰 설명하는 수학 선생님입니다.
-
-규칙:
-1. 정의를 쉽게 풀어서 설명
-2. 구체적인 예시 포함 (숫자 예시)
-3. 3-4문장으로 간결하게
-4. 격려하는 말로 마무리
-
-예시:
-"계수는 문자 앞에 붙는 숫자를 말해요. 예를 들어 3x에서 3이 계수예요. 
-사과 3개처럼 '몇 개'를 나타내는 숫자라고 생각하면 쉬워요. 
-이제 이해되셨나요?"
-"""
-    user_message_template = """개념: {concept_name}
-정의: {definition}
-
-관련 예시:
-{examples}
-
-위 내용을 바탕으로 쉬운 설명을 생성하세요."""
-
-    if count > 0:
-        system_message = f"""당신은 매우 인내심이 많은 중학교 수학 선생님입니다.
-학생이 이전에 '{concept_name}' 개념에 대한 설명을 들었지만, 여전히 이해하지 못했습니다.
-
-**반드시 이전과 다른 방식**으로 설명해야 합니다.
-- **새롭고 더 쉬운 예시**나 **다른 비유**를 사용하세요.
-- 절대 이전에 했던 말(예: "{definition}")을 그대로 반복하지 마세요.
-- 3-4문장으로 간결하지만, 이해하기 쉽게 설명하세요."""
-        
-        user_message_template = """개념: {concept_name}
-정의: {definition}
-관련 예시: {examples}
 
-위 내용을 바탕으로 **새롭고 완전히 다른 방식의 설명**을 생성하세요."""
+    prebuilt_text = prebuilt_explanations.get(concept_info, count, EXPLANATION_PROMPT_VERSION)
+    if prebuilt_text:
+        log_debug(f"'{concept_name}' 사전 생성 설명 사용 (count={count})")
+        return replay_stream(prebuilt_text)
 
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", system_message),
-        ("user", user_message_template)
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
-    
-    return chain.stream({
-        "concept_name": concept_info["name"],
-        "definition": concept_info["definition"],
-        "examples": concept_info.get("examples", [])
-    })
+    bucket = count_bucket(count)
+    variant = variant_for(count, RETRY_EXPLANATION_VARIANTS)
+
+    cached_text = explanation_cache.get(concept_name, bucket, variant, EXPLANATION_PROMPT_VERSION)
+    if cached_text:
+        log_debug(f"'{concept_name}' 설명 캐시 적중 ({bucket}/{variant})")
+        return replay_stream(cached_text)
+
+    live_stream = prompt_registry.stream(f"explanation.{bucket}", explanation_inputs(concept_info))
+
+    # 끝까지 스트리밍된 설명만 캐시에 저장
+    return record_stream(
+        live_stream,
+        lambda text: explanation_cache.put(concept_name, bucket, variant, EXPLANATION_PROMPT_VERSION, text)
+    )
 
 # 6-1. 일반 설명 생성 함수 (Fallback용, 스트리밍)
 def generate_general_explanation(concept_name: str):
     """LLM의 일반 지식을 사용하여 개념을 설명합니다 (스트림 반환)"""
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""당신은 중학생 눈높이에 맞춰 수학 개념을 설명하는 친절한 선생님입니다.
-학생이 '{concept_name}'에 대해 질문했지만, 이 개념은 당신의 전문 지식 그래프에 아직 없습니다.
-
-당신의 일반 지식을 바탕으로 '{concept_name}' 개념을 설명해주세요.
-
-규칙:
-1. 중학생이 이해하기 쉽게 설명하세요.
-2. 예시를 포함하면 좋습니다.
-3. 3-5 문장으로 간결하게 설명하세요.
-4. **매우 중요:** 설명 시작 부분에 **"(이 설명은 제 지식 그래프에 기반한 것이 아니라 일반적인 내용이에요.)"** 라는 면책 조항(disclaimer)을 반드시 포함하세요.
-"""),
-        ("user", f"'{concept_name}' 개념을 설명해주세요.")
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
-    explanation = chain.stream({}) 
+    explanation = prompt_registry.stream("general_explanation", {"concept_name": concept_name})
     log_debug(f"'{concept_name}'에 대한 일반 설명 생성 완료.")
     return explanation
 
@@ -324,55 +356,12 @@ def generate_problem(concept_name: str, explanation_count: int) -> dict:
     """
     
     # (신규) 문제/정답/핵심개념을 JSON으로 생성하는 체인
-    # (신규) 설명 횟수에 따라 프롬프트에 추가할 문맥 생성
-    if explanation_count > 0:
-        history_context = f"학생이 이 개념({concept_name})에 대한 문제를 이미 풀어본 적이 있습니다. **반드시 이전과 다른 새로운 문제**를 출제하세요."
-    else:
-        history_context = f"학생이 이 개념({concept_name})을 방금 학습했습니다."
-        
-    problem_gen_prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""당신은 JSON 응답을 생성하는 수학 선생님입니다.
-{history_context}
-'{concept_name}' 개념을 활용하는 간단한 단답형 문제 1개를 만들어주세요.
-
-[규칙]
-1. 반드시 'problem', 'answer', 'key_concept'라는 영어 키(key) 3개를 모두 포함해야 합니다.
-2. 절대 응답을 ` ```json ... ``` ` (마크다운)으로 감싸지 마세요.
-3. "problem" 값에는 줄바꿈이 필요하면 반드시 \\n 문자를 사용하세요.
-4. **(수정) "key_concept"에는 이 문제를 푸는 데 필요한 '{concept_name}'의 *가장 중요한 선수 개념* 1가지를 적으세요.** (예: '이항', '밑면의 넓이', '피타고라스 정리'). 만약 마땅한 선수 개념이 없으면 "none"이라고 적으세요.
-
-[JSON 형식]
-{{{{
-  "problem": "...",
-  "answer": "...",
-  "key_concept": "..."
-}}}}
-
-[JSON 예시 1: 일차방정식 문제]
-{{{{
-  "problem": "... 2x + 3 = 11 ...",
-  "answer": "4",
-  "key_concept": "이항"
-}}}}
-
-[JSON 예시 2: 각뿔 부피 문제]
-{{{{
-  "problem": "... 각뿔의 부피는 얼마인가요?",
-  "answer": "120cm³",
-  "key_concept": "밑면의 넓이"
-}}}}
-"""),
-        # (수정) user 메시지는 간단하게
-        ("user", f"'{concept_name}'에 대한 문제를 JSON 형식으로 1개 출제해주세요.")
-    ])
-    chain = problem_gen_prompt | llm
+    # (신규) 설명 횟수에 따라 처음 출제 / 다시 출제(이전과 다른 문제) 프롬프트 선택
+    chain = prompt_registry.chain("generate_problem.repeat" if explanation_count > 0 else "generate_problem.first")
     
     try:
         # (수정) invoke 시 변수를 전달
-        response_content = chain.invoke({
-            "concept_name": concept_name,
-            "history_context": history_context
-        }).content
+        response_content = chain.invoke({"concept_name": concept_name})
         log_debug(f"문제 생성 JSON 응답: {response_content}")
         
         # (신규) LLM 응답이 JSON 형식이 아닐 수 있으므로 파싱 시도
@@ -404,20 +393,7 @@ def generate_problem(concept_name: str, explanation_count: int) -> dict:
 # 6-3. 잡담 처리
 def handle_chitchat(user_input: str):
     """LLM을 사용하여 간단한 잡담 처리 (스트림 반환)"""
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""당신은 '수학 튜터' 챗봇입니다. 학생이 수학과 관련 없는 간단한 대화를 시도합니다.
-짧고 간결하게 '튜터'로서 응답하고, 다시 수학 질문을 하도록 유도하세요.
-        
-예시:
-- 학생: 너는 누구야? / 튜터: 저는 AI 수학 튜터입니다. 🤖 궁금한 수학 개념을 물어보세요!
-- 학생: 오늘 날씨 어때? / 튜터: 날씨는 잘 모르지만, 수학 개념은 뭐든지 물어보세요! 😊
-- 학생: 고마워 / 튜터: 천만에요! 더 궁금한 점이 있나요?
-"""),
-        ("user", user_input)
-    ])
-    
-    chain = prompt | llm | StrOutputParser()
-    response = chain.stream({}) 
+    response = prompt_registry.stream("chitchat", {"user_input": user_input})
     log_debug("잡담 처리 완료.")
     return response
 
@@ -433,36 +409,43 @@ def handle_solve_problem(user_answer: str, problem_data: dict):
     
     log_debug(f"채점 시작: 학생 답={user_answer}, 정답={answer}, 핵심개념={key_concept}")
 
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""당신은 학생의 답을 채점하는 친절하고 격려하는 수학 선생님입니다.
-학생이 방금 수학 문제를 풀었습니다. 학생의 답이 정답과 일치하는지 판단하고, '진단형 피드백'을 제공하세요.
-
-[문제 정보]
-- 정답: "{answer}"
-- 핵심 개념: "{key_concept}" (이 문제를 푸는 데 필요했던 선수 개념)
-
-[피드백 규칙]
-1.  **정답일 경우 (학생의 답이 "{answer}"와 일치하거나, "x= {answer}" 등 의미상 같을 경우):**
-    - "정답입니다! 🥳"라고 칭찬해주세요.
-    - 이 문제를 푸는 데 사용된 **"{key_concept}"** 개념을 잘 활용했다고 1~2문장으로 격려해주세요.
-    - (예: "정답입니다! 🥳 '+3'을 넘기는 '{key_concept}' 개념을 정확히 사용하셨네요. 역시 개념을 아니까 문제가 풀리죠?")
-
-2.  **오답일 경우 (...):**
-    - **"아쉽네요, 정답은 '{answer}'였어요. 😅"**라고 **정답을 명확히 알려주세요.**
-    - 이 문제를 풀려면 **"{key_concept}"** 개념이 필요했다고 1~2문장으로 힌트를 주세요.
-    - "이 개념을 다시 공부해보는 것도 좋아요."라고 제안한 뒤, "더 궁금한 점이 있나요?"라고 물어보세요.
-    - (예: "아쉽네요, 정답은 '4'였어요. 😅 이 문제를 풀려면 '+3'을 반대편으로 넘기는 '{key_concept}' 개념이 필요했어요. 이 개념을 다시 공부해보는 것도 좋아요. 더 궁금한 점이 있나요?")
-    
-피드백은 2-4문장으로 간결하게, 스트림으로 반환하세요.
-"""),
-        ("user", f"학생의 답: {user_answer}")
-    ])
-    chain = prompt | llm | StrOutputParser()
-    return chain.stream({})
+    return prompt_registry.stream("solve_problem", {
+        "answer": answer,
+        "key_concept": key_concept,
+        "user_answer": user_answer
+    })
+
 
+# === 6-4a. master router의 LLM 분류 부분 (동기/비동기 공용) ===
+def _router_llm_args(current_state: dict) -> tuple:
+    """라우터 프롬프트에 들어가는 상태 정보 (mode, 큐 상태, 마지막 설명 개념)"""
+    queue_status = "비어있음" if not current_state.get("queue") else "설명 대기 중"
+    return current_state.get("mode", "IDLE"), queue_status, current_state.get("last_explained_concept", "없음")
+
+def _router_inputs(user_input: str, mode: str, queue_status: str, last_explained) -> dict:
+    return {"input": user_input, "mode": mode, "queue_status": queue_status, "last_explained": last_explained}
+
+def run_router_llm(user_input: str, mode: str, queue_status: str, last_explained) -> str:
+    return prompt_registry.chain("router").invoke(_router_inputs(user_input, mode, queue_status, last_explained)).strip()
+
+async def arun_router_llm(user_input: str, mode: str, queue_status: str, last_explained) -> str:
+    return (await prompt_registry.chain("router").ainvoke(_router_inputs(user_input, mode, queue_status, last_explained))).strip()
+
+def _route_without_concept(user_input: str, ctx: TurnContext = None):
+    """IDLE 상태의 tutor_flow 입력에서 개념이 추출되지 않으면 greeting/chitchat (task, topic), 아니면 None"""
+    # (수정) 추출 결과는 턴 컨텍스트에 기억되어 intelligent_tutor에서 재사용됨
+    concept = memoized(ctx, "extract_concept", extract_concept, user_input)
+    if concept != "개념없음":
+        return None
+    # "개념없음"일 때만 짧은 입력을 greeting/chitchat으로 변경
+    if len(user_input.split()) < 4 and len(user_input) < 15:
+        log_debug("라우터: 'tutor_flow'였으나 '개념없음'이 예상되어 'greeting'으로 변경")
+        return "greeting", "none" # (수정) 2개 값 반환
+    log_debug("라우터: 'tutor_flow'였으나 '개념없음'이 예상되어 'chitchat'으로 변경")
+    return "chitchat", "none" # (수정) 2개 값 반환
 
 # 6-4. master router 
-def call_master_router(user_input: str, current_state: dict) -> tuple[str, str]: # (수정) 반환 타입을 튜플로 명시
+def call_master_router(user_input: str, current_state: dict, ctx: TurnContext = None) -> tuple[str, str]: # (수정) 반환 타입을 튜플로 명시
     """
     사용자 입력과 현재 상태를 보고, 어떤 작업으로 분류할지 결정하는 '교통 정리' LLM.
     항상 (task, topic) 2개의 값을 튜플로 반환
@@ -478,48 +461,20 @@ def call_master_router(user_input: str, current_state: dict) -> tuple[str, str]:
         log_debug("라우터: 튜터 흐름(진단/연속)이 진행 중이므로 'tutor_flow'로 강제 분류")
         return "tutor_flow", "none" # (수정) 2개 값 반환
 
+    # (신규) 규칙 기반 빠른 분류 (인사, 문제 요청, 명백한 개념 질문은 LLM 호출 없이 처리)
+    fast_result = fast_route(user_input, mode)
+    if fast_result:
+        task, topic = fast_result
+        log_debug(f"라우터: 규칙 기반 분류 적중 '{task}', topic: {topic} (누적: {get_fast_router_stats()})")
+        if task == "tutor_flow" and mode == "IDLE":
+            # LLM 라우터 경로와 같은 "개념없음" 검사
+            fallback = _route_without_concept(user_input, ctx)
+            if fallback:
+                return fallback
+        return task, topic
+
     # (참고) 큐가 비어있어도 POST_EXPLANATION 상태일 수 있음
-    queue_status = "비어있음" if not current_state.get("queue") else "설명 대기 중"
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""당신은 학생의 요청을 분류하는 '교통 정리' 담당자입니다.
-학생의 입력과 현재 대화 상태를 보고, 이 요청을 어떤 부서로 보내야 할지 결정하세요.
-
-[부서 목록]
-1.  greeting: 학생이 단순한 인사나 안부를 묻습니다. (예: "안녕", "안녕하세용", "ㅎㅇ")
-2.  ask_problem: 학생이 개념에 대한 '문제'를 풀어보길 원합니다. (예: "문제 내줘", "퀴즈 풀어볼래", "일차식 문제 풀어볼게요")
-3.  tutor_flow: 학생이 수학 '개념'을 질문하거나, 방금 끝난 개념 설명에 대해 재설명/추가 질문을 합니다. (가장 일반적인 경우)
-    (예: "일차방정식이 뭐야?", "방금 설명한 거 이해 안돼", "다른 예시 없어?", "x가 뭔데?", "뭐라는거야", "무슨 말이야?")
-4.  chitchat: 수학과 관련 없는 일반적인 대화 또는 감사 표현입니다. (예: "너는 누구야?", "고마워", "수고했어")
-5.  solve_problem: 학생이 방금 출제된 문제의 답을 말합니다. (예: "3", "정답 4", "x=4", "3 아니야?")
-
-[상황별 특별 규칙]
-1. 만약 튜터가 방금 "문제"를 냈다면 (예: "답을 입력해주세요."), 학생의 숫자("3"), 정답 확인("3 아니야?"), 풀이 과정("x=4") 등은 'chitchat'이나 'greeting'이 아니라, 'solve_problem'이라는 새 부서로 보내야 합니다.
-
-[현재 상태]
-- mode: {mode}
-- 큐: {queue_status}
-- 마지막 설명 개념: {current_state.get("last_explained_concept", "없음")}
-학생의 "문제 내줘"와 "다른 예시"를 명확히 구분해야 합니다.
-- "문제 내줘" -> ask_problem
-- "일차식 문제 내줘" -> ask_problem
-- "다른 예시" -> tutor_flow (재설명 요청임)
-
-반드시 부서 이름만 JSON 형식으로 출력하세요.
-- `ask_problem`의 경우, 학생이 특정 개념을 언급했다면 "topic"도 추출하세요.
-(예: "일차방정식이 뭐야" -> {{{{"task": "tutor_flow", "topic": "일차방정식"}}}})
-(예: "3" -> {{{{"task": "solve_problem", "topic": "none"}}}})
-(예: "일차식 문제 내줘" -> {{{{"task": "ask_problem", "topic": "일차식"}}}})
-(예: "문제 내줘" -> {{{{"task": "ask_problem", "topic": "none"}}}})
-{{{{"task": "...", "topic": "..."}}}}
-"""),
-        ("user", "학생 입력: {input}")
-    ])
-
-    chain = prompt | llm | StrOutputParser()
-    result_str = chain.invoke({
-        "input": user_input
-    }).strip()
+    result_str = memoized(ctx, "router_llm", run_router_llm, user_input, *_router_llm_args(current_state))
 
     try:
         data = json.loads(result_str)
@@ -528,15 +483,9 @@ def call_master_router(user_input: str, current_state: dict) -> tuple[str, str]:
         
         # IDLE 상태인데 "개념없음" 오류가 날 만한 입력은 chitchat으로 유도
         if task == "tutor_flow" and mode == "IDLE":
-            concept = extract_concept(user_input)
-            if concept == "개념없음":
-                # "개념없음"일 때만 짧은 입력을 greeting/chitchat으로 변경
-                if len(user_input.split()) < 4 and len(user_input) < 15:
-                    log_debug("라우터: 'tutor_flow'였으나 '개념없음'이 예상되어 'greeting'으로 변경")
-                    return "greeting", "none" # (수정) 2개 값 반환
-                else:
-                    log_debug("라우터: 'tutor_flow'였으나 '개념없음'이 예상되어 'chitchat'으로 변경")
-                    return "chitchat", "none" # (수정) 2개 값 반환
+            fallback = _route_without_concept(user_input, ctx)
+            if fallback:
+                return fallback
             
             # 개념이 있으면(else) task와 topic을 그대로 반환
             log_debug(f"라우터: 'tutor_flow' (IDLE)로 분류, topic: {topic}")
@@ -550,80 +499,33 @@ def call_master_router(user_input: str, current_state: dict) -> tuple[str, str]:
         return "tutor_flow", "none" # 2개 값 반환
 
 # 6-5. LLM 의도 분류기 (tutor_flow 내부에서만 사용됨) 
+def _intent_prompt_name(question_type: str) -> str:
+    # do_you_know / shall_i_explain 외에는 post_explanation (이 부분은 라우터가 처리함. 수정 요)
+    if question_type in ("do_you_know", "shall_i_explain"):
+        return f"intent.{question_type}"
+    return "intent.post_explanation"
+
 def classify_continuation_intent(user_response: str, next_concept: str = None, question_type: str = "shall_i_explain", last_explained_concept: str = "none") -> dict:
     """
     (tutor_flow 전용) 학생의 답변 의도를 LLM을 통해 분류
     """
-    if question_type == 'do_you_know':
-        tutor_question_context = f"튜터가 방금 '{next_concept}'(은)는 알고 계신지 물어봤습니다."
-        intent_list_intro = "학생의 답변을 분석하여 다음 의도 중 하나로 분류하세요:"
-        intent_list = f"""
-1.  "continue": '{next_concept}' 설명을 듣길 원함.
-    - **매우 중요:** "네", "응", "**웅**", "맞아요" 등 **단 한 단어로 된 긍정 답변**은 **절대로** 다른 의도로 분류하지 말고 **무조건 "continue"**로 분류해야 합니다.
-    - 설명을 직접 요청하는 경우 (예: "설명해줘", "알려줘", "그게 뭔데?")
-2.  "skip": '{next_concept}' 설명을 건너뛰길 원함 (이미 안다고 답함). (예: "알아요", "괜찮아요", "됐어")
-3.  "re-explain": **방금 설명한 개념({last_explained_concept})**에 대한 재설명/추가 설명 요청.
-    - (예: "아직 이해안돼", "잘 모르겠어", "뭐더라", "방금 그게 무슨 말이야?", "모르겠어")
-    - (예: "아니 {last_explained_concept}(이)가 이해 안돼", "아니 {last_explained_concept}(을)를 모르겠다고")
-4.  "new_question": '{next_concept}'과 무관한 새 질문.
-5.  "unclear": 위 어디에도 해당하지 않는 불명확한 답변. (예: "아니", "응?", "음...")
-"""
-    elif question_type == 'shall_i_explain':
-        tutor_question_context = f"튜터가 방금 '{next_concept}'(을)를 설명해줄지 물어봤습니다."
-        intent_list_intro = "학생의 답변을 분석하여 다음 의도 중 하나로 분류하세요:"
-        intent_list = f"""
-1.  "continue": '{next_concept}' 설명을 듣길 원함.
-    - **매우 중요:** "네", "응", "**웅**", "맞아요" 등 **단 한 단어로 된 긍정 답변**은 **절대로** 다른 의도로 분류하지 말고 **무조건 "continue"**로 분류해야 합니다.
-    - 설명을 직접 요청하는 경우 (예: "설명해줘", "알려줘", "그게 뭔데?")
-2.  "skip": '{next_concept}' 설명을 건너뛰길 원함 (이미 안다고 답함). (예: "알아요", "괜찮아요", "됐어")
-3.  "re-explain": **방금 설명한 개념({last_explained_concept})**에 대한 재설명/추가 설명 요청.
-    - (예: "아직 이해안돼", "잘 모르겠어", "뭐더라", "방금 그게 무슨 말이야?", "모르겠어")
-    - (예: "아니 {last_explained_concept}(이)가 이해 안돼", "아니 {last_explained_concept}(을)를 모르겠다고")
-4.  "new_question": '{next_concept}'과 무관한 새 질문.
-5.  "unclear": 위 어디에도 해당하지 않는 불명확한 답변. (예: "아니", "응?", "음...")
-"""
-    else: # post_explanation (이 부분은 라우터가 처리함. 수정 요)
-        tutor_question_context = "튜터가 방금 개념 설명을 마치고 '더 궁금한 것이 있나요?'라고 물었습니다."
-        intent_list_intro = "학생의 답변을 분석하여 다음 의도 중 하나로 분류하세요:"
-        intent_list = """
-1.  "re-explain": 방금 설명들은 개념에 대한 재설명/추가 설명 요청 (예: "아직 이해안돼", "다른 예시 없어?", "좀 더 설명해줘").
-2.  "new_question": 새로운 수학 질문 (문제가 아닌 개념 질문).
-3.  "acknowledged": 설명을 잘 들었다는 단순 긍정/감사 표현 (예: "네", "웅", "알겠습니다", "고마워요").
-4.  "unclear": 의도가 불명확하거나 수학과 관련 없는 대화.
-"""
-
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", f"""당신은 학생의 답변 의도를 매우 정확하게 분석하는 전문가입니다.
-{tutor_question_context}
-
-{intent_list_intro}
-{intent_list}
-
-**부가적인 질문(clarification_question):**
-- 학생이 주된 의도와 **별개로**, 추가적으로 질문하는 내용입니다. 없으면 null입니다.
-- (예: "웅 근데 그거랑 좌표평면이랑 뭔상관이지" -> "순서쌍과 좌표평면의 연관성에 대한 질문")
-
-**추가 정보 (topic):**
-- 주된 의도가 "re-explain" 또는 "new_question"일 경우, 관련된 수학 개념(topic)을 추출하세요.
-- **매우 중요:** "re-explain" 의도일 때, 학생이 **"A"를 설명해달라고 명시적으로 말했다면 (예: "A가 뭐더라", "A 다시 설명해줘", "A가 이해 안돼", "A가 뭔데")**,
-  튜터가 방금 B에 대해 물어봤더라도 **반드시 "A"를 topic으로 추출해야 합니다.** (예: 튜터가 '일차식'을 물었어도 학생이 '방정식 설명해줘'라고 하면 topic은 '방정식'입니다.)
-- 학생이 명시적으로 topic을 말하지 않았다면 (예: "다시 설명해줘", "이해 안돼"),
-  "re-explain" 의도일 경우 topic을 **"{last_explained_concept}"**(으)로 설정하세요.
-  "new_question" 의도일 경우 "none"을 반환하세요.
-  
-**출력 형식 (반드시 JSON):**
-{{{{"primary_intent": "...", "clarification_question": "...", "topic": "..."}}}}
-(clarification_question이 없으면 null, topic은 해당 없을 시 "none")
-"""),
-        ("user", "학생 답변: {response}")
-    ])
-
-    chain = prompt | llm | StrOutputParser()
-    result_str = chain.invoke({
+    result_str = prompt_registry.chain(_intent_prompt_name(question_type)).invoke({
         "response": user_response,
-        "last_explained_concept": last_explained_concept # 이 줄 추가
+        "next_concept": next_concept,
+        "last_explained_concept": last_explained_concept
     }).strip()
+    return _parse_intent(result_str)
+
+async def aclassify_continuation_intent(user_response: str, next_concept: str = None, question_type: str = "shall_i_explain", last_explained_concept: str = "none") -> dict:
+    """classify_continuation_intent의 비동기 버전"""
+    result_str = (await prompt_registry.chain(_intent_prompt_name(question_type)).ainvoke({
+        "response": user_response,
+        "next_concept": next_concept,
+        "last_explained_concept": last_explained_concept
+    })).strip()
+    return _parse_intent(result_str)
 
+def _parse_intent(result_str: str) -> dict:
     try:
         data = json.loads(result_str)
         data.setdefault("primary_intent", "unclear")
@@ -634,8 +536,63 @@ def classify_continuation_intent(user_response: str, next_concept: str = None, q
         print(f"⚠️ 의도 분류 JSON 파싱 오류: {e}")
         return {"primary_intent": "unclear", "clarification_question": None, "topic": "none"}
         
+# 6-6. 진단 답변 통합 분석 (WAITING_DIAGNOSTIC 전용)
+# 의도 분류 + 선수 개념별 이해도 판단을 스키마로 검증되는 구조화 출력 1회 호출로 처리합니다.
+# (기존: classify_continuation_intent -> assess_understanding 순차 2회 호출)
+class ConceptUnderstanding(BaseModel):
+    name: str = Field(description="선수 개념 이름 (주어진 목록의 이름 그대로)")
+    understood: Optional[bool] = Field(description="안다고 답함: true, 모른다고 답함: false, 언급 없음/애매함: null")
+
+class DiagnosticAnalysis(BaseModel):
+    primary_intent: Literal["continue", "skip", "re-explain", "new_question", "unclear"] = Field(
+        description="진단 질문에 대한 학생 답변의 주된 의도")
+    topic: str = Field(description="new_question/re-explain일 때 학생이 말한 수학 개념, 없으면 'none'")
+    understanding: list[ConceptUnderstanding] = Field(description="각 선수 개념별 이해 여부")
+
+prompt_registry.register("diagnose_response", TUTOR_PROMPTS["diagnose_response"], schema=DiagnosticAnalysis)
+
+def _diagnosis_inputs(user_response: str, prereq_names: list, last_explained_concept) -> dict:
+    return {
+        "prereq_names": ", ".join(prereq_names),
+        "last_explained_concept": last_explained_concept,
+        "response": user_response,
+    }
+
+def _normalize_diagnosis(result: DiagnosticAnalysis, prereq_names: list) -> dict:
+    """구조화 출력 -> {"intent": classify_continuation_intent 형식, "understanding_map": assess_understanding 형식}"""
+    understood = {item.name: item.understood for item in result.understanding}
+    return {
+        "intent": {
+            "primary_intent": result.primary_intent,
+            "clarification_question": None,
+            "topic": result.topic or "none",
+        },
+        "understanding_map": {name: understood.get(name) for name in prereq_names},
+    }
+
+def diagnose_response(user_response: str, prereq_names: list, last_explained_concept: str = "none") -> dict:
+    """
+    진단 답변의 의도와 이해도를 한 번에 분석합니다.
+    구조화 출력 호출이 실패하면 None을 반환하며, 호출하는 쪽은 기존 2단계 호출로 대체합니다.
+    """
+    try:
+        result = prompt_registry.chain("diagnose_response").invoke(_diagnosis_inputs(user_response, prereq_names, last_explained_concept))
+        return _normalize_diagnosis(result, prereq_names)
+    except Exception as e:
+        print(f"⚠️ 진단 답변 통합 분석 오류: {e}")
+        return None
+
+async def adiagnose_response(user_response: str, prereq_names: list, last_explained_concept: str = "none") -> dict:
+    """diagnose_response의 비동기 버전"""
+    try:
+        result = await prompt_registry.chain("diagnose_response").ainvoke(_diagnosis_inputs(user_response, prereq_names, last_explained_concept))
+        return _normalize_diagnosis(result, prereq_names)
+    except Exception as e:
+        print(f"⚠️ 진단 답변 통합 분석 오류: {e}")
+        return None
+
 # 7. 메인 튜터 로직 (tutor_flow 전용)
-def intelligent_tutor(user_question: str, explained_concepts: set, explanation_count: dict) -> dict:
+def intelligent_tutor(user_question: str, explained_concepts: set, explanation_count: dict, ctx: TurnContext = None) -> dict:
     """전체 튜터링 프로세스 (기억력 + 설명 횟수 + Fallback 추가)"""
     log_debug(f"intelligent_tutor 호출: 질문='{user_question}', 기억={explained_concepts}, 횟수={explanation_count}")
     print(f"\n{'='*50}")
@@ -643,7 +600,7 @@ def intelligent_tutor(user_question: str, explained_concepts: set, explanation_c
     print(f"{'='*50}\n")
     
     # 1) 개념 추출
-    concept = extract_concept(user_question)
+    concept = memoized(ctx, "extract_concept", extract_concept, user_question)
     print(f"🔍 추출된 개념: {concept}\n")
     
     if concept == "개념없음":
@@ -651,17 +608,17 @@ def intelligent_tutor(user_question: str, explained_concepts: set, explanation_c
         return {"error": "질문에서 수학 개념을 찾을 수 없습니다."}
     
     # 2) 개념 정보 가져오기 (수정: None 처리 추가)
-    concept_info = retrieve_concept_from_graph(concept)
+    concept_info = retrieve_concept_from_graph(concept, ctx)
     
     if not concept_info:
         print(f"ℹ️ '{concept}' 개념을 지식 그래프에서 찾을 수 없음 → LLM Fallback 시도\n")
         log_missing_concept(concept)
         return {"fallback_needed": True, "concept": concept, "learning_path": {"nodes": [], "edges": []}}
 
-    path_data = get_path_for_visualization(concept)
+    path_data = get_path_for_visualization(concept, ctx)
     
     # 3) 선수 개념 찾기 (그래프에 개념이 있는 경우)
-    all_prerequisites = get_prerequisites(concept)
+    all_prerequisites = get_prerequisites(concept, ctx=ctx)
     
     if not all_prerequisites:
         print("ℹ️ 선수 개념 없음 → 바로 설명\n")
@@ -676,7 +633,13 @@ def intelligent_tutor(user_question: str, explained_concepts: set, explanation_c
 
 
     immediate_prereqs = [p for p in all_prerequisites if p['depth'] == 1]
-    prereqs_to_check = [p for p in immediate_prereqs if p['name'] not in explained_concepts]
+    engine = get_graph_engine()
+    if engine is not None:
+        # 아직 모르는 직접 선수 개념 = 인덱스 비트셋 & ~(학습한 개념 비트셋)
+        unknown = set(engine.unknown_prerequisites(concept, explained_concepts, depth=1))
+        prereqs_to_check = [p for p in immediate_prereqs if p['name'] in unknown]
+    else:
+        prereqs_to_check = [p for p in immediate_prereqs if p['name'] not in explained_concepts]
 
     if not prereqs_to_check:
         print(f"ℹ️ 선수 개념 ({[p['name'] for p in immediate_prereqs]}) (이미 학습됨) → 바로 설명\n")
@@ -702,16 +665,19 @@ def intelligent_tutor(user_question: str, explained_concepts: set, explanation_c
     }
 
 # 7-1. 진단 응답 처리 함수 (tutor_flow 전용)
-def handle_diagnostic_response(concept_info: dict, user_response: str, prerequisites: list, explanation_count: dict) -> dict:
+def handle_diagnostic_response(concept_info: dict, user_response: str, prerequisites: list, explanation_count: dict, ctx: TurnContext = None,
+                               understanding_map: dict = None) -> dict:
     """
     진단 질문에 대한 학생 답변을 처리하고, 설명 큐를 생성하여 첫 설명을 반환합니다.
+    understanding_map이 주어지면(통합 분석 결과) 이해도 판단 LLM 호출을 생략합니다.
     """
     print(f"\n💬 학생 답변: {user_response}\n")
     
     prereq_names = [p["name"] for p in prerequisites]
     
     # 1) 이해도 판단
-    understanding_map = assess_understanding(user_response, prereq_names)
+    if understanding_map is None:
+        understanding_map = memoized(ctx, "assess_understanding", assess_understanding, user_response, prereq_names)
     print(f"📊 이해도 분석: {understanding_map}\n")
     
     # 2) 설명 큐 생성 
@@ -725,7 +691,7 @@ def handle_diagnostic_response(concept_info: dict, user_response: str, prerequis
     if concept_to_explain_name == concept_info['name']:
         current_concept_info = concept_info
     else:
-        current_concept_info = retrieve_concept_from_graph(concept_to_explain_name)
+        current_concept_info = retrieve_concept_from_graph(concept_to_explain_name, ctx)
 
     count = explanation_count.get(concept_to_explain_name, 0)
     
@@ -815,6 +781,7 @@ def reset_conversation_flow(state: dict, keep_memory: bool = True):
     state["primary_goal_concept"] = None
     state["pending_input"] = None 
     state["learning_path"] = {"nodes": [], "edges": []} # <-- 이 줄 추가
+    cancel_prefetch(state) # (신규) 흐름이 바뀌었으므로 미리 가져온 설명은 버림
 
     if not keep_memory:
         print("🧠 학습 기억도 초기화합니다.")
@@ -833,8 +800,50 @@ def log_missing_concept(concept_name: str, log_file="missing_concepts.log"):
         print(f"⚠️ 누락 개념 로깅 오류: {e}")
 
 
+# 8-4. 다음 설명 미리 가져오기 (신규)
+explanation_prefetcher = ExplanationPrefetcher()
+
+def prefetch_next_explanation(state: dict):
+    """
+    "다음으로 'X'(을)를 설명해드릴까요?" 상태라면, 학생이 답하는 동안
+    X의 그래프 조회와 설명 스트림을 백그라운드에서 미리 시작합니다.
+    """
+    session_id = state.get("session_id")
+    queue = state.get("queue") or []
+    if not session_id or not queue or state.get("last_tutor_question_type") != "shall_i_explain":
+        return
+
+    next_name = queue[0]
+    count = state.get("explanation_count", {}).get(next_name, 0)
+    target_info = state.get("target_concept_info")
+    ledger = current_ledger() # 미리 가져오기 비용도 이를 예약한 턴에 기록
+
+    def stream_factory():
+        with usage_scope(ledger):
+            if target_info and target_info.get("name") == next_name:
+                info = target_info
+            else:
+                info = retrieve_concept_from_graph(next_name)
+            if not info:
+                return iter([f"'{next_name}' 개념에 대한 정보를 찾을 수 없습니다."])
+            return generate_explanation(info, count)
+
+    explanation_prefetcher.schedule(session_id, (next_name, count), stream_factory)
+
+def take_prefetched_explanation(state: dict, concept_name: str, count: int):
+    """미리 가져온 설명 스트림이 있으면 반환합니다. 없으면 None."""
+    session_id = state.get("session_id")
+    if not session_id:
+        return None
+    return explanation_prefetcher.take(session_id, (concept_name, count))
+
+def cancel_prefetch(state: dict):
+    """세션의 미리 가져오기 작업을 취소합니다."""
+    if state.get("session_id"):
+        explanation_prefetcher.cancel(state["session_id"])
+
 # 9. 핵심 튜터 상태 머신 함수
-def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
+def handle_tutor_flow(user_input: str, new_state: dict, ctx: TurnContext = None) -> dict:
     """
     복잡한 튜터링 상태 머신 (State Machine) 로직.
     오직 '수학 개념 설명'의 흐름만 담당합니다.
@@ -851,7 +860,8 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
 
     # --- 상태 0: 설명 완료 후 ---
     if current_mode == "POST_EXPLANATION":
-        intent_data = classify_continuation_intent(user_input, question_type="post_explanation", last_explained_concept=new_state.get("last_explained_concept", "none"))
+        intent_data = memoized(ctx, "classify_intent", classify_continuation_intent,
+                               user_input, None, "post_explanation", new_state.get("last_explained_concept", "none"))
         primary_intent = intent_data.get("primary_intent")
         topic = intent_data.get("topic")
         log_debug(f"POST_EXPLANATION(tutor_flow) 의도 분석: 주={primary_intent}, 주제={topic}")
@@ -900,7 +910,8 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
         next_concept = current_queue[0]
         question_type = new_state.get("last_tutor_question_type", "shall_i_explain")
 
-        intent_data = classify_continuation_intent(user_input, next_concept, question_type, last_explained_concept=new_state.get("last_explained_concept", "none"))
+        intent_data = memoized(ctx, "classify_intent", classify_continuation_intent,
+                               user_input, next_concept, question_type, new_state.get("last_explained_concept", "none"))
         primary_intent = intent_data.get("primary_intent")
         clarification_q = intent_data.get("clarification_question")
         topic = intent_data.get("topic")
@@ -917,19 +928,22 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
         if primary_intent == "continue":
             concept_to_explain_name = current_queue.pop(0)
             log_debug(f"설명 진행: {concept_to_explain_name}")
-            current_concept_info = None
-            
-            if concept_to_explain_name == new_state["target_concept_info"]["name"]:
-                 current_concept_info = new_state["target_concept_info"]
-            else:
-                 current_concept_info = retrieve_concept_from_graph(concept_to_explain_name)
-            
             count = new_state["explanation_count"].get(concept_to_explain_name, 0)
             
-            if not current_concept_info:
-                 explanation_stream = iter([f"'{concept_to_explain_name}' 개념에 대한 정보를 찾을 수 없습니다."])
-            else:
-                 explanation_stream = generate_explanation(current_concept_info, count)
+            # (신규) 미리 가져온 설명이 있으면 그래프 조회/생성 없이 버퍼부터 바로 스트리밍
+            explanation_stream = take_prefetched_explanation(new_state, concept_to_explain_name, count)
+            
+            if explanation_stream is None:
+                 current_concept_info = None
+                 if concept_to_explain_name == new_state["target_concept_info"]["name"]:
+                      current_concept_info = new_state["target_concept_info"]
+                 else:
+                      current_concept_info = retrieve_concept_from_graph(concept_to_explain_name, ctx)
+                 
+                 if not current_concept_info:
+                      explanation_stream = iter([f"'{concept_to_explain_name}' 개념에 대한 정보를 찾을 수 없습니다."])
+                 else:
+                      explanation_stream = generate_explanation(current_concept_info, count)
             
             new_state["explained_concepts"].add(concept_to_explain_name)
             new_state["explanation_count"][concept_to_explain_name] = count + 1
@@ -938,12 +952,13 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
         elif primary_intent == "skip":
             skipped_concept = current_queue.pop(0)
             log_debug(f"설명 건너뛰기: {skipped_concept}")
+            cancel_prefetch(new_state)
             explanation_stream = iter([f"알겠습니다! '{skipped_concept}'(은)는 이미 알고 계셨군요."])
             new_state["explained_concepts"].add(skipped_concept)
 
         elif primary_intent == "re-explain":
             log_debug(f"{topic} 재설명 요청")
-            r_info = retrieve_concept_from_graph(topic)
+            r_info = retrieve_concept_from_graph(topic, ctx)
             count = new_state["explanation_count"].get(topic, 0)
             
             if r_info:
@@ -996,12 +1011,21 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
 
     # --- 상태 2: "방정식 알아?"에 대한 답변 처리 ---
     elif current_mode == "WAITING_DIAGNOSTIC":
-        # (수정) 진단 답변도 의도 분류를 먼저 수행 (새 질문/재설명 등 중단 요청 감지)
+        # (수정) 의도 분류(새 질문/재설명 등 중단 요청 감지)와 이해도 판단을 한 번의 구조화 출력 호출로 처리
         prereq_names = [p["name"] for p in new_state.get("prerequisites", [])]
-        intent_data = classify_continuation_intent(user_input, 
-                                                   next_concept=", ".join(prereq_names), 
-                                                   question_type="do_you_know", 
-                                                   last_explained_concept=new_state.get("last_explained_concept", "none"))
+        diagnosis = memoized(ctx, "diagnose_response", diagnose_response,
+                             user_input, prereq_names, new_state.get("last_explained_concept", "none"))
+        if diagnosis:
+            intent_data = diagnosis["intent"]
+            understanding_map = diagnosis["understanding_map"]
+        else:
+            # 통합 분석 실패 시 기존 2단계 호출로 대체
+            intent_data = memoized(ctx, "classify_intent", classify_continuation_intent,
+                                   user_input,
+                                   ", ".join(prereq_names),
+                                   "do_you_know",
+                                   new_state.get("last_explained_concept", "none"))
+            understanding_map = None
         
         primary_intent = intent_data.get("primary_intent")
         topic = intent_data.get("topic")
@@ -1016,12 +1040,15 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
         
         # "continue", "skip", "unclear" (기존 답변)일 때만 진단 응답 처리
         # "re-explain"은 이 상태에서 "unclear"로 처리되어도 무방
-        result = handle_diagnostic_response(
-            new_state["target_concept_info"],
+        with timed_stage(ctx, "handle_diagnostic_response"):
+            result = handle_diagnostic_response(
+                new_state["target_concept_info"],
             user_input,
-            new_state["prerequisites"],
-            new_state["explanation_count"]
-        )
+                new_state["prerequisites"],
+                new_state["explanation_count"],
+                ctx,
+                understanding_map
+            )
         response_stream = result['explanation_stream']
         response_text = result.get('follow_up_text', '') 
         understanding_map = result.get("understanding_map", {})
@@ -1050,11 +1077,13 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
 
     # --- 상태 3: 새로운 질문 처리 (IDLE 상태) ---
     elif current_mode == "IDLE":
-        result = intelligent_tutor(
-            user_input,
-            new_state["explained_concepts"],
-            new_state["explanation_count"]
-        )
+        with timed_stage(ctx, "intelligent_tutor"):
+            result = intelligent_tutor(
+                user_input,
+                new_state["explained_concepts"],
+                new_state["explanation_count"],
+                ctx
+            )
         
         # learning_path가 있으면 new_state에 저장 (신규) 
         if result.get("learning_path"):
@@ -1096,6 +1125,10 @@ def handle_tutor_flow(user_input: str, new_state: dict) -> dict:
             new_state["mode"] = "POST_EXPLANATION"
             response_text = "\n\n💡 더 궁금한 것이 있나요?"
             
+    # (신규) 다음 개념 설명을 물어본 상태라면 미리 가져오기 시작
+    if new_state.get("mode") == "WAITING_CONTINUATION":
+        prefetch_next_explanation(new_state)
+
     return {"response_prefix": response_prefix, "response_stream": response_stream, "response_text": response_text, "new_state": new_state}
 
 # 10. 마스터 함수: process_turn (교통 정리 담당)
@@ -1115,15 +1148,18 @@ def get_initial_state() -> dict:
         "unmentioned_concepts": [],
         "last_tutor_question_type": None,
         "last_explained_concept": None,
+        "session_id": uuid.uuid4().hex, # (신규) 미리 가져오기 작업을 세션별로 관리하기 위한 ID
+        "session_usage": new_usage(), # (신규) 이 대화 세션의 LLM 토큰 사용량/비용 (프로필 누적치는 'usage')
         **profile_data  # (수정) 로드된 'explained_concepts'와 'explanation_count'를 병합
     }
     return initial_state
 
-def process_turn(user_input: str, current_state: dict) -> dict:
+def _process_turn_core(user_input: str, current_state: dict, ctx: TurnContext) -> dict:
     """
-    모든 대화 로직을 처리하는 마스터 함수.
+    모든 대화 로직을 처리하는 마스터 함수. (process_turn / aprocess_turn 공용 본체)
     라우터를 호출하여 '교통 정리' 후 담당 핸들러에게 작업을 위임합니다.
     (수정) prefix, stream, text를 모두 결합하여 최종 스트림 또는 텍스트를 반환합니다.
+    ctx에 미리 채워진 단계(라우터/개념 추출/그래프 조회/의도 분류/이해도 판단)는 다시 실행하지 않습니다.
     """
     
     # 1) 상태 복사 및 기본값 설정
@@ -1154,20 +1190,21 @@ def process_turn(user_input: str, current_state: dict) -> dict:
         if not new_state.get("pending_input") and is_system_command(user_input):
             final_text = "(명령어 또는 코드 입력으로 보여 무시합니다. 수학 질문을 해주세요.)"
             new_state["explained_concepts"] = list(new_state["explained_concepts"])
-            return {"response_text": final_text, "explanation_stream": None, "new_state": new_state} 
+            return {"response_text": final_text, "explanation_stream": None, "new_state": new_state, "turn_stats": ctx.summary()} 
 
         if user_input.lower() in ["종료", "exit", "quit"]:
             final_text = "다음에 또 만나요! 👋"
             new_state = get_initial_state()
             new_state["explained_concepts"] = list(new_state["explained_concepts"])
-            return {"response_text": final_text, "explanation_stream": None, "new_state": new_state}
+            return {"response_text": final_text, "explanation_stream": None, "new_state": new_state, "turn_stats": ctx.summary()}
         if not user_input:
             final_text = "(입력이 없습니다. 다시 말씀해주세요.)"
             new_state["explained_concepts"] = list(new_state["explained_concepts"])
-            return {"response_text": final_text, "explanation_stream": None, "new_state": new_state}
+            return {"response_text": final_text, "explanation_stream": None, "new_state": new_state, "turn_stats": ctx.summary()}
 
         # 3) (핵심) 마스터 라우터 호출
-        task, topic = call_master_router(user_input, new_state) # (수정) topic 반환
+        with timed_stage(ctx, "router"):
+            task, topic = call_master_router(user_input, new_state, ctx) # (수정) topic 반환
         log_debug(f"마스터 라우터 분류 결과: '{task}', 주제: '{topic}'")
 
         # 4) 작업 분배 (라우팅)
@@ -1190,7 +1227,8 @@ def process_turn(user_input: str, current_state: dict) -> dict:
                 count = new_state.get("explanation_count", {}).get(concept_for_problem, 0)
                 
                 # (수정) generate_problem 호출 시 count 전달
-                problem_result = generate_problem(concept_for_problem, count)
+                with timed_stage(ctx, "generate_problem"):
+                    problem_result = generate_problem(concept_for_problem, count)
                 response_stream = problem_result["problem_stream"]
                 
                 if problem_result["problem_data"]:
@@ -1229,7 +1267,8 @@ def process_turn(user_input: str, current_state: dict) -> dict:
             
         elif task == "tutor_flow":
             log_debug("핵심 튜터 흐름(tutor_flow) 핸들러 호출")
-            result_dict = handle_tutor_flow(user_input, new_state)
+            with timed_stage(ctx, "handle_tutor_flow"):
+                result_dict = handle_tutor_flow(user_input, new_state, ctx)
             
             response_prefix = result_dict.get("response_prefix", "")
             response_stream = result_dict.get("response_stream")
@@ -1258,29 +1297,19 @@ def process_turn(user_input: str, current_state: dict) -> dict:
         else:
             log_debug("스트림과 optional prefix/suffix를 결합합니다.")
             
-            def combined_stream_generator():
-                # 1. Prefix (접두사)
-                if has_prefix:
-                    yield response_prefix
-                    
-                # 2. Stream (메인 스트림)
-                stream_content = ""
-                for chunk in response_stream:
-                    stream_content += chunk
-                    yield chunk
-                
-                # 3. Suffix (후속 질문)
-                if has_suffix:
-                    stream_content_normalized = " ".join(stream_content.split())
-                    response_text_normalized = " ".join(response_text.split())
-                    
-                    if not stream_content_normalized.endswith(response_text_normalized):
-                        log_debug("스트림 끝에 후속 텍스트(suffix)를 추가합니다.")
-                        yield response_text 
-                    else:
-                        log_debug("스트림에 이미 후속 텍스트가 포함되어 있어 추가하지 않습니다.")
-
-            final_stream = combined_stream_generator()
+            def log_suffix(appended: bool):
+                if appended:
+                    log_debug("스트림 끝에 후속 텍스트(suffix)를 추가합니다.")
+                else:
+                    log_debug("스트림에 이미 후속 텍스트가 포함되어 있어 추가하지 않습니다.")
+
+            # prefix(접두사) -> 메인 스트림 -> suffix(후속 질문, 스트림이 이미 같은 문장으로 끝나면 생략)
+            final_stream = iter(StreamCombiner(
+                response_stream,
+                prefix=response_prefix if has_prefix else "",
+                suffix=response_text if has_suffix else "",
+                on_suffix=log_suffix,
+            ))
 
     # 5. 예외 처리 (전체 process_turn 함수를 감싸는 try-except)
     except Exception as e:
@@ -1291,10 +1320,13 @@ def process_turn(user_input: str, current_state: dict) -> dict:
         final_stream = None
         final_text = f"죄송합니다. 튜터와 대화 중 심각한 오류가 발생했습니다: {e}. 기록을 초기화합니다."
         new_state = get_initial_state() 
+        # 대화는 초기화해도 이번 턴까지의 누적 사용량은 잃지 않도록 유지
+        new_state["usage"] = current_state.get("usage") or new_state["usage"]
             
     # 6. 최종 반환 (app.py가 기대하는 형식)
         
-    save_profile(new_state)
+    with timed_stage(ctx, "save_profile"):
+        save_profile(new_state)
     
     if "explained_concepts" in new_state:
         new_state["explained_concepts"] = list(new_state["explained_concepts"])
@@ -1310,9 +1342,181 @@ def process_turn(user_input: str, current_state: dict) -> dict:
         if k not in ["target_concept_info", "prerequisites"]
     }
     log_debug(f"반환 상태: {final_state_summary}")
+    log_debug(f"턴 단계별 실행 횟수: {ctx.summary()}")
         
     return {
             "explanation_stream": final_stream,
             "response_text": final_text,
-            "new_state": new_state
-    }
\ No newline at end of file
+            "new_state": new_state,
+            "turn_stats": ctx.summary()
+    }
+
+# 11. 비동기 턴 처리 (aprocess_turn)
+# 턴의 결과를 좌우하는 LLM 호출(라우터, 개념 추출, 의도 분류, 이해도 판단)과 그래프 조회 중
+# 서로 의존하지 않는 것들을 ainvoke로 동시에(asyncio.gather) 먼저 실행해 턴 컨텍스트에 채워 두고,
+# 상태 머신 본체(_process_turn_core)는 채워진 결과를 재사용하여 LLM 대기 없이 진행합니다.
+# 그래프 조회는 메모리 그래프 엔진이 처리하고, 엔진이 없을 때의 Cypher 조회만 스레드에서 실행합니다.
+# (Neo4j 비동기 드라이버는 이벤트 루프마다 연결 풀이 따로 필요해 공용 GraphClient 풀을 그대로 사용)
+
+async def aget_concept_bundle(concept_name: str, depth: int = 2) -> dict:
+    """get_concept_bundle의 비동기 버전 (메모리 그래프가 없을 때의 Cypher 조회는 스레드에서 실행)"""
+    return await asyncio.to_thread(get_concept_bundle, concept_name, depth)
+
+async def _aextract_with_bundle(ctx: TurnContext, user_input: str):
+    """개념 추출 -> 개념 묶음 조회 (서로 의존하므로 순서대로)"""
+    with ctx.stage("prefetch.extract_concept"):
+        concept = await aextract_concept(user_input)
+    ctx.seed("extract_concept", (user_input,), concept)
+    if concept != "개념없음":
+        with ctx.stage("prefetch.concept_bundle"):
+            bundle = await aget_concept_bundle(concept, 2)
+        ctx.seed("concept_bundle", (concept, 2), bundle)
+
+async def _aseed(ctx: TurnContext, name: str, args: tuple, coro):
+    with ctx.stage(f"prefetch.{name}"):
+        value = await coro
+    ctx.seed(name, args, value)
+    return value
+
+def _router_task(result_str: str) -> str:
+    """라우터 LLM 응답의 task (파싱 실패 시 call_master_router와 같이 tutor_flow)"""
+    try:
+        return json.loads(result_str).get("task", "tutor_flow")
+    except Exception:
+        return "tutor_flow"
+
+async def _aprefetch_tutor_flow(ctx: TurnContext, user_input: str, mode: str, last_explained):
+    """tutor_flow로 분류된 턴에 필요한 단계 (IDLE: 개념 추출 + 묶음 조회, POST_EXPLANATION: 의도 분류)"""
+    if mode == "IDLE":
+        await _aextract_with_bundle(ctx, user_input)
+    else:
+        intent_args = (user_input, None, "post_explanation", last_explained)
+        await _aseed(ctx, "classify_intent", intent_args, aclassify_continuation_intent(*intent_args))
+
+async def _aroute_then_prefetch(ctx: TurnContext, user_input: str, state: dict):
+    """
+    라우터 LLM을 실행하고, tutor_flow로 분류될 때만 다음 단계를 실행합니다. (인사/잡담 턴은 추가 호출 없음)
+    IDLE에서 로컬 인덱스로 개념이 바로 확인되는 입력은 LLM 호출 없이 추출되므로 라우터와 동시에 미리 시작하고,
+    다른 작업으로 분류되면 취소합니다.
+    """
+    mode = state.get("mode", "IDLE")
+    last_explained = state.get("last_explained_concept", "none")
+    router_args = (user_input, *_router_llm_args(state))
+    speculative = None
+    if mode == "IDLE" and await asyncio.to_thread(_resolve_concept_locally, user_input):
+        speculative = asyncio.create_task(_aprefetch_tutor_flow(ctx, user_input, mode, last_explained))
+    try:
+        task = _router_task(await _aseed(ctx, "router_llm", router_args, arun_router_llm(*router_args)))
+    except BaseException:
+        if speculative:
+            speculative.cancel()
+        raise
+    if task != "tutor_flow":
+        if speculative:
+            speculative.cancel()
+            await asyncio.gather(speculative, return_exceptions=True)
+        return
+    await (speculative or _aprefetch_tutor_flow(ctx, user_input, mode, last_explained))
+
+async def _aprefetch_turn_steps(user_input: str, state: dict, ctx: TurnContext):
+    """
+    현재 상태에서 이번 턴에 필요할 단계들을 동시에 실행해 ctx에 채웁니다.
+    (_process_turn_core가 memoized로 호출하는 것과 같은 이름/인자를 사용해야 재사용됨)
+    """
+    user_input = state.get("pending_input") or user_input
+    if not user_input or is_system_command(user_input) or user_input.lower() in ["종료", "exit", "quit"]:
+        return
+
+    mode = state.get("mode", "IDLE")
+    last_explained = state.get("last_explained_concept", "none")
+    tasks = []
+
+    if mode in ["IDLE", "POST_EXPLANATION"]:
+        fast_result = fast_route(user_input, mode)
+        if fast_result is None:
+            tasks.append(_aroute_then_prefetch(ctx, user_input, state))
+        elif fast_result[0] == "tutor_flow":
+            tasks.append(_aprefetch_tutor_flow(ctx, user_input, mode, last_explained))
+
+    elif mode == "WAITING_CONTINUATION" and state.get("queue"):
+        next_concept = state["queue"][0]
+        intent_args = (user_input, next_concept, state.get("last_tutor_question_type", "shall_i_explain"), last_explained)
+        tasks.append(_aseed(ctx, "classify_intent", intent_args, aclassify_continuation_intent(*intent_args)))
+        target_info = state.get("target_concept_info") or {}
+        if next_concept != target_info.get("name"):
+            tasks.append(_aseed(ctx, "concept_bundle", (next_concept, 2), aget_concept_bundle(next_concept, 2)))
+
+    elif mode == "WAITING_DIAGNOSTIC":
+        # 의도 분류 + 이해도 판단 통합 호출 (실패하면 None이 채워지고 본체가 기존 2단계 호출로 대체)
+        prereq_names = [p["name"] for p in state.get("prerequisites", [])]
+        diagnosis_args = (user_input, prereq_names, last_explained)
+        tasks.append(_aseed(ctx, "diagnose_response", diagnosis_args, adiagnose_response(*diagnosis_args)))
+
+    if not tasks:
+        return
+    started = time.perf_counter()
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            # 실패한 단계는 채우지 않고 두면 본체에서 동기로 다시 실행됨
+            print(f"⚠️ 비동기 사전 실행 오류: {result}")
+    log_debug(f"비동기 사전 실행 {len(tasks)}개 완료 ({(time.perf_counter() - started) * 1000:.0f}ms)")
+
+def _begin_turn(current_state: dict):
+    """턴 컨텍스트, 사용량 장부, 호출자의 상태를 바꾸지 않도록 복사한 상태 (사용량 합계도 복사본에 더함)"""
+    state = current_state.copy()
+    state["session_usage"] = copy.deepcopy(current_state.get("session_usage") or new_usage())
+    state["usage"] = copy.deepcopy(current_state.get("usage") or new_usage())
+    # (신규) 턴 단위 결과 재사용 (개념 추출/그래프 조회/의도 분류는 턴당 최대 1회) + 단계별 소요 시간 측정
+    ctx = TurnContext(metrics=TurnMetrics())
+    # (신규) 토큰 사용량: 턴 합계 + 세션 합계 + 프로필 누적 합계 (스트림 사용량은 스트림이 끝날 때 더해짐)
+    ledger = UsageLedger(state["session_usage"], state["usage"])
+    return state, ctx, ledger
+
+def _save_profile_after_stream(stream, state: dict):
+    """응답 스트림이 끝나면(중간에 닫혀도) 스트림의 토큰 사용량까지 더해진 상태로 프로필을 다시 저장"""
+    try:
+        yield from stream
+    finally:
+        save_profile(state)
+
+def _finish_turn(result: dict, ctx: TurnContext, ledger: UsageLedger) -> dict:
+    result["usage"] = ledger.totals
+    # 응답 스트림은 app.py가 소비할 때 첫 조각까지 시간(TTFT)과 스트리밍 시간이 요약에 채워지고,
+    # 다 읽은 뒤 프로필 사용량이 저장됨 (턴 본체의 저장에는 아직 스트림 사용량이 없음)
+    if result.get("explanation_stream") is not None:
+        result["explanation_stream"] = _save_profile_after_stream(
+            ctx.metrics.wrap_response_stream(result["explanation_stream"]), result["new_state"])
+    result["metrics"] = ctx.metrics.finish(mode=result.get("new_state", {}).get("mode"), usage=ledger.totals)
+    log_debug(f"턴 단계별 소요 시간(ms): {result['metrics']['stages']} (합계 {result['metrics']['total_ms']:.0f}ms)")
+    log_debug(f"턴 토큰 사용량(응답 스트림 제외): 호출 {ledger.totals['calls']}회, "
+              f"입력 {ledger.totals['input_tokens']} / 출력 {ledger.totals['output_tokens']} 토큰, ${ledger.totals['cost_usd']:.5f}")
+    return result
+
+async def aprocess_turn(user_input: str, current_state: dict) -> dict:
+    """
+    process_turn의 비동기 버전. 반환 형식은 process_turn과 같습니다.
+    독립적인 LLM/그래프 단계를 동시에 먼저 실행한 뒤, 상태 머신 본체를 스레드에서 실행합니다.
+    """
+    state, ctx, ledger = _begin_turn(current_state)
+    with usage_scope(ledger): # asyncio 태스크와 to_thread 스레드는 이 컨텍스트를 복사해 사용
+        try:
+            with ctx.stage("prefetch"):
+                await _aprefetch_turn_steps(user_input, state, ctx)
+        except Exception as e:
+            print(f"⚠️ 비동기 사전 실행 실패 (동기 처리로 계속): {e}")
+        with ctx.stage("process_turn_core"):
+            result = await asyncio.to_thread(_process_turn_core, user_input, state, ctx)
+    return _finish_turn(result, ctx, ledger)
+
+def process_turn(user_input: str, current_state: dict) -> dict:
+    """
+    모든 대화 로직을 처리하는 마스터 함수 (동기). app.py 등 동기 코드에서 호출합니다.
+    (단계를 동시에 실행하려면 이벤트 루프 안에서 aprocess_turn을 사용)
+    반환 dict의 "metrics"에 단계별 소요 시간 요약(utils/metrics.py), "usage"에 이 턴의 토큰 사용량/비용(utils/usage.py)이 들어 있습니다.
+    """
+    state, ctx, ledger = _begin_turn(current_state)
+    with usage_scope(ledger):
+        with ctx.stage("process_turn_core"):
+            result = _process_turn_core(user_input, state, ctx)
+    return _finish_turn(result, ctx, ledger)
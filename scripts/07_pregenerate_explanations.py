@@ -0,0 +1,197 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dotenv import load_dotenv
+from langchain_openai import ChatOpenAI
+
+# utils 패키지를 불러오기 위해 프로젝트 루트를 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from utils.prompts import EXPLANATION_PROMPT_VERSION, TUTOR_PROMPTS, explanation_inputs
+from utils.prompt_registry import PromptRegistry
+from utils.explanation_cache import PREBUILT_FILE, count_bucket, content_hash
+from utils.graph_client import GraphClient
+
+# 모든 CoreConcept에 대해 설명 변형(처음 설명 / 재설명)을 미리 생성하는 배치 작업
+# 04_create_prerequisite_links.py 다음에 실행합니다.
+# 튜터(06_tutor_rag.py)는 시작 시 결과 파일을 읽어, 있는 설명은 LLM 호출 없이 바로 제공합니다.
+#
+# - 동시 실행 수 제한 (--workers)
+# - 이어하기: 매니페스트에 기록된 내용 해시, 프롬프트 버전, 모델이 현재와 같고 변형 개수가 채워진 개념은 건너뜀
+#   (셋 중 하나라도 바뀐 개념은 다시 생성)
+# - 개념 하나가 끝날 때마다 결과 파일과 매니페스트를 저장하므로 중간에 멈춰도 다시 이어서 실행 가능
+
+load_dotenv()
+NEO4J_URI = os.getenv('NEO4J_URI')
+NEO4J_USER = os.getenv('NEO4J_USER')
+NEO4J_PASSWORD = os.getenv('NEO4J_PASSWORD')
+
+MANIFEST_FILE = os.path.join(PROJECT_ROOT, "data", "explanation_variants.manifest.json")
+OUTPUT_FILE = os.path.join(PROJECT_ROOT, PREBUILT_FILE)
+MAX_RETRIES = 3
+EXPLANATION_MODEL = 'gpt-4o-mini'
+
+def fetch_core_concepts(graph_db) -> list:
+    """모든 CoreConcept의 이름, 정의, 예시를 가져옵니다. (튜터의 retrieve_concept_from_graph와 같은 예시 선택)"""
+    query = """
+    MATCH (c:CoreConcept)
+    OPTIONAL MATCH (ex:Concept)-[:IS_EXAMPLE_OF]->(c)
+    WITH c, ex ORDER BY size(ex.definition), ex.definition
+    WITH c, collect(ex.definition)[0..3] AS examples
+    RETURN c.name AS name, c.definition AS definition, examples
+    ORDER BY name
+    """
+    return [
+        {"name": r["name"], "definition": r["definition"], "examples": r["examples"] or []}
+        for r in graph_db.run_query(query)
+    ]
+
+def load_json(path: str, default: dict) -> dict:
+    if not os.path.exists(path):
+        return default
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def write_json_atomic(path: str, data: dict, compact: bool = False):
+    """임시 파일에 쓴 뒤 교체하여, 중간에 멈춰도 파일이 깨지지 않도록 저장합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if compact:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+def explanation_registry(llm) -> PromptRegistry:
+    """generate_explanation과 같은 설명 프롬프트 체인 (스레드 간 공유)"""
+    return PromptRegistry(llm, {name: TUTOR_PROMPTS[name] for name in ("explanation.first", "explanation.retry")})
+
+def generate_one(prompts: PromptRegistry, concept_info: dict, count: int) -> str:
+    """generate_explanation과 같은 프롬프트로 설명 1개 생성 (재시도 포함)"""
+    chain = prompts.chain(f"explanation.{count_bucket(count)}")
+    for attempt in range(1, MAX_RETRIES + 1):
+        try:
+            return chain.invoke(explanation_inputs(concept_info)).strip()
+        except Exception as e:
+            if attempt == MAX_RETRIES:
+                raise
+            wait = 2 ** attempt
+            print(f"  ⚠️ '{concept_info['name']}' 생성 실패 ({e}), {wait}초 후 재시도")
+            time.sleep(wait)
+
+def generate_variants(prompts: PromptRegistry, concept_info: dict, first_variants: int, retry_variants: int) -> dict:
+    """처음 설명 N개 + 재설명 M개 생성 (재설명 i번째는 설명 횟수 i+1에 해당)"""
+    return {
+        "first": [generate_one(prompts, concept_info, 0) for _ in range(first_variants)],
+        "retry": [generate_one(prompts, concept_info, i + 1) for i in range(retry_variants)],
+    }
+
+def is_up_to_date(record: dict, h: str, model: str, first_variants: int, retry_variants: int) -> bool:
+    """매니페스트 항목이 현재 입력(내용 해시/프롬프트 버전/모델)으로 요청한 개수만큼 생성된 결과인지"""
+    return bool(
+        record and record.get("hash") == h
+        and record.get("prompt_version") == EXPLANATION_PROMPT_VERSION
+        and record.get("model") == model
+        and record.get("first", 0) >= first_variants
+        and record.get("retry", 0) >= retry_variants
+    )
+
+def pregenerate(graph_db, prompts: PromptRegistry, workers: int, first_variants: int, retry_variants: int,
+                force: bool = False, model: str = EXPLANATION_MODEL):
+    concepts = fetch_core_concepts(graph_db)
+    print(f"CoreConcept {len(concepts)}개를 가져왔습니다. (프롬프트 버전: {EXPLANATION_PROMPT_VERSION}, 모델: {model})")
+
+    artifact = load_json(OUTPUT_FILE, {})
+    if artifact.get("prompt_version") != EXPLANATION_PROMPT_VERSION:
+        artifact = {"prompt_version": EXPLANATION_PROMPT_VERSION, "concepts": {}}
+    artifact["model"] = model
+    manifest = load_json(MANIFEST_FILE, {"concepts": {}})
+
+    # 이어하기 판단은 매니페스트 기준 (결과 파일에 항목이 없어진 개념도 다시 생성)
+    todo = []
+    stale = 0
+    for info in concepts:
+        h = content_hash(info, EXPLANATION_PROMPT_VERSION)
+        record = manifest["concepts"].get(info["name"])
+        done = (
+            not force and info["name"] in artifact["concepts"]
+            and is_up_to_date(record, h, model, first_variants, retry_variants)
+        )
+        if not done:
+            todo.append((info, h))
+            stale += record is not None
+
+    # 그래프에서 사라진 개념은 결과에서 제거
+    names = {info["name"] for info in concepts}
+    for removed in set(artifact["concepts"]) - names:
+        artifact["concepts"].pop(removed)
+        manifest["concepts"].pop(removed, None)
+
+    print(f"생성 대상 {len(todo)}개 (변경/미완료 {stale}개 포함, 이미 완료 {len(concepts) - len(todo)}개 건너뜀)\n")
+    if not todo:
+        write_json_atomic(OUTPUT_FILE, artifact, compact=True)
+        write_json_atomic(MANIFEST_FILE, manifest)
+        return
+
+    lock = threading.Lock()
+    started = time.time()
+    finished = 0
+    failed = 0
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(generate_variants, prompts, info, first_variants, retry_variants): (info, h)
+            for info, h in todo
+        }
+        for future in as_completed(futures):
+            info, h = futures[future]
+            try:
+                variants = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"✗ '{info['name']}' 생성 실패: {e}")
+                continue
+
+            with lock:
+                artifact["concepts"][info["name"]] = {"hash": h, **variants}
+                manifest["concepts"][info["name"]] = {
+                    "hash": h,
+                    "prompt_version": EXPLANATION_PROMPT_VERSION,
+                    "model": model,
+                    "first": len(variants["first"]),
+                    "retry": len(variants["retry"]),
+                    "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                }
+                write_json_atomic(OUTPUT_FILE, artifact, compact=True)
+                write_json_atomic(MANIFEST_FILE, manifest)
+                finished += 1
+
+            elapsed = time.time() - started
+            print(f"✓ [{finished}/{len(todo)}] {info['name']} ({finished / elapsed:.2f}개/초)")
+
+    print(f"\n총 {finished}개 생성, {failed}개 실패. 결과: '{OUTPUT_FILE}'")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="CoreConcept 설명 변형 사전 생성")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 생성할 개념 수")
+    parser.add_argument("--first-variants", type=int, default=1, help="처음 설명 변형 개수")
+    parser.add_argument("--retry-variants", type=int, default=3, help="재설명 변형 개수")
+    parser.add_argument("--model", default=EXPLANATION_MODEL, help="설명 생성 모델 (바꾸면 모든 개념을 다시 생성)")
+    parser.add_argument("--force", action="store_true", help="완료된 개념도 다시 생성")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    db = GraphClient(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, name="pregenerate")
+    llm = ChatOpenAI(model=args.model, temperature=0.3)
+    try:
+        pregenerate(db, explanation_registry(llm), args.workers, args.first_variants, args.retry_variants, args.force, args.model)
+    finally:
+        db.close()
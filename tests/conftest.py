@@ -0,0 +1,8 @@
+import os
+import sys
+
+# utils 패키지와 scripts/, benchmarks/ 모듈을 불러오기 위해 프로젝트 루트를 경로에 추가
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, "scripts"), os.path.join(PROJECT_ROOT, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,36 @@
+import sys
+import importlib
+
+import pytest
+
+
+class FakeGraph:
+    """기존 4개 쿼리와 묶음 쿼리에 최소한의 행을 돌려주는 가짜 그래프"""
+
+    def query(self, query, params=None):
+        if "c.definition AS definition\n" in query and "prerequisites" not in query:
+            return [{"name": params["name"], "definition": "정의"}]
+        if "prerequisites" in query:
+            return [{"name": params["name"], "definition": "정의", "examples": [], "prerequisites": [], "edges": []}]
+        return []
+
+
+@pytest.fixture
+def bench(monkeypatch, tmp_path):
+    # 튜터 모듈은 가짜 백엔드로, 캐시/프로필 파일은 임시 폴더에 만들도록 함
+    monkeypatch.setenv("TUTOR_BACKEND", "replay_backends:create_backends")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("bench_concept_bundle")
+    monkeypatch.setattr(module.tutor, "graph", FakeGraph())
+    monkeypatch.setattr(module.tutor, "USE_GRAPH_ENGINE", True)
+    return module
+
+
+def test_bundle_benchmark_measures_cypher_path(bench, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["bench_concept_bundle.py", "--runs", "2", "일차방정식"])
+    bench.main()
+    out = capsys.readouterr().out
+    assert "묶음       왕복 1.0회/조회" in out
+    assert "기존       왕복 4.0회/조회" in out
+    assert bench.tutor.USE_GRAPH_ENGINE is False
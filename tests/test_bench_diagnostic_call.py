@@ -0,0 +1,23 @@
+import sys
+import importlib
+
+import pytest
+
+
+@pytest.fixture
+def bench(monkeypatch, tmp_path):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.chdir(tmp_path) # 튜터 모듈이 만드는 data/ 파일은 임시 폴더에
+    return importlib.import_module("bench_diagnostic_call")
+
+
+def test_replay_compares_two_calls_with_one(bench, monkeypatch, capsys):
+    monkeypatch.setenv("TUTOR_BACKEND", "replay_backends:create_backends")
+    monkeypatch.setattr(sys, "argv", ["bench_diagnostic_call.py", "--replay", "--runs", "1",
+                                      "--first-token-ms", "5", "--token-ms", "0"])
+    legacy, combined = bench.main()
+    assert legacy["llm_calls_per_case"] == 2
+    assert combined["llm_calls_per_case"] == 1
+    assert legacy["accuracy"] == combined["accuracy"] == 1
+    assert combined["mean_ms"] < legacy["mean_ms"]
+    assert "LLM 1.0회/사례" in capsys.readouterr().out
@@ -0,0 +1,23 @@
+import statistics
+
+import pytest
+
+from bench_stats import percentile
+
+
+def test_percentile_empty():
+    assert percentile([], 0.95) is None
+
+
+def test_percentile_nearest_rank():
+    values = list(range(1, 21))
+    assert percentile(values, 0.50) == 10
+    assert percentile(values, 0.95) == 19
+    assert percentile(values, 1.0) == 20
+    assert percentile([7], 0.95) == 7
+
+
+@pytest.mark.parametrize("n", range(1, 40))
+def test_p95_never_below_median(n):
+    values = [float(i) for i in range(n, 0, -1)]
+    assert percentile(values, 0.95) >= statistics.median(values)
@@ -0,0 +1,95 @@
+import importlib
+
+build = importlib.import_module("02_build_graph")
+
+
+class FakeTx:
+    def __init__(self, queries):
+        self.queries = queries
+
+    def run(self, query, rows):
+        self.queries.append((query, rows))
+        return self
+
+    def consume(self):
+        pass
+
+
+class FakeSession:
+    """execute_write로 받은 배치를 기록하는 가짜 세션"""
+
+    def __init__(self):
+        self.batches = []
+
+    def execute_write(self, fn, *args):
+        queries = []
+        fn(FakeTx(queries), *args)
+        self.batches.append({
+            "standards": next(rows for q, rows in queries if q == build.STANDARDS_QUERY),
+            "concepts": next(rows for q, rows in queries if q == build.CONCEPTS_QUERY),
+            "links": next(rows for q, rows in queries if q == build.LINKS_QUERY),
+        })
+
+
+def row(code, text, grade="1"):
+    return {"code": code, "desc": f"{code} 설명", "domain": "수와 연산", "grade": grade, "semester": "1",
+            "id": f"concept_{text}", "name": text, "def": text}
+
+
+def test_flushes_every_batch_size_rows():
+    session = FakeSession()
+    loader = build.BatchLoader(session, batch_size=2)
+    for i in range(5):
+        loader.add(row("9수01-01", f"문장{i}"))
+    assert len(session.batches) == 2
+    loader.flush()
+    loader.flush() # 보낼 것이 없으면 트랜잭션 없음
+    assert loader.transactions == len(session.batches) == 3
+    assert [len(b["concepts"]) for b in session.batches] == [2, 2, 1]
+    # 성취기준은 배치마다 한 번
+    assert [len(b["standards"]) for b in session.batches] == [1, 1, 1]
+
+
+def test_duplicates_collapse_with_last_row_winning():
+    session = FakeSession()
+    loader = build.BatchLoader(session, batch_size=10)
+    loader.add(row("9수01-01", "같은 문장", grade="1"))
+    loader.add(row("9수01-02", "같은 문장", grade="2"))
+    loader.add(row("9수01-01", "같은 문장", grade="3"))
+    loader.add(row("9수01-01", "다른 문장"))
+    loader.flush()
+
+    (batch,) = session.batches
+    concepts = {c["id"]: c for c in batch["concepts"]}
+    assert len(batch["concepts"]) == 2
+    assert concepts["concept_같은 문장"]["grade"] == "3"
+    assert [s["code"] for s in batch["standards"]] == ["9수01-01", "9수01-02"]
+    assert batch["standards"][0]["grade"] == "1" # 9수01-01의 마지막 행 ("다른 문장")
+    assert batch["links"] == [
+        {"id": "concept_같은 문장", "code": "9수01-01"},
+        {"id": "concept_같은 문장", "code": "9수01-02"},
+        {"id": "concept_다른 문장", "code": "9수01-01"},
+    ]
+    assert (loader.rows, loader.duplicates, len(loader.seen_ids), len(loader.seen_links)) == (4, 2, 2, 3)
+
+
+def test_links_are_sent_once_across_batches():
+    session = FakeSession()
+    loader = build.BatchLoader(session, batch_size=1)
+    loader.add(row("9수01-01", "문장", grade="1"))
+    loader.add(row("9수01-01", "문장", grade="2"))
+    # 나중 배치의 중복 행도 다시 써서 마지막 값이 남음, 관계는 이미 보냈으므로 생략
+    assert [b["concepts"][0]["grade"] for b in session.batches] == ["1", "2"]
+    assert [len(b["links"]) for b in session.batches] == [1, 0]
+
+
+def test_iter_records_reads_jsonl(tmp_path):
+    path = tmp_path / "processed_data.jsonl"
+    path.write_text(
+        '{"achievement_code": "9수02-01", "achievement_desc": "d", "text_description": "일차식", "grade": "1", "semester": "1"}\n'
+        '{"achievement_code": "N/A", "text_description": "건너뜀"}\n',
+        encoding="utf-8",
+    )
+    (record,) = build.iter_records(str(path))
+    assert record["domain"] == "변화와 관계"
+    assert record["id"].startswith("concept_")
@@ -0,0 +1,129 @@
+import json
+import asyncio
+
+import httpx
+import pytest
+
+from utils.cassette import Cassette, CassetteGraph, CassetteMissError, CassetteTransport, AsyncCassetteTransport
+
+URL = "https://api.example.com/v1/chat/completions"
+
+
+class ChunkStream(httpx.SyncByteStream):
+    """스트림 응답처럼 조각으로 나눠 보내는 본문 (content=bytes는 httpx가 미리 읽어버림)"""
+
+    def __init__(self, text):
+        self.data = text.encode("utf-8")
+
+    def __iter__(self):
+        yield self.data[:3]
+        yield self.data[3:]
+
+
+class FakeServer:
+    """요청마다 번호를 붙인 응답을 돌려주는 가짜 LLM 서버 (httpx.MockTransport 처리기)"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, request):
+        self.calls += 1
+        body = json.loads(request.content)
+        return httpx.Response(200, headers={"x-call": str(self.calls)},
+                              stream=ChunkStream(f"{body['prompt']}#{self.calls}"))
+
+
+class FakeGraph:
+    def __init__(self):
+        self.calls = 0
+
+    def query(self, query, params=None):
+        self.calls += 1
+        return [{"name": params["name"], "call": self.calls}]
+
+    def refresh_schema(self):
+        return "schema"
+
+
+def post(client, payload):
+    # 같은 내용이면 키 순서가 달라도 같은 요청으로 취급되는지 확인하기 위해 본문을 직접 만듦
+    return client.post(URL, content=payload.encode("utf-8"), headers={"content-type": "application/json"})
+
+
+def record_session(path, server):
+    cassette = Cassette(path, "record")
+    with httpx.Client(transport=CassetteTransport(cassette, inner=httpx.MockTransport(server))) as client:
+        first = post(client, '{"prompt": "일차식", "model": "m"}').text
+        second = post(client, '{"model": "m", "prompt": "일차식"}').text
+        other = post(client, '{"prompt": "등식", "model": "m"}').text
+    return cassette, [first, second, other]
+
+
+def test_http_record_then_replay(tmp_path):
+    path = str(tmp_path / "cassettes" / "tutor.jsonl")
+    cassette, recorded = record_session(path, FakeServer())
+    assert recorded == ["일차식#1", "일차식#2", "등식#3"]
+    assert cassette.recorded == 3
+
+    replay = Cassette(path, "replay", speed=0)
+    with httpx.Client(transport=CassetteTransport(replay)) as client:
+        # 같은 키는 녹화 순서대로, 마지막 응답은 반복
+        assert post(client, '{"model": "m", "prompt": "일차식"}').text == "일차식#1"
+        assert post(client, '{"prompt": "일차식", "model": "m"}').text == "일차식#2"
+        response = post(client, '{"prompt": "일차식", "model": "m"}')
+        assert response.text == "일차식#2"
+        assert response.headers["x-call"] == "2"
+        assert post(client, '{"prompt": "등식", "model": "m"}').text == "등식#3"
+        with pytest.raises(CassetteMissError):
+            post(client, '{"prompt": "부등식", "model": "m"}')
+    assert replay.replayed == 4
+
+
+def test_async_transport_replays_recorded_stream(tmp_path):
+    path = str(tmp_path / "tutor.jsonl")
+    record_session(path, FakeServer())
+    replay = Cassette(path, "replay", speed=0)
+
+    async def run():
+        async with httpx.AsyncClient(transport=AsyncCassetteTransport(replay)) as client:
+            response = await client.post(URL, content=b'{"prompt": "\\ub4f1\\uc2dd", "model": "m"}')
+            return response.text
+
+    assert asyncio.run(run()) == "등식#3"
+
+
+def test_new_recording_replaces_old_cassette(tmp_path):
+    path = str(tmp_path / "tutor.jsonl")
+    record_session(path, FakeServer())
+    server = FakeServer()
+    server.calls = 100
+    record_session(path, server)
+
+    with open(path, encoding="utf-8") as f:
+        assert sum(1 for line in f if line.strip()) == 3
+    replay = Cassette(path, "replay", speed=0)
+    with httpx.Client(transport=CassetteTransport(replay)) as client:
+        assert post(client, '{"prompt": "일차식", "model": "m"}').text == "일차식#101"
+
+
+def test_graph_record_then_replay(tmp_path):
+    path = str(tmp_path / "tutor.jsonl")
+    inner = FakeGraph()
+    graph = CassetteGraph(inner, Cassette(path, "record"))
+    assert graph.query("MATCH (c {name: $name})\n RETURN c", {"name": "일차식"}) == [{"name": "일차식", "call": 1}]
+    assert graph.refresh_schema() == "schema"
+
+    replay = CassetteGraph(None, Cassette(path, "replay", speed=0))
+    # 쿼리의 공백 차이는 같은 요청으로 취급
+    assert replay.query("MATCH (c {name: $name}) RETURN c", {"name": "일차식"}) == [{"name": "일차식", "call": 1}]
+    with pytest.raises(CassetteMissError):
+        replay.query("MATCH (c {name: $name}) RETURN c", {"name": "등식"})
+    with pytest.raises(AttributeError):
+        replay.refresh_schema()
+
+
+def test_invalid_mode_and_missing_file(tmp_path):
+    with pytest.raises(ValueError):
+        Cassette(str(tmp_path / "x.jsonl"), "rewind")
+    with pytest.raises(FileNotFoundError):
+        Cassette(str(tmp_path / "없음.jsonl"), "replay")
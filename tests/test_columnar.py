@@ -0,0 +1,78 @@
+import json
+
+import pytest
+
+from utils.columnar import ColumnarCorpus, write_columnar, COLUMNS
+
+
+def record(code, text, source="수학_1학년.csv"):
+    return {"source_file": source, "grade": "1", "semester": "1", "achievement_code": code,
+            "achievement_desc": f"{code} 설명", "text_description": text}
+
+
+RECORDS = [
+    record("[9수02-01]", "일차방정식을 푼다."),
+    record("[9수01-01]", "소인수분해를 한다."),
+    record("[9수02-01]", "등식의 성질을 이용한다."),
+    record("[9수02-01]", "일차방정식을 푼다.", source="수학_1학년_보충.csv"),
+    record("[9수01-01]", ""),
+]
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = str(tmp_path / "processed_data.columnar")
+    write_columnar(RECORDS, path)
+    with ColumnarCorpus(path) as corpus:
+        yield corpus
+
+
+def test_rows_round_trip_in_code_order(corpus):
+    expected = sorted(RECORDS, key=lambda r: r["achievement_code"])
+    assert list(corpus.rows()) == expected
+    assert len(corpus) == len(RECORDS)
+    assert corpus.codes() == ["[9수01-01]", "[9수02-01]"]
+
+
+def test_per_code_lookups(corpus):
+    assert [r["text_description"] for r in corpus.rows("[9수01-01]")] == ["소인수분해를 한다.", ""]
+    assert corpus.texts("[9수02-01]") == ["일차방정식을 푼다.", "등식의 성질을 이용한다."]
+    assert corpus.column("source_file", "[9수02-01]")[-1] == "수학_1학년_보충.csv"
+    assert corpus.texts("[없는 코드]") == []
+    assert list(corpus.rows("[없는 코드]")) == []
+
+
+def test_strings_are_deduplicated(corpus):
+    distinct = {r[name] or "" for r in RECORDS for name in COLUMNS}
+    assert corpus.index["strings"] == len(distinct)
+
+
+def test_rewrite_replaces_previous_version(tmp_path):
+    path = str(tmp_path / "columnar")
+    write_columnar(RECORDS, path)
+    write_columnar(RECORDS[:1], path)
+    with ColumnarCorpus(path) as corpus:
+        assert list(corpus.rows()) == RECORDS[:1]
+    assert not (tmp_path / "columnar.tmp").exists()
+
+
+def test_empty_input(tmp_path):
+    path = str(tmp_path / "empty")
+    index = write_columnar([], path)
+    assert index["rows"] == 0
+    with ColumnarCorpus(path) as corpus:
+        assert len(corpus) == 0
+        assert list(corpus.rows()) == []
+        assert corpus.codes() == []
+
+
+def test_open_if_exists_and_version_check(tmp_path):
+    assert ColumnarCorpus.open_if_exists(str(tmp_path / "없음")) is None
+
+    path = tmp_path / "old"
+    write_columnar(RECORDS, str(path))
+    index = json.loads((path / "index.json").read_text(encoding="utf-8"))
+    index["version"] = 0
+    (path / "index.json").write_text(json.dumps(index), encoding="utf-8")
+    with pytest.raises(ValueError):
+        ColumnarCorpus(str(path))
@@ -0,0 +1,79 @@
+import pytest
+
+from utils.concept_graph import ConceptGraph, NODES_QUERY, EDGES_QUERY, EXAMPLES_QUERY
+
+# 정수 -> 유리수 -> 일차식 -> 일차방정식 <- 등식, 일차방정식 -> 일차방정식의 활용
+NODES = ["등식", "유리수", "일차방정식", "일차방정식의 활용", "일차식", "정수"]
+EDGES = [("정수", "유리수"), ("유리수", "일차식"), ("일차식", "일차방정식"), ("등식", "일차방정식"),
+         ("일차방정식", "일차방정식의 활용")]
+
+
+def fake_query(query, params):
+    if query == NODES_QUERY:
+        return [{"name": n, "definition": f"{n}의 정의", "domain": "수와 연산"} for n in NODES]
+    if query == EDGES_QUERY:
+        return [{"source": a, "target": b} for a, b in EDGES] + [{"source": "없는 개념", "target": "정수"}]
+    if query == EXAMPLES_QUERY:
+        return [{"name": "일차방정식", "examples": ["2x+1=5"][:params["example_limit"]]}]
+    raise AssertionError(f"예상하지 못한 쿼리: {query}")
+
+
+@pytest.fixture
+def graph():
+    return ConceptGraph.from_neo4j(fake_query, generation="g1")
+
+
+def test_from_neo4j_ignores_unknown_endpoints(graph):
+    assert len(graph) == len(NODES)
+    assert len(graph.edges) == len(EDGES)
+    assert graph.retrieve_concept("일차방정식")["examples"] == ["2x+1=5"]
+    assert graph.retrieve_concept("없는 개념") is None
+
+
+def test_get_prerequisites_sorted_by_depth(graph):
+    assert [(p["name"], p["depth"]) for p in graph.get_prerequisites("일차방정식", depth=2)] == [
+        ("등식", 1), ("일차식", 1), ("유리수", 2)]
+    assert [p["name"] for p in graph.get_prerequisites("일차방정식", depth=10)][-1] == "정수"
+
+
+def test_is_prerequisite_is_transitive(graph):
+    assert graph.is_prerequisite("정수", "일차방정식의 활용")
+    assert not graph.is_prerequisite("일차방정식의 활용", "정수")
+    assert not graph.is_prerequisite("없는 개념", "정수")
+
+
+def test_unknown_prerequisites_excludes_known(graph):
+    assert graph.unknown_prerequisites("일차방정식", {"등식"}, depth=2) == ["유리수", "일차식"]
+
+
+def test_visualization_path(graph):
+    path = graph.get_path_for_visualization("일차방정식")
+    edges = {(e["source"], e["target"]) for e in path["edges"]}
+    assert edges == {("일차식", "일차방정식"), ("등식", "일차방정식"), ("유리수", "일차식"),
+                     ("일차방정식", "일차방정식의 활용")}
+    assert {n["id"] for n in path["nodes"]} == {"유리수", "일차식", "등식", "일차방정식", "일차방정식의 활용"}
+
+
+def test_bundle_matches_parts(graph):
+    bundle = graph.get_bundle("일차식")
+    assert bundle["definition"] == "일차식의 정의"
+    assert bundle["prerequisites"] == graph.get_prerequisites("일차식", 2)
+    assert graph.get_bundle("없는 개념") is None
+
+
+def test_snapshot_round_trip(graph, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    graph.save_snapshot(path)
+    loaded = ConceptGraph.load_snapshot(path)
+    assert loaded.to_dict() == graph.to_dict()
+
+
+def test_load_uses_snapshot_only_for_same_generation(graph, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    graph.save_snapshot(path)
+
+    def no_queries(query, params):
+        raise AssertionError("스냅샷 세대가 같으면 Neo4j를 읽지 않아야 함")
+
+    assert ConceptGraph.load(no_queries, path, generation="g1").generation == "g1"
+    assert ConceptGraph.load(fake_query, path, generation="g2").generation == "g2"
@@ -0,0 +1,61 @@
+import pytest
+
+from utils.concept_index import ConceptIndex
+
+NAMES = ["각뿔", "각뿔대", "일차방정식", "일차식", "최대공약수", "부피"]
+
+
+@pytest.fixture
+def index():
+    index = ConceptIndex()
+    assert index.rebuild(NAMES)
+    return index
+
+
+def test_longest_match_wins(index):
+    assert index.resolve("각뿔대가 뭐야?") == "각뿔대"
+    assert index.resolve("각뿔이 뭐야?") == "각뿔"
+    assert index.find_all("일차방정식") == [(0, 5, "일차방정식")]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1차 방정식 설명해줘", "일차방정식"),
+    ("GCD가 뭐야", "최대공약수"),
+    ("최대 공약수 알려줘", "최대공약수"),
+])
+def test_aliases_and_spacing(index, text, expected):
+    assert index.resolve(text) == expected
+
+
+def test_alias_only_for_existing_concepts():
+    index = ConceptIndex()
+    index.rebuild(["일차식"])
+    assert index.resolve("최대 공약수가 뭐야") is None
+    assert index.resolve("1차식이 뭐야") == "일차식"
+
+
+@pytest.mark.parametrize("text", [
+    "각뿔대의 부피 구하는 법",   # 여러 개념
+    "각뿔대 부피",              # 여러 개념
+    "일차식 계산하는 법",        # 허용하지 않는 뒷말
+    "어제 배운 일차식이 뭐야",   # 허용하지 않는 앞말
+    "날씨 어때",                # 매칭 없음
+])
+def test_guards_reject_other_phrasing(index, text):
+    assert index.resolve(text) is None
+
+
+def test_allowed_prefix_and_suffix(index):
+    assert index.resolve("그럼 일차식이란 뭐야?") == "일차식"
+    assert index.resolve("일차식") == "일차식"
+    assert index.resolve("일차식 이해가 안 돼") == "일차식"
+
+
+def test_rebuild_only_when_names_change(index):
+    trie = index._trie
+    assert not index.rebuild(list(reversed(NAMES)) + [""])
+    assert index._trie is trie
+
+    assert index.rebuild(NAMES + ["정비례"])
+    assert index.resolve("정비례 관계가 뭐야") == "정비례"
+    assert index.size == len(NAMES) + 1 + 6 # 이름 + 별칭(1차방정식, 일차 방정식, gcd, 최대 공약수, 1차식, 정비례 관계)
@@ -0,0 +1,103 @@
+import pytest
+
+from utils import debug_log, explanation_cache
+from utils.explanation_cache import ExplanationCache, count_bucket, variant_for, record_stream, replay_stream
+
+VERSION = "v1"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(explanation_cache.time, "time", clock)
+    monkeypatch.setattr(debug_log, "DEBUG_MODE", False)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    cache = ExplanationCache(str(tmp_path / "cache" / "explanations.sqlite3"), max_entries=2, ttl_seconds=100)
+    yield cache
+    cache.close()
+
+
+def test_put_then_get(cache):
+    assert cache.get("일차식", "first", 0, VERSION) is None
+    cache.put("일차식", "first", 0, VERSION, "일차식은 ...")
+    assert cache.get("일차식", "first", 0, VERSION) == "일차식은 ..."
+    # 키의 각 부분이 다르면 다른 항목
+    assert cache.get("일차식", "retry", 0, VERSION) is None
+    assert cache.get("일차식", "first", 1, VERSION) is None
+    assert cache.get("일차식", "first", 0, "v2") is None
+    assert cache.stats() == {"hits": 1, "misses": 4, "hit_rate": 0.2}
+
+
+def test_entries_expire_after_ttl(cache, clock):
+    cache.put("일차식", "first", 0, VERSION, "설명")
+    clock.now += 100
+    assert cache.get("일차식", "first", 0, VERSION) == "설명"
+    clock.now += 1 # 조회해도 생성 시각 기준으로 만료
+    assert cache.get("일차식", "first", 0, VERSION) is None
+    (count,) = cache._connect().execute("SELECT count(*) FROM explanations").fetchone()
+    assert count == 0
+
+
+def test_lru_trim_to_max_entries(cache, clock):
+    cache.put("A", "first", 0, VERSION, "a")
+    clock.now += 1
+    cache.put("B", "first", 0, VERSION, "b")
+    clock.now += 1
+    assert cache.get("A", "first", 0, VERSION) == "a" # A가 최근 사용됨
+    clock.now += 1
+    cache.put("C", "first", 0, VERSION, "c")
+
+    assert cache.get("B", "first", 0, VERSION) is None
+    assert cache.get("A", "first", 0, VERSION) == "a"
+    assert cache.get("C", "first", 0, VERSION) == "c"
+
+
+def test_cache_persists_across_connections(tmp_path, clock):
+    path = str(tmp_path / "explanations.sqlite3")
+    first = ExplanationCache(path)
+    first.put("일차식", "first", 0, VERSION, "설명")
+    first.close()
+    second = ExplanationCache(path)
+    assert second.get("일차식", "first", 0, VERSION) == "설명"
+    second.close()
+
+
+def test_variant_rotation():
+    assert count_bucket(0) == "first"
+    assert count_bucket(3) == "retry"
+    assert variant_for(0, 3) == 0
+    assert [variant_for(count, 3) for count in range(1, 8)] == [0, 1, 2, 0, 1, 2, 0]
+    assert variant_for(5, 1) == 0
+
+
+def test_replay_stream_chunks():
+    text = "가" * 30
+    chunks = list(replay_stream(text, chunk_size=12))
+    assert [len(c) for c in chunks] == [12, 12, 6]
+    assert "".join(chunks) == text
+
+
+def test_record_stream_caches_only_fully_consumed_streams():
+    saved = []
+    stream = record_stream(iter(["일차식", "은 ", "..."]), saved.append)
+    assert next(stream) == "일차식"
+    stream.close() # 학생이 중간에 떠남
+    assert saved == []
+
+    assert list(record_stream(iter(["일차식", "은 ", "..."]), saved.append)) == ["일차식", "은 ", "..."]
+    assert saved == ["일차식은 ..."]
+
+    list(record_stream(iter([" ", "\n"]), saved.append)) # 빈 응답은 저장하지 않음
+    assert saved == ["일차식은 ..."]
@@ -0,0 +1,89 @@
+import importlib
+
+import pytest
+
+from utils.extraction_cache import ExtractionCache, extraction_key
+
+extract = importlib.import_module("03_extract_and_merge_concepts")
+
+
+def test_key_ignores_sentence_order_but_not_version_or_model():
+    texts = ["일차방정식을 푼다.", "등식의 성질을 이용한다."]
+    key = extraction_key(texts, "v1", "m")
+    assert extraction_key(list(reversed(texts)), "v1", "m") == key
+    assert extraction_key(texts, "v2", "m") != key
+    assert extraction_key(texts, "v1", "other") != key
+    assert extraction_key(texts + ["새 문장"], "v1", "m") != key
+
+
+def test_cache_persists_and_counts(tmp_path):
+    path = str(tmp_path / "data" / "cache.json")
+    cache = ExtractionCache(path, "v1", "m")
+    assert cache.get(["문장"]) is None
+    cache.put(["문장"], [{"name": "일차식", "definition": "d"}], code="9수02-01")
+
+    reloaded = ExtractionCache(path, "v1", "m")
+    assert reloaded.get(["문장"]) == [{"name": "일차식", "definition": "d"}]
+    assert ExtractionCache(path, "v2", "m").get(["문장"]) is None
+    assert (cache.misses, reloaded.hits) == (1, 1)
+
+
+class FakeGraph:
+    """성취기준 조회에는 standards를 돌려주고, 병합 쿼리는 기록만 하는 가짜 그래프"""
+
+    def __init__(self, standards):
+        self.standards = standards
+        self.merged = []
+
+    def run_query(self, query, parameters=None):
+        if "RETURN s.code AS code" in query:
+            return [dict(s) for s in self.standards]
+        self.merged.append((parameters["ach_code"], parameters["name"]))
+        return []
+
+
+@pytest.fixture
+def llm_calls(monkeypatch):
+    calls = []
+
+    def fake_llm(texts):
+        calls.append(list(texts))
+        return [{"name": f"개념{len(calls)}", "definition": "d"}]
+
+    monkeypatch.setattr(extract, "call_extraction_llm", fake_llm)
+    return calls
+
+
+def standard(code, texts):
+    return {"code": code, "domain": "대수", "grade": "1", "semester": "1", "texts": texts}
+
+
+def test_only_changed_standards_call_the_llm(tmp_path, llm_calls, capsys):
+    path = str(tmp_path / "cache.json")
+    graph = FakeGraph([standard("9수01-01", ["소인수분해"]), standard("9수02-01", ["일차식"]), standard("9수03-01", [])])
+
+    extract.link_concepts(graph, workers=2, cache=ExtractionCache(path, "v1", "m"))
+    assert sorted(map(tuple, llm_calls)) == [("소인수분해",), ("일차식",)]
+
+    # 두 번째 실행: 9수02-01의 문장만 바뀜 -> 그 성취기준만 다시 추출, 나머지는 캐시로 쓰기만 다시 함
+    llm_calls.clear()
+    graph.merged.clear()
+    graph.standards[1] = standard("9수02-01", ["일차식", "일차식의 덧셈"])
+    extract.link_concepts(graph, workers=2, cache=ExtractionCache(path, "v1", "m"))
+    assert llm_calls == [["일차식", "일차식의 덧셈"]]
+    assert [code for code, _ in graph.merged] == ["9수01-01", "9수02-01"]
+    assert "캐시 재사용 1개, LLM 분석 1개" in capsys.readouterr().out
+
+    # force는 캐시를 무시하고 모두 다시 추출
+    llm_calls.clear()
+    extract.link_concepts(graph, workers=2, cache=ExtractionCache(path, "v1", "m"), force=True)
+    assert len(llm_calls) == 2
+
+
+def test_empty_extraction_is_not_cached(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract, "call_extraction_llm", lambda texts: [])
+    path = str(tmp_path / "cache.json")
+    graph = FakeGraph([standard("9수01-01", ["소인수분해"])])
+    extract.link_concepts(graph, workers=1, cache=ExtractionCache(path, "v1", "m"))
+    assert ExtractionCache(path, "v1", "m").get(["소인수분해"]) is None
+    assert graph.merged == []
@@ -0,0 +1,47 @@
+import pytest
+
+from utils import debug_log
+from utils.fast_router import fast_route, normalize_input, get_fast_router_stats, reset_fast_router_stats
+
+
+@pytest.fixture(autouse=True)
+def quiet_and_reset(monkeypatch):
+    monkeypatch.setattr(debug_log, "DEBUG_MODE", False)
+    reset_fast_router_stats()
+
+
+def test_normalize_input_strips_noise():
+    assert normalize_input("  일차방정식이   뭐야??ㅋㅋ ") == "일차방정식이 뭐야"
+
+
+@pytest.mark.parametrize("text", ["안녕하세요", "ㅎㅇ!!", "Hello"])
+def test_greeting(text):
+    assert fast_route(text) == ("greeting", "none")
+
+
+def test_bare_number_goes_to_llm_router():
+    # 문제 답변은 WAITING_PROBLEM_ANSWER 모드에서 라우터가 먼저 처리하므로 숫자만으로는 분류하지 않음
+    assert fast_route("4") is None
+    assert fast_route("정답 120cm³", "POST_EXPLANATION") is None
+
+
+def test_ask_problem_topic():
+    assert fast_route("일차식 문제 내줘") == ("ask_problem", "일차식")
+    assert fast_route("다른 문제 내줘") == ("ask_problem", "none")
+
+
+def test_concept_question_needs_math_term():
+    assert fast_route("일차방정식이 뭐야?") == ("tutor_flow", "일차방정식")
+    assert fast_route("너 취미가 뭐야?") is None
+
+
+def test_reexplain_only_after_explanation():
+    assert fast_route("다른 예시로 설명해줘", "POST_EXPLANATION") == ("tutor_flow", "none")
+
+
+def test_stats_count_hits_and_misses():
+    fast_route("안녕")
+    fast_route("오늘 날씨 어때")
+    stats = get_fast_router_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert stats["by_rule"] == {"greeting": 1}
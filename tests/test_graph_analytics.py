@@ -0,0 +1,89 @@
+import json
+import random
+
+from utils.concept_graph import ConceptGraph
+from utils.graph_analytics import (strongly_connected_components, longest_chains, analyze_graph, check_report,
+                                   write_report)
+
+
+def make_graph(names, edges, domains=None):
+    ids = {name: i for i, name in enumerate(names)}
+    return ConceptGraph(names, [""] * len(names), domains or ["대수"] * len(names), [[] for _ in names],
+                        [(ids[a], ids[b]) for a, b in edges])
+
+
+# A -> B <-> C -> D, E는 고립, F는 RELATED_TO로만 연결
+NAMES = ["A", "B", "C", "D", "E", "F"]
+EDGES = [("A", "B"), ("B", "C"), ("C", "B"), ("C", "D")]
+DOMAINS = ["대수", "대수", "대수", "함수", "함수", None]
+
+
+def test_scc_matches_reachability():
+    rng = random.Random(0)
+    for _ in range(20):
+        n = rng.randint(1, 12)
+        pairs = {(rng.randrange(n), rng.randrange(n)) for _ in range(rng.randint(0, 2 * n))}
+        graph = make_graph([str(i) for i in range(n)], [(str(a), str(b)) for a, b in pairs])
+        components = strongly_connected_components(n, graph.succs)
+        assert sorted(v for c in components for v in c) == list(range(n))
+
+        component_of = {v: c for c, members in enumerate(components) for v in members}
+        reach = graph.reachability
+        for a in range(n):
+            for b in range(n):
+                mutual = a == b or (reach.is_prerequisite(a, b) and reach.is_prerequisite(b, a))
+                assert (component_of[a] == component_of[b]) == mutual
+        # 역위상 순서: 간선 a -> b면 b의 요소가 먼저 (또는 같은 요소)
+        for a, b in graph.edges:
+            assert component_of[b] <= component_of[a]
+
+
+def test_longest_chain_collapses_cycles():
+    graph = make_graph(NAMES, EDGES, DOMAINS)
+    components = strongly_connected_components(len(graph), graph.succs)
+    chains = longest_chains(len(graph), graph.succs, components, limit=1)
+    assert [length for length, _ in chains] == [2]
+
+    report = analyze_graph(graph)
+    assert report["max_chain_length"] == 2
+    assert report["longest_chains"][0]["path"] == ["A", "B ↔ C", "D"]
+    assert report["cycles"] == [["B", "C"]]
+
+
+def test_self_loop_is_a_cycle():
+    report = analyze_graph(make_graph(["A", "B"], [("A", "A"), ("A", "B")]))
+    assert report["cycles"] == [["A"]]
+    assert report["max_chain_length"] == 1
+
+
+def test_coverage_and_isolated_concepts():
+    graph = make_graph(NAMES, EDGES, DOMAINS)
+    report = analyze_graph(graph, related_pairs=[("F", "A"), ("A", "F"), ("E", "E"), ("F", "없는 개념")])
+    assert report["concepts"] == 6
+    assert report["prerequisite_edges"] == 4
+    assert report["related_edges"] == 1
+    assert report["roots"] == 1
+    assert report["coverage"] == {"with_prerequisite": 4, "with_related": 2, "isolated": 1,
+                                  "isolated_ratio": round(1 / 6, 4)}
+    assert report["domains"]["함수"]["isolated"] == ["E"]
+    assert report["domains"]["기타"] == {"total": 1, "with_prerequisite": 0, "with_related": 1, "isolated": []}
+
+
+def test_check_report_thresholds(tmp_path):
+    report = analyze_graph(make_graph(NAMES, EDGES, DOMAINS))
+    assert check_report(report, max_cycles=1, max_isolated_ratio=0.5, max_chain_length=2) == []
+
+    failures = check_report(report, max_cycles=0, max_isolated_ratio=0.1, max_chain_length=1)
+    assert len(failures) == 3
+    assert failures[0].startswith("순환 참조 1개")
+
+    path = tmp_path / "out" / "graph_report.json"
+    write_report(report, str(path))
+    assert json.loads(path.read_text(encoding="utf-8"))["cycles"] == [["B", "C"]]
+
+
+def test_empty_graph():
+    report = analyze_graph(make_graph([], []))
+    assert report["max_chain_length"] == 0
+    assert report["coverage"]["isolated_ratio"] == 0.0
+    assert check_report(report, max_isolated_ratio=0.0, max_chain_length=0) == []
@@ -0,0 +1,84 @@
+import socket
+import urllib.request
+
+import pytest
+
+from utils import metrics
+from utils.metrics import Histogram, MetricsRegistry, TurnMetrics, timed_stream
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def server_slot(monkeypatch):
+    """모듈 전역 서버를 테스트마다 비우고, 끝나면 종료"""
+    monkeypatch.setattr(metrics, "_server", None)
+    monkeypatch.delenv("TUTOR_METRICS_PORT", raising=False)
+    monkeypatch.delenv("TUTOR_METRICS_HOST", raising=False)
+    yield
+    if metrics._server is not None:
+        metrics._server.shutdown()
+        metrics._server.server_close()
+
+
+def test_metrics_server_is_off_without_port(server_slot):
+    assert metrics.start_metrics_server() is None
+
+
+def test_metrics_server_binds_to_localhost_by_default(server_slot, monkeypatch):
+    monkeypatch.setenv("TUTOR_METRICS_PORT", str(free_port()))
+    server = metrics.start_metrics_server()
+    host, port = server.server_address
+    assert host == "127.0.0.1"
+    with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+        assert response.status == 200
+    assert metrics.start_metrics_server() is server # 한 번만 시작
+
+
+def test_metrics_host_override(server_slot, monkeypatch):
+    monkeypatch.setenv("TUTOR_METRICS_HOST", "0.0.0.0")
+    server = metrics.start_metrics_server(port=free_port())
+    assert server.server_address[0] == "0.0.0.0"
+
+
+def test_histogram_quantiles():
+    hist = Histogram(buckets=(10, 100))
+    assert hist.quantile(0.5) is None
+    for value in (5, 50, 50, 500):
+        hist.observe(value)
+    assert (hist.quantile(0.25), hist.quantile(0.5), hist.quantile(1.0)) == (10, 100, float("inf"))
+
+
+def test_prometheus_text():
+    registry = MetricsRegistry()
+    registry.observe("tutor_stage_ms", 30, stage="router")
+    registry.set_gauge("tutor_graph_in_flight_queries", 2)
+    text = registry.to_prometheus()
+    assert 'tutor_stage_ms_bucket{stage="router",le="50"} 1' in text
+    assert 'tutor_stage_ms_count{stage="router"} 1' in text
+    assert "# TYPE tutor_graph_in_flight_queries gauge\ntutor_graph_in_flight_queries 2" in text
+
+
+def test_turn_summary_waits_for_response_stream(tmp_path):
+    registry = MetricsRegistry(jsonl_path=str(tmp_path / "turns.jsonl"))
+    turn = TurnMetrics(registry)
+    with turn.stage("router"):
+        pass
+    stream = turn.wrap_response_stream(iter(["가", "나"]))
+    summary = turn.finish(mode="IDLE")
+    assert not (tmp_path / "turns.jsonl").exists() # 스트림이 끝나야 기록
+    assert list(stream) == ["가", "나"]
+    assert summary["ttft_ms"] is not None and summary["stream_ms"] is not None
+    assert (tmp_path / "turns.jsonl").read_text(encoding="utf-8").count("\n") == 1
+
+
+def test_timed_stream_reports_on_early_close():
+    done = []
+    stream = timed_stream("test", iter(["a", "b"]), on_done=lambda ttft, total: done.append(ttft), registry=MetricsRegistry())
+    next(stream)
+    stream.close()
+    assert len(done) == 1 and done[0] is not None
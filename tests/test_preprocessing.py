@@ -0,0 +1,115 @@
+import os
+import json
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils.columnar import ColumnarCorpus
+
+pre = importlib.import_module("01_preprocessing_data")
+
+STANDARD = "[9수01-01] 소인수분해의 뜻을 알고, 자연수를 소인수분해 할 수 있다."
+
+
+def raw_file(text, standard=STANDARD):
+    return {
+        "source_data_info": {"2022_achievement_standard": [standard]},
+        "raw_data_info": {"grade": "1", "semester": "1"},
+        "learning_data_info": {"text_description": text},
+    }
+
+
+def write(path, content):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content if isinstance(content, str) else json.dumps(content, ensure_ascii=False), encoding="utf-8")
+
+
+def bump_mtime(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """파싱한 파일 목록 (프로세스 풀 대신 스레드 풀로 실행해 호출을 기록)"""
+    calls = []
+    process_file = pre.process_file
+
+    def recording(task):
+        calls.append(task[0])
+        return process_file(task)
+
+    monkeypatch.setattr(pre, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(pre, "process_file", recording)
+    return calls
+
+
+def texts(output):
+    with open(output, encoding="utf-8") as f:
+        return [json.loads(line)["text_description"] for line in f]
+
+
+def test_incremental_runs(tmp_path, parsed):
+    raw = tmp_path / "raw"
+    output = str(tmp_path / "out" / "processed_data.jsonl")
+    write(raw / "a.json", raw_file("가 문장"))
+    write(raw / "sub" / "b.json", raw_file("나 문장"))
+    write(raw / "old.json", raw_file("옛 기준", standard="[9수05-01] 없는 기준"))
+    write(raw / "bad.json", {"source_data_info": {"2022_achievement_standard": [STANDARD]}}) # raw_data_info 없음
+    write(raw / "notes.txt", "무시")
+
+    pre.preprocess(str(raw), output, workers=2)
+    assert sorted(parsed) == ["a.json", "bad.json", "old.json", os.path.join("sub", "b.json")]
+    assert texts(output) == ["가 문장", "나 문장"]
+    manifest = json.loads((tmp_path / "out" / "processed_data.manifest.json").read_text(encoding="utf-8"))
+    assert manifest["files"]["bad.json"]["error"].startswith("KeyError")
+    assert manifest["files"]["old.json"]["record"] is None
+
+    # 변경 없음: 실패했던 파일만 다시 시도
+    parsed.clear()
+    pre.preprocess(str(raw), output, workers=2)
+    assert parsed == ["bad.json"]
+
+    # b는 내용 변경, a는 touch만 (해시가 같아 이전 결과 재사용), bad는 수정됨
+    parsed.clear()
+    write(raw / "sub" / "b.json", raw_file("나 문장 (수정)"))
+    bump_mtime(raw / "sub" / "b.json")
+    bump_mtime(raw / "a.json")
+    write(raw / "bad.json", raw_file("고친 문장"))
+    bump_mtime(raw / "bad.json")
+    pre.preprocess(str(raw), output, workers=2)
+    assert sorted(parsed) == ["a.json", "bad.json", os.path.join("sub", "b.json")]
+    assert texts(output) == ["가 문장", "고친 문장", "나 문장 (수정)"]
+    with ColumnarCorpus(str(tmp_path / "out" / "processed_data.columnar")) as corpus:
+        assert corpus.texts("9수01-01") == ["가 문장", "고친 문장", "나 문장 (수정)"]
+
+    # 삭제된 파일은 결과와 매니페스트에서 빠짐, force는 모두 다시 파싱
+    parsed.clear()
+    os.remove(raw / "a.json")
+    pre.preprocess(str(raw), output, workers=2, force=True)
+    assert len(parsed) == 3
+    assert texts(output) == ["고친 문장", "나 문장 (수정)"]
+
+
+def test_touched_file_reuses_record_by_hash(tmp_path):
+    path = tmp_path / "a.json"
+    write(path, raw_file("가 문장"))
+    _, first = pre.process_file(("a.json", str(path), None))
+    assert "reused" not in first
+
+    _, second = pre.process_file(("a.json", str(path), dict(first, record={"marker": True})))
+    assert second["reused"] is True
+    assert second["record"] == {"marker": True}
+
+    _, after_error = pre.process_file(("a.json", str(path), dict(first, error="KeyError: x")))
+    assert "reused" not in after_error
+    assert after_error["record"]["text_description"] == "가 문장"
+
+
+def test_malformed_json_is_reported_not_raised(tmp_path):
+    path = tmp_path / "broken.json"
+    write(path, "{ 깨진 json")
+    _, entry = pre.process_file(("broken.json", str(path), None))
+    assert entry["record"] is None
+    assert entry["error"].startswith("JSONDecodeError")
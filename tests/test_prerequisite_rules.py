@@ -0,0 +1,82 @@
+import importlib
+import textwrap
+from collections import Counter
+
+import pytest
+
+rules = importlib.import_module("04_create_prerequisite_links")
+
+
+def write_source(tmp_path, source):
+    path = tmp_path / "rules.py"
+    path.write_text(textwrap.dedent(source), encoding="utf-8")
+    return str(path)
+
+
+def test_shipped_rules_have_no_duplicate_keys():
+    assert rules.find_duplicate_rule_keys(rules.__file__) == []
+
+
+def test_duplicate_prerequisite_key_is_reported(tmp_path):
+    # 예전 "수선" 규칙처럼 같은 키가 두 번 나오면 앞의 값이 사라짐
+    path = write_source(tmp_path, """
+        PREREQUISITE_RULES = {
+            "수선": ["직선"],
+            "교점": ["직선"],
+            "수선": ["평행선"],
+        }
+        OTHER = {"수선": 1, "수선": 2}
+    """)
+    assert rules.find_duplicate_rule_keys(path) == [("PREREQUISITE_RULES", "수선", [3, 5])]
+
+
+def test_duplicate_related_pair_and_annotated_rules(tmp_path):
+    path = write_source(tmp_path, """
+        BASE = {}
+        RELATED_CONCEPTS: dict = {
+            ("동위각", "엇각"): "평행선의 성질",
+            **BASE,
+            ("동위각", "엇각"): "평행선",
+            ("정비례", "반비례"): "함수",
+        }
+    """)
+    assert rules.find_duplicate_rule_keys(path) == [("RELATED_CONCEPTS", ("동위각", "엇각"), [4, 6])]
+
+
+def test_resolve_rules_reports_all_missing_names():
+    pairs = [
+        ({"prereq": "정수", "concept": "유리수"}, ("정수", "유리수")),
+        ({"prereq": "소수", "concept": "소인수분해"}, ("소수", "소인수분해")),
+        ({"prereq": "약수", "concept": "소인수분해"}, ("약수", "소인수분해")),
+        ({"prereq": "원", "concept": "현"}, ("원", "현")),
+    ]
+    rows, unresolved = rules.resolve_rules(pairs, {"정수", "유리수", "약수", "원"})
+    assert rows == [{"prereq": "정수", "concept": "유리수"}]
+    assert unresolved == Counter({"소인수분해": 2, "소수": 1, "현": 1})
+
+
+def test_report_unresolved_lists_most_used_first(capsys):
+    rules.report_unresolved(Counter({"현": 1, "소인수분해": 2}), skipped=3)
+    out = capsys.readouterr().out
+    assert "개념 2개 때문에 규칙 3개를 건너뜁니다" in out
+    assert out.index("소인수분해 (규칙 2개)") < out.index("현 (규칙 1개)")
+
+    rules.report_unresolved(Counter(), skipped=0)
+    assert capsys.readouterr().out == ""
+
+
+class FakeGraph:
+    def __init__(self, created):
+        self.created = created
+        self.calls = []
+
+    def write_with_counters(self, query, params):
+        self.calls.append(params["rows"])
+        return [{"linked": len(params["rows"])}], {"relationships_created": self.created}
+
+
+@pytest.mark.parametrize("rows, created, expected", [([], 0, (0, 0)), ([{"c1": "a"}] * 3, 1, (1, 2))])
+def test_apply_rules_counts(rows, created, expected):
+    graph = FakeGraph(created)
+    assert rules.apply_rules(graph, rules.RELATED_QUERY, rows) == expected
+    assert graph.calls == ([rows] if rows else [])
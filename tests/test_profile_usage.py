@@ -0,0 +1,65 @@
+import json
+import importlib
+
+import pytest
+
+from utils import debug_log, student_profile
+from utils.explanation_cache import ExplanationCache, PrebuiltExplanations
+
+
+@pytest.fixture
+def tutor(monkeypatch, tmp_path):
+    # 가짜 백엔드로 튜터를 불러오고 프로필/캐시/스냅샷은 임시 폴더에 씀
+    monkeypatch.setenv("TUTOR_BACKEND", "replay_backends:create_backends")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("06_tutor_rag")
+    replay_backends = importlib.import_module("replay_backends")
+    for name in ("first_token_ms", "token_ms", "graph_ms"):
+        monkeypatch.setattr(replay_backends.CONFIG, name, 0)
+    monkeypatch.setattr(replay_backends.CONFIG, "replies", {})
+    monkeypatch.setattr(debug_log, "DEBUG_MODE", False)
+    monkeypatch.setattr(student_profile, "PROFILE_FILE", str(tmp_path / "user_profile.json"))
+    monkeypatch.setattr(module, "GRAPH_SNAPSHOT_FILE", str(tmp_path / "snapshot.json"))
+    monkeypatch.setattr(module, "explanation_cache", ExplanationCache(str(tmp_path / "cache.sqlite3")))
+    monkeypatch.setattr(module, "prebuilt_explanations", PrebuiltExplanations(str(tmp_path / "variants.json")))
+    return module
+
+
+def saved_calls():
+    with open(student_profile.PROFILE_FILE, encoding="utf-8") as f:
+        return json.load(f)["usage"]["calls"]
+
+
+def test_stream_usage_is_saved_when_the_stream_ends(tutor):
+    result = tutor.process_turn("일차방정식이 뭐야?", tutor.get_initial_state())
+    assert result["explanation_stream"] is not None
+    before = saved_calls()
+
+    assert "".join(result["explanation_stream"])
+    assert saved_calls() == result["new_state"]["usage"]["calls"] > before
+
+
+def test_closed_stream_still_saves(tutor):
+    result = tutor.process_turn("일차방정식이 뭐야?", tutor.get_initial_state())
+    stream = result["explanation_stream"]
+    next(stream)
+    stream.close() # 화면 출력 중 오류로 스트림을 버림
+    assert saved_calls() == result["new_state"]["usage"]["calls"]
+
+
+def test_turn_error_keeps_lifetime_usage(tutor, monkeypatch):
+    state = tutor.get_initial_state()
+    result = tutor.process_turn("일차방정식이 뭐야?", state)
+    "".join(result["explanation_stream"])
+    calls = saved_calls()
+
+    def broken_router(*args, **kwargs):
+        raise RuntimeError("라우터 오류")
+
+    monkeypatch.setattr(tutor, "call_master_router", broken_router)
+    failed = tutor.process_turn("다른 질문", result["new_state"])
+    assert "심각한 오류" in failed["response_text"]
+    assert failed["new_state"]["mode"] == "IDLE"
+    assert failed["new_state"]["usage"]["calls"] == calls
+    assert saved_calls() == calls
@@ -0,0 +1,92 @@
+import pytest
+
+from utils import rate_limit
+from utils.rate_limit import TokenBucket, retry_with_backoff
+
+
+class FakeClock:
+    """time.monotonic/time.sleep 대체: sleep하면 시계만 앞으로 감"""
+
+    def __init__(self):
+        self.now = 100.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, "sleep", clock.sleep)
+    return clock
+
+
+def test_invalid_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(0)
+
+
+def test_per_minute_defaults():
+    bucket = TokenBucket.per_minute(120)
+    assert bucket.rate == 2
+    assert bucket.capacity == 2
+    assert TokenBucket.per_minute(30).capacity == 1
+
+
+def test_burst_then_wait(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+    assert bucket.waited_seconds == pytest.approx(0.5)
+
+    clock.now += 10 # 오래 쉬어도 burst개까지만 쌓임
+    for _ in range(3):
+        bucket.acquire()
+    bucket.acquire()
+    assert len(clock.sleeps) == 2
+
+
+def test_retry_then_success(clock):
+    attempts = []
+    retried = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise TimeoutError("잠시 후 다시")
+        return "ok"
+
+    result = retry_with_backoff(flaky, retries=3, base_delay=1.0, on_retry=lambda a, e, w: retried.append(a))
+    assert result == "ok"
+    assert retried == [1, 2]
+    assert 0.5 <= clock.sleeps[0] <= 1.0
+    assert 1.0 <= clock.sleeps[1] <= 2.0
+
+
+def test_retry_gives_up_and_reraises(clock):
+    def always_fails():
+        raise TimeoutError("계속 실패")
+
+    with pytest.raises(TimeoutError):
+        retry_with_backoff(always_fails, retries=2, base_delay=10, max_delay=4)
+    assert len(clock.sleeps) == 2
+    assert all(s <= 4 for s in clock.sleeps)
+
+
+def test_non_retryable_error_is_not_retried(clock):
+    def bad_request():
+        raise ValueError("잘못된 요청")
+
+    with pytest.raises(ValueError):
+        retry_with_backoff(bad_request, retry_on=(TimeoutError,))
+    assert clock.sleeps == []
@@ -0,0 +1,70 @@
+import pytest
+
+from utils.reachability import ReachabilityIndex, iter_bits, mask_of, compare_with_rows
+
+# 0 -> 1 -> 2 -> 3 <-> 4 (3과 4는 서로 선수 개념인 순환), 5는 고립
+PREDS = [[], [0], [1], [2, 4], [3], []]
+IDS = {"A": 0, "B": 1, "C": 2, "D": 3, "E": 4, "F": 5}
+
+
+@pytest.fixture
+def index():
+    return ReachabilityIndex.build(PREDS)
+
+
+def naive_distances(preds, i):
+    """BFS로 구한 {선수 개념: 최단 거리} (인덱스와 대조용)"""
+    result, frontier, d = {}, [i], 0
+    while frontier:
+        d += 1
+        nxt = []
+        for v in frontier:
+            for p in preds[v]:
+                if p not in result:
+                    result[p] = d
+                    nxt.append(p)
+        frontier = nxt
+    return result
+
+
+def test_iter_bits_and_mask():
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert mask_of(IDS, ["A", "C", "없는 개념"]) == 0b101
+
+
+def test_distances_match_bfs(index):
+    for i in range(len(PREDS)):
+        assert index.distances(i) == naive_distances(PREDS, i)
+
+
+def test_depth_and_prerequisite_queries(index):
+    assert list(iter_bits(index.within_depth(3, 2))) == [1, 2, 3, 4] # 3 -> 4 -> 3 순환
+    assert index.within_depth(3, 0) == 0
+    assert index.within_depth(5, 3) == 0
+    assert index.distance(0, 3) == 3
+    assert index.distance(3, 0) is None
+    assert index.is_prerequisite(0, 4)
+    assert not index.is_prerequisite(4, 0)
+    assert index.distances(4, depth=2) == {3: 1, 2: 2, 4: 2}
+    assert index.max_depth == 4 # E에서 A까지
+
+
+def test_cycle_members_are_their_own_prerequisites(index):
+    assert index.in_cycle() == [3, 4]
+
+
+def test_serialization_round_trip(index):
+    loaded = ReachabilityIndex.from_list(index.to_list())
+    assert loaded.within == index.within
+
+
+def test_compare_with_rows(index):
+    rows = [{"target": name, "prereq": p_name, "dist": d}
+            for name, i in IDS.items()
+            for p_name, p in IDS.items()
+            for d in [naive_distances(PREDS, i).get(p)] if d is not None]
+    assert compare_with_rows(index, IDS, rows) == []
+
+    rows = [r for r in rows if not (r["target"] == "C" and r["prereq"] == "A")]
+    rows.append({"target": "B", "prereq": "A", "dist": 2})
+    assert compare_with_rows(index, IDS, rows) == [("B", "A", 2, 1), ("C", "A", None, 2)]
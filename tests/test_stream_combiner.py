@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from utils.stream_combiner import StreamCombiner, normalize_whitespace, normalized_tail
+
+SUFFIX = "\n\n혹시 더 궁금한 점이 있나요?"
+
+
+def naive_combine(chunks, prefix, suffix):
+    """본문 전체를 이어 붙여 비교하는 단순 구현 (대조용)"""
+    body = "".join(chunks)
+    out = prefix + body
+    if suffix and not normalize_whitespace(body).endswith(normalize_whitespace(suffix)):
+        out += suffix
+    return out
+
+
+def test_prefix_stream_suffix_order():
+    combiner = StreamCombiner(iter(["일차방정식은 ", "등식입니다."]), prefix="[설명] ", suffix=SUFFIX)
+    assert list(combiner) == ["[설명] ", "일차방정식은 ", "등식입니다.", SUFFIX]
+    assert combiner.text == "일차방정식은 등식입니다."
+    assert combiner.suffix_appended is True
+
+
+def test_suffix_not_repeated_when_stream_ends_with_it():
+    calls = []
+    chunks = ["설명입니다.", "\n 혹시 더 궁금한", "  점이 있나요? "]
+    combiner = StreamCombiner(iter(chunks), suffix=SUFFIX, on_suffix=calls.append)
+    assert "".join(combiner) == "".join(chunks)
+    assert combiner.suffix_appended is False
+    assert calls == [False]
+
+
+def test_no_stream_and_no_suffix():
+    assert list(StreamCombiner(None, prefix="안녕하세요")) == ["안녕하세요"]
+    combiner = StreamCombiner(iter(["본문"]))
+    assert list(combiner) == ["본문"]
+    assert combiner.suffix_appended is None
+
+
+def test_normalized_tail_reads_only_the_end():
+    chunks = ["앞부분 " * 100, "끝  부분\n", " 입니다"]
+    tail = normalized_tail(chunks, len("부분 입니다"))
+    assert normalize_whitespace("".join(chunks)).endswith(tail)
+    assert tail == "끝 부분 입니다"
+    assert normalized_tail([], 5) == ""
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_naive_implementation(seed):
+    rng = random.Random(seed)
+    words = ["혹시", "더", "궁금한", "점이", "있나요?", "설명", " ", "\n", "  "]
+    chunks = ["".join(rng.choice(words) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 8))]
+    if rng.random() < 0.5:
+        chunks.append(rng.choice(["", " "]) + "혹시 더  궁금한\n점이 있나요?" + rng.choice(["", "\n"]))
+    assert "".join(StreamCombiner(iter(chunks), prefix="P", suffix=SUFFIX)) == naive_combine(chunks, "P", SUFFIX)
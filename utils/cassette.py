@@ -0,0 +1,304 @@
+import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
+import threading
+from collections import defaultdict, deque
+import httpx
+
+# LLM / Neo4j 호출 녹화·재생 (cassette)
+#   live   : 그대로 실제 서비스 호출 (기본)
+#   record : 실제 서비스를 호출하면서 요청/응답을 카세트 파일(JSONL)에 기록
+#            - LLM: OpenAI HTTP 요청 본문, 응답 헤더, 스트림 조각과 각 조각의 도착 시각
+#            - Neo4j: Cypher 쿼리, 파라미터, 결과 행, 소요 시간
+#   replay : 네트워크 없이 카세트에서 응답을 돌려줌 (녹화된 타이밍 그대로 또는 배속/즉시)
+# LLM은 httpx 전송 계층(ChatOpenAI의 http_client)에서 가로채므로 invoke/ainvoke/stream/구조화 출력이
+# 모두 실제 ChatOpenAI 코드 경로를 그대로 탑니다.
+#
+# 환경 변수
+#   TUTOR_CASSETTE_MODE  : live | record | replay
+#   TUTOR_CASSETTE       : 카세트 파일 경로 (기본 data/cassettes/tutor.jsonl)
+#   TUTOR_CASSETTE_SPEED : replay 타이밍 배율 (1 = 녹화된 속도, 0 = 대기 없이, 기본 1)
+
+MODES = ("live", "record", "replay")
+DEFAULT_CASSETTE_FILE = os.path.join("data", "cassettes", "tutor.jsonl")
+
+
+class CassetteMissError(KeyError):
+    """replay 모드에서 카세트에 없는 요청"""
+
+
+def _digest(*parts) -> str:
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def _normalize_body(content: bytes):
+    """요청 본문 (JSON이면 키 순서를 정규화한 객체, 아니면 문자열)"""
+    if not content:
+        return None
+    try:
+        return json.loads(content)
+    except ValueError:
+        return content.decode("utf-8", errors="replace")
+
+
+class Cassette:
+    """JSONL 카세트 파일 (같은 키가 여러 번 녹화되었으면 녹화 순서대로 재생, 마지막 것은 반복)"""
+
+    def __init__(self, path: str = DEFAULT_CASSETTE_FILE, mode: str = "record", speed: float = 1.0):
+        if mode not in MODES:
+            raise ValueError(f"알 수 없는 카세트 모드: {mode} (가능: {', '.join(MODES)})")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self._entries = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self._truncated = False
+        if mode == "replay":
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"카세트 파일이 없습니다: {self.path} (먼저 TUTOR_CASSETTE_MODE=record로 녹화)")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries[(entry["kind"], entry["key"])].append(entry)
+        print(f"📼 카세트 로드: {self.path} ({sum(len(q) for q in self._entries.values())}개 응답)")
+
+    def record(self, entry: dict):
+        """녹화 세션의 첫 기록에서 기존 카세트를 비우고 새로 씁니다. (이전 녹화가 재생 큐 앞에 남지 않도록)"""
+        dirname = os.path.dirname(self.path)
+        with self._lock:
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            file_mode = "a" if self._truncated else "w"
+            self._truncated = True
+            with open(self.path, file_mode, encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self.recorded += 1
+
+    def take(self, kind: str, key: str) -> dict:
+        with self._lock:
+            queue = self._entries.get((kind, key))
+            if not queue:
+                raise CassetteMissError(f"카세트에 없는 {kind} 요청입니다 (key={key}). 다시 녹화하세요.")
+            entry = queue.popleft() if len(queue) > 1 else queue[0]
+            self.replayed += 1
+            return entry
+
+    def delay(self, ms: float) -> float:
+        """replay에서 기다릴 시간(초)"""
+        return max(ms, 0) * self.speed / 1000
+
+
+# ============ LLM (httpx 전송 계층) ============
+def _request_key(request: httpx.Request) -> tuple:
+    body = _normalize_body(request.content)
+    return _digest(request.method, request.url.path, body), body
+
+
+def _response_entry(key, request, body, response, ttfb_ms, chunks, complete) -> dict:
+    return {
+        "kind": "http", "key": key,
+        "request": {"method": request.method, "url": str(request.url), "body": body},
+        "status": response.status_code,
+        "headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in response.headers.raw],
+        "ttfb_ms": round(ttfb_ms, 3),
+        "chunks": [[round(offset, 3), base64.b64encode(data).decode("ascii")] for offset, data in chunks],
+        "complete": complete, # False: 클라이언트가 끝까지 읽지 않고 닫음 (SSE는 [DONE]에서 멈추므로 보통 정상)
+    }
+
+
+def _replay_headers(entry: dict) -> list:
+    return [(k, v) for k, v in entry["headers"]]
+
+
+class _RecordingStream(httpx.SyncByteStream):
+    def __init__(self, inner, started: float, on_complete):
+        self._inner = inner
+        self._started = started
+        self._on_complete = on_complete
+        self._chunks = []
+        self._complete = False
+        self._closed = False
+
+    def __iter__(self):
+        for data in self._inner:
+            self._chunks.append(((time.perf_counter() - self._started) * 1000, data))
+            yield data
+        self._complete = True
+
+    def close(self):
+        self._inner.close()
+        if not self._closed:
+            self._closed = True
+            self._on_complete(self._chunks, self._complete)
+
+
+class _AsyncRecordingStream(httpx.AsyncByteStream):
+    def __init__(self, inner, started: float, on_complete):
+        self._inner = inner
+        self._started = started
+        self._on_complete = on_complete
+        self._chunks = []
+        self._complete = False
+        self._closed = False
+
+    async def __aiter__(self):
+        async for data in self._inner:
+            self._chunks.append(((time.perf_counter() - self._started) * 1000, data))
+            yield data
+        self._complete = True
+
+    async def aclose(self):
+        await self._inner.aclose()
+        if not self._closed:
+            self._closed = True
+            self._on_complete(self._chunks, self._complete)
+
+
+class _ReplayStream(httpx.SyncByteStream):
+    def __init__(self, cassette: Cassette, entry: dict):
+        self._cassette = cassette
+        self._entry = entry
+
+    def __iter__(self):
+        previous = self._entry["ttfb_ms"]
+        for offset, data in self._entry["chunks"]:
+            time.sleep(self._cassette.delay(offset - previous))
+            previous = offset
+            yield base64.b64decode(data)
+
+
+class _AsyncReplayStream(httpx.AsyncByteStream):
+    def __init__(self, cassette: Cassette, entry: dict):
+        self._cassette = cassette
+        self._entry = entry
+
+    async def __aiter__(self):
+        previous = self._entry["ttfb_ms"]
+        for offset, data in self._entry["chunks"]:
+            await asyncio.sleep(self._cassette.delay(offset - previous))
+            previous = offset
+            yield base64.b64decode(data)
+
+
+class CassetteTransport(httpx.BaseTransport):
+    """record: inner로 보내고 기록 / replay: 카세트에서 응답"""
+
+    def __init__(self, cassette: Cassette, inner: httpx.BaseTransport = None):
+        self.cassette = cassette
+        self.inner = inner or (httpx.HTTPTransport() if cassette.mode != "replay" else None)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        key, body = _request_key(request)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("http", key)
+            time.sleep(self.cassette.delay(entry["ttfb_ms"]))
+            return httpx.Response(entry["status"], headers=_replay_headers(entry),
+                                  stream=_ReplayStream(self.cassette, entry), request=request)
+
+        started = time.perf_counter()
+        response = self.inner.handle_request(request)
+        if self.cassette.mode == "live":
+            return response
+        ttfb_ms = (time.perf_counter() - started) * 1000
+        on_complete = lambda chunks, complete: self.cassette.record(
+            _response_entry(key, request, body, response, ttfb_ms, chunks, complete))
+        response.stream = _RecordingStream(response.stream, started, on_complete)
+        return response
+
+    def close(self):
+        if self.inner is not None:
+            self.inner.close()
+
+
+class AsyncCassetteTransport(httpx.AsyncBaseTransport):
+    """CassetteTransport의 비동기 버전 (ainvoke용)"""
+
+    def __init__(self, cassette: Cassette, inner: httpx.AsyncBaseTransport = None):
+        self.cassette = cassette
+        self.inner = inner or (httpx.AsyncHTTPTransport() if cassette.mode != "replay" else None)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        key, body = _request_key(request)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("http", key)
+            await asyncio.sleep(self.cassette.delay(entry["ttfb_ms"]))
+            return httpx.Response(entry["status"], headers=_replay_headers(entry),
+                                  stream=_AsyncReplayStream(self.cassette, entry), request=request)
+
+        started = time.perf_counter()
+        response = await self.inner.handle_async_request(request)
+        if self.cassette.mode == "live":
+            return response
+        ttfb_ms = (time.perf_counter() - started) * 1000
+        on_complete = lambda chunks, complete: self.cassette.record(
+            _response_entry(key, request, body, response, ttfb_ms, chunks, complete))
+        response.stream = _AsyncRecordingStream(response.stream, started, on_complete)
+        return response
+
+    async def aclose(self):
+        if self.inner is not None:
+            await self.inner.aclose()
+
+
+def http_clients(cassette: Cassette) -> dict:
+    """ChatOpenAI(**http_clients(cassette)) 에 넘길 동기/비동기 httpx 클라이언트"""
+    return {
+        "http_client": httpx.Client(transport=CassetteTransport(cassette)),
+        "http_async_client": httpx.AsyncClient(transport=AsyncCassetteTransport(cassette)),
+    }
+
+
+# ============ Neo4j ============
+class CassetteGraph:
+    """graph.query(query, params)를 녹화/재생하는 래퍼 (replay에서는 inner 없이 동작)"""
+
+    def __init__(self, inner, cassette: Cassette):
+        self.inner = inner
+        self.cassette = cassette
+
+    def query(self, query: str, params: dict = None) -> list:
+        params = params or {}
+        key = _digest(" ".join(query.split()), params)
+        if self.cassette.mode == "replay":
+            entry = self.cassette.take("cypher", key)
+            time.sleep(self.cassette.delay(entry["duration_ms"]))
+            return entry["rows"]
+
+        started = time.perf_counter()
+        rows = self.inner.query(query, params=params)
+        if self.cassette.mode == "record":
+            self.cassette.record({
+                "kind": "cypher", "key": key, "query": query, "params": params,
+                "rows": rows, "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            })
+        return rows
+
+    def __getattr__(self, name):
+        # query 외의 속성(schema 등)은 실제 그래프로 (replay에서는 사용 불가)
+        if self.inner is None:
+            raise AttributeError(f"replay 모드의 그래프는 '{name}'을(를) 지원하지 않습니다.")
+        return getattr(self.inner, name)
+
+
+def cassette_from_env():
+    """환경 변수로 카세트를 만듭니다. (live 모드면 None)"""
+    mode = os.getenv("TUTOR_CASSETTE_MODE", "live").lower()
+    if mode == "live":
+        return None
+    path = os.getenv("TUTOR_CASSETTE", DEFAULT_CASSETTE_FILE)
+    speed = float(os.getenv("TUTOR_CASSETTE_SPEED", "1"))
+    cassette = Cassette(path, mode, speed)
+    print(f"📼 카세트 모드: {mode} ({path}{', 속도 x' + str(speed) if mode == 'replay' else ''})")
+    return cassette
@@ -0,0 +1,135 @@
+import os
+import json
+import mmap
+import shutil
+from array import array
+
+# 전처리 결과의 열(column) 형식 저장본 (processed_data.jsonl과 같은 내용, 표준 라이브러리만 사용)
+# 폴더 구성
+#   strings.bin : 중복을 없앤 문자열들을 이어 붙인 UTF-8 바이트
+#   offsets.bin : 문자열 i의 바이트 범위 = offsets[i]:offsets[i+1] (uint64)
+#   <열>.bin    : 행마다 문자열 번호 (uint32), 행은 성취기준 코드 순으로 정렬 (같은 코드 안에서는 원래 순서)
+#   index.json  : 행 수, 열 목록, 성취기준 코드 -> [시작 행, 끝 행)
+# 읽을 때는 파일을 mmap으로 열어 필요한 문자열만 디코딩하므로, 성취기준 하나의 문장을 꺼낼 때 JSON 파싱이 없습니다.
+
+COLUMNAR_VERSION = 1
+COLUMNS = ("source_file", "grade", "semester", "achievement_code", "achievement_desc", "text_description")
+KEY_COLUMN = "achievement_code"
+COLUMNAR_DIR = os.path.join("data", "processed_data.columnar")
+
+
+def write_columnar(records: list, path: str = COLUMNAR_DIR) -> dict:
+    """records(dict 리스트)를 코드 순으로 정렬해 저장하고 index를 반환합니다. (임시 폴더에 쓴 뒤 교체)"""
+    rows = sorted(records, key=lambda r: r[KEY_COLUMN]) # 안정 정렬: 코드 안에서는 입력 순서 유지
+    string_ids = {}
+    heap = bytearray()
+    offsets = array("Q", [0])
+    columns = {name: array("I") for name in COLUMNS}
+
+    for row in rows:
+        for name in COLUMNS:
+            value = row.get(name) or ""
+            sid = string_ids.get(value)
+            if sid is None:
+                sid = string_ids[value] = len(string_ids)
+                heap += value.encode("utf-8")
+                offsets.append(len(heap))
+            columns[name].append(sid)
+
+    standards = {}
+    for i, row in enumerate(rows):
+        start_end = standards.setdefault(row[KEY_COLUMN], [i, i])
+        start_end[1] = i + 1
+    index = {"version": COLUMNAR_VERSION, "rows": len(rows), "columns": list(COLUMNS),
+             "strings": len(string_ids), "standards": standards}
+
+    tmp_path = path.rstrip(os.sep) + ".tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+    with open(os.path.join(tmp_path, "strings.bin"), "wb") as f:
+        f.write(heap)
+    with open(os.path.join(tmp_path, "offsets.bin"), "wb") as f:
+        offsets.tofile(f)
+    for name, ids in columns.items():
+        with open(os.path.join(tmp_path, f"{name}.bin"), "wb") as f:
+            ids.tofile(f)
+    with open(os.path.join(tmp_path, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return index
+
+
+def _map(path: str, typecode: str):
+    """파일을 mmap으로 열어 (mmap, 정수 배열 보기)를 반환합니다. (빈 파일은 빈 배열)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None, (array(typecode) if typecode else memoryview(b""))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mm, (memoryview(mm).cast(typecode) if typecode else memoryview(mm))
+
+
+class ColumnarCorpus:
+    """write_columnar로 저장한 폴더를 mmap으로 읽습니다. (열린 동안 파일을 교체하지 마세요)"""
+
+    def __init__(self, path: str = COLUMNAR_DIR):
+        self.path = path
+        with open(os.path.join(path, "index.json"), "r", encoding="utf-8") as f:
+            self.index = json.load(f)
+        if self.index.get("version") != COLUMNAR_VERSION:
+            raise ValueError(f"지원하지 않는 열 형식 버전입니다: {self.index.get('version')}")
+        self.standards = {code: tuple(span) for code, span in self.index["standards"].items()}
+        self._maps = []
+        self._heap = self._open("strings.bin", None)
+        self._offsets = self._open("offsets.bin", "Q")
+        self._columns = {name: self._open(f"{name}.bin", "I") for name in self.index["columns"]}
+
+    @classmethod
+    def open_if_exists(cls, path: str = COLUMNAR_DIR):
+        return cls(path) if os.path.exists(os.path.join(path, "index.json")) else None
+
+    def _open(self, filename: str, typecode):
+        mm, view = _map(os.path.join(self.path, filename), typecode)
+        if mm is not None:
+            self._maps.append((mm, view))
+        return view
+
+    def close(self):
+        for mm, view in self._maps:
+            view.release()
+            mm.close()
+        self._maps = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return self.index["rows"]
+
+    def string(self, sid: int) -> str:
+        return bytes(self._heap[self._offsets[sid]:self._offsets[sid + 1]]).decode("utf-8")
+
+    def value(self, column: str, row: int) -> str:
+        return self.string(self._columns[column][row])
+
+    def codes(self) -> list:
+        return list(self.standards)
+
+    def column(self, column: str, code: str = None) -> list:
+        """열 전체(또는 성취기준 하나의 행 범위)의 값"""
+        start, end = self.standards.get(code, (0, 0)) if code is not None else (0, len(self))
+        ids = self._columns[column]
+        return [self.string(ids[row]) for row in range(start, end)]
+
+    def texts(self, code: str) -> list:
+        """성취기준 하나의 문장들 (중복 제거, 원래 순서)"""
+        return list(dict.fromkeys(self.column("text_description", code)))
+
+    def rows(self, code: str = None):
+        """processed_data.jsonl과 같은 dict 행 (코드 순)"""
+        start, end = self.standards.get(code, (0, 0)) if code is not None else (0, len(self))
+        for row in range(start, end):
+            yield {name: self.string(ids[row]) for name, ids in self._columns.items()}
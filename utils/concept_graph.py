@@ -0,0 +1,242 @@
+import os
+import json
+import time
+import uuid
+from utils.reachability import ReachabilityIndex, iter_bits, mask_of
+
+# 메모리 내 CoreConcept 선수 관계 그래프 (읽기 전용)
+# 그래프는 파이프라인(02~04)을 다시 돌리기 전까지 바뀌지 않으므로,
+# 시작 시 Neo4j(또는 스냅샷 파일)에서 한 번 읽어 정수 ID + 인접 리스트로 들고 있으면서
+# get_prerequisites / get_path_for_visualization / retrieve_concept_from_graph를 로컬에서 처리합니다.
+#
+# 세대(generation) 스탬프: 파이프라인이 그래프를 바꾸면 GraphMeta 노드의 generation 값을 갱신하고,
+# 튜터는 이 값이 바뀌었을 때만 다시 읽어옵니다.
+#
+# 선수 개념 조회는 도달 가능성 인덱스(utils/reachability.py)의 비트 연산으로 처리합니다.
+# 인덱스는 04 단계가 빌드/검증해 스냅샷에 함께 저장하며, 스냅샷에 없으면 로드 시 새로 만듭니다.
+
+SNAPSHOT_FILE = os.path.join("data", "concept_graph_snapshot.json")
+
+GRAPH_META_KEY = "concept_graph"
+
+GENERATION_QUERY = """
+MATCH (m:GraphMeta {key: $key})
+RETURN m.generation AS generation
+"""
+
+STAMP_GENERATION_QUERY = """
+MERGE (m:GraphMeta {key: $key})
+SET m.generation = $generation, m.updated_at = datetime()
+"""
+
+NODES_QUERY = """
+MATCH (c:CoreConcept)
+RETURN c.name AS name, c.definition AS definition, c.domain AS domain
+ORDER BY name
+"""
+
+EDGES_QUERY = """
+MATCH (a:CoreConcept)-[:IS_PREREQUISITE_OF]->(b:CoreConcept)
+RETURN a.name AS source, b.name AS target
+"""
+
+EXAMPLES_QUERY = """
+MATCH (c:CoreConcept)
+OPTIONAL MATCH (ex:Concept)-[:IS_EXAMPLE_OF]->(c)
+WITH c, ex ORDER BY size(ex.definition), ex.definition
+RETURN c.name AS name, collect(ex.definition)[0..$example_limit] AS examples
+"""
+
+EXAMPLE_LIMIT = 3
+VISUALIZATION_PREREQ_DEPTH = 2
+
+
+def fetch_generation(query_fn):
+    """현재 그래프 세대 값을 가져옵니다. (스탬프가 없으면 None)"""
+    rows = query_fn(GENERATION_QUERY, {"key": GRAPH_META_KEY})
+    return rows[0]["generation"] if rows else None
+
+
+def stamp_generation(query_fn) -> str:
+    """그래프가 바뀌었음을 알리는 새 세대 값을 기록합니다. (파이프라인 단계 마지막에 호출)"""
+    generation = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    query_fn(STAMP_GENERATION_QUERY, {"key": GRAPH_META_KEY, "generation": generation})
+    return generation
+
+
+class ConceptGraph:
+    """정수 노드 ID와 인접 리스트로 표현한 CoreConcept 그래프"""
+
+    def __init__(self, names: list, definitions: list, domains: list, examples: list,
+                 edges: list, generation=None, reachability: ReachabilityIndex = None):
+        self.generation = generation
+        self.names = names
+        self.ids = {name: i for i, name in enumerate(names)}
+        self.definitions = definitions
+        self.domains = domains
+        self.examples = examples
+        self.edges = edges # [(선수 개념 id, 후속 개념 id), ...]
+        self.preds = [[] for _ in names] # preds[i]: i의 직접 선수 개념
+        self.succs = [[] for _ in names] # succs[i]: i를 선수로 하는 개념
+        for a, b in edges:
+            self.preds[b].append(a)
+            self.succs[a].append(b)
+        for adj in self.preds + self.succs:
+            adj.sort()
+        self.reachability = reachability or ReachabilityIndex.build(self.preds)
+
+    def __len__(self):
+        return len(self.names)
+
+    # ============ 불러오기 / 저장 ============
+    @classmethod
+    def from_neo4j(cls, query_fn, generation=None):
+        """query_fn(cypher, params) -> list[dict] 로 Neo4j에서 그래프 전체를 읽습니다."""
+        nodes = query_fn(NODES_QUERY, {})
+        names = [r["name"] for r in nodes]
+        ids = {name: i for i, name in enumerate(names)}
+
+        examples = [[] for _ in names]
+        for r in query_fn(EXAMPLES_QUERY, {"example_limit": EXAMPLE_LIMIT}):
+            if r["name"] in ids:
+                examples[ids[r["name"]]] = r["examples"] or []
+
+        edges = sorted({
+            (ids[r["source"]], ids[r["target"]])
+            for r in query_fn(EDGES_QUERY, {})
+            if r["source"] in ids and r["target"] in ids
+        })
+        return cls(names, [r["definition"] for r in nodes], [r["domain"] for r in nodes],
+                   examples, edges, generation)
+
+    def to_dict(self) -> dict:
+        return {
+            "generation": self.generation,
+            "names": self.names,
+            "definitions": self.definitions,
+            "domains": self.domains,
+            "examples": self.examples,
+            "edges": [list(e) for e in self.edges],
+            "reachability": self.reachability.to_list(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        reachability = data.get("reachability")
+        return cls(data["names"], data["definitions"], data["domains"], data["examples"],
+                   [tuple(e) for e in data["edges"]], data.get("generation"),
+                   ReachabilityIndex.from_list(reachability) if reachability is not None else None)
+
+    def save_snapshot(self, path: str):
+        dirname = os.path.dirname(path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load_snapshot(cls, path: str):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    @classmethod
+    def load(cls, query_fn, snapshot_path: str = None, generation=None):
+        """스냅샷의 세대가 현재 세대와 같으면 스냅샷을, 아니면 Neo4j에서 읽고 스냅샷을 갱신합니다."""
+        if snapshot_path and os.path.exists(snapshot_path):
+            try:
+                snapshot = cls.load_snapshot(snapshot_path)
+                if snapshot.generation is not None and snapshot.generation == generation:
+                    return snapshot
+            except Exception as e:
+                print(f"⚠️ 그래프 스냅샷 읽기 실패: {e}")
+
+        engine = cls.from_neo4j(query_fn, generation)
+        if snapshot_path:
+            try:
+                engine.save_snapshot(snapshot_path)
+            except Exception as e:
+                print(f"⚠️ 그래프 스냅샷 저장 실패: {e}")
+        return engine
+
+    # ============ 조회 ============
+    def _upstream_distances(self, target: int, depth: int) -> dict:
+        """target으로 들어오는 선수 개념들의 최단 거리 (depth 단계까지, 자기 자신 제외)"""
+        dist = self.reachability.distances(target, depth)
+        dist.pop(target, None)
+        return dist
+
+    def is_prerequisite(self, a: str, b: str) -> bool:
+        """a가 b의 (직접 또는 간접) 선수 개념인지"""
+        if a not in self.ids or b not in self.ids:
+            return False
+        return self.reachability.is_prerequisite(self.ids[a], self.ids[b])
+
+    def unknown_prerequisites(self, name: str, known_names, depth: int = 1) -> list:
+        """depth 단계 이내의 선수 개념 중 known_names(예: explained_concepts)에 없는 것 (이름 목록)"""
+        i = self.ids.get(name)
+        if i is None:
+            return []
+        bits = self.reachability.within_depth(i, depth) & ~mask_of(self.ids, known_names) & ~(1 << i)
+        return [self.names[p] for p in iter_bits(bits)]
+
+    def retrieve_concept(self, name: str):
+        i = self.ids.get(name)
+        if i is None:
+            return None
+        return {"name": name, "definition": self.definitions[i], "examples": list(self.examples[i])}
+
+    def get_prerequisites(self, name: str, depth: int = 2) -> list:
+        i = self.ids.get(name)
+        if i is None:
+            return []
+        dist = self._upstream_distances(i, depth)
+        ordered = sorted(dist.items(), key=lambda item: (item[1], self.names[item[0]]))
+        return [
+            {"name": self.names[p], "definition": self.definitions[p], "depth": d}
+            for p, d in ordered
+        ]
+
+    def get_path_for_visualization(self, name: str, prereq_depth: int = VISUALIZATION_PREREQ_DEPTH) -> dict:
+        """선수 prereq_depth 단계 + 후속 1단계 경로 (streamlit-agraph 형식)"""
+        target = self.ids.get(name)
+        if target is None:
+            return {"nodes": [], "edges": []}
+
+        # target까지 prereq_depth 이하의 경로 위에 있는 관계: 끝점 y의 거리 + 1 <= prereq_depth
+        dist = self._upstream_distances(target, prereq_depth)
+        dist[target] = 0
+        edges = []
+        for y, d in sorted(dist.items(), key=lambda item: (item[1], item[0])):
+            if d + 1 > prereq_depth:
+                continue
+            edges.extend((x, y) for x in self.preds[y])
+        edges.extend((target, s) for s in self.succs[target])
+
+        if not edges:
+            return {"nodes": [], "edges": []}
+
+        node_ids = []
+        for x, y in edges:
+            for n in (x, y):
+                if n not in node_ids:
+                    node_ids.append(n)
+        return {
+            "nodes": [{"id": self.names[n], "label": self.names[n]} for n in node_ids],
+            "edges": [
+                {"source": self.names[x], "target": self.names[y], "label": "선수개념"}
+                for x, y in edges
+            ],
+        }
+
+    def get_bundle(self, name: str, depth: int = 2):
+        """get_concept_bundle과 같은 형식의 묶음을 반환합니다."""
+        info = self.retrieve_concept(name)
+        if info is None:
+            return None
+        return {
+            **info,
+            "prerequisites": self.get_prerequisites(name, depth),
+            "learning_path": self.get_path_for_visualization(name),
+        }
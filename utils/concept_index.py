@@ -0,0 +1,126 @@
+import re
+import hashlib
+import threading
+
+from utils.fast_router import normalize_input
+
+# CoreConcept 이름 + 별칭으로 만든 메모리 내 다중 패턴 매처 (트라이)
+# "일차방정식이 뭐야?"처럼 개념 이름이 그대로 들어있는 질문은 LLM 없이 개념을 찾습니다.
+# 가장 긴 매칭을 우선하므로 '각뿔대'가 '각뿔'보다 먼저 선택됩니다.
+
+# ============ 별칭 규칙 (별칭 -> CoreConcept 이름) ============
+# 띄어쓰기 차이는 매칭 시 공백을 무시하므로 따로 적지 않아도 됩니다.
+CONCEPT_ALIASES = {
+    "최대공약수": ["gcd", "최대 공약수"],
+    "최소공배수": ["lcm", "최소 공배수"],
+    "절댓값": ["절대값"],
+    "일차방정식": ["1차방정식", "일차 방정식"],
+    "일차식": ["1차식"],
+    "정비례": ["정비례 관계"],
+    "반비례": ["반비례 관계"],
+    "원주": ["원의 둘레"],
+    "삼각형의 합동 조건": ["합동 조건"],
+    "다각형의 내각의 크기의 합": ["내각의 합", "내각의 크기의 합"],
+    "다각형의 외각의 크기의 합": ["외각의 합", "외각의 크기의 합"],
+    "도수분포다각형": ["도수 분포 다각형"],
+    "도수분포표": ["도수 분포표"],
+}
+
+# 개념 이름 앞뒤에 붙어도 되는 표현 (공백 제거 후 비교)
+_ALLOWED_PREFIX = re.compile(r"^(?:그럼|그러면|근데|그런데|혹시|아|음|저기)?$")
+_ALLOWED_SUFFIX = re.compile(
+    r"^(?:이란|란|이라는게|라는게|이라는건|라는건|이|가|은|는|을|를|의뜻|의정의|에대해서?|에관해서?)?"
+    r"(?:뭐야|뭐예요|뭐에요|뭔가요|뭐지|뭔데|뭐임|무엇인가요|무엇이에요|뭐였더라|뭐더라|뭔지알려줘|"
+    r"설명해줘|설명해주세요|다시설명해줘|알려줘|알려주세요|가르쳐줘|가르쳐주세요|"
+    r"이해가안돼|이해안돼|모르겠어|몰라|몰라요)?$"
+)
+
+_TERMINAL = "\0"
+
+
+def _compact(text: str) -> str:
+    """매칭용 정규화: 입력 정규화 후 공백/문장부호 제거"""
+    return re.sub(r"[\s?？!！.,~'\"“”‘’]", "", normalize_input(text))
+
+
+class ConceptIndex:
+    """CoreConcept 이름/별칭 트라이. rebuild()는 이름 목록이 바뀐 경우에만 다시 만듭니다."""
+
+    def __init__(self, aliases: dict = None):
+        self.aliases = CONCEPT_ALIASES if aliases is None else aliases
+        self._trie = {}
+        self._fingerprint = None
+        self._lock = threading.Lock()
+        self.size = 0
+
+    @staticmethod
+    def fingerprint(names) -> str:
+        return hashlib.md5("\n".join(sorted(names)).encode("utf-8")).hexdigest()
+
+    def rebuild(self, names) -> bool:
+        """이름 목록으로 트라이를 다시 만듭니다. 변경이 없으면 False를 반환합니다."""
+        names = [n for n in names if n]
+        fp = self.fingerprint(names)
+        if fp == self._fingerprint:
+            return False
+
+        trie = {}
+        size = 0
+        patterns = [(n, n) for n in names]
+        name_set = set(names)
+        for canonical, alias_list in self.aliases.items():
+            if canonical in name_set:
+                patterns.extend((alias, canonical) for alias in alias_list)
+
+        for pattern, canonical in patterns:
+            key = _compact(pattern)
+            if not key:
+                continue
+            node = trie
+            for ch in key:
+                node = node.setdefault(ch, {})
+            node[_TERMINAL] = canonical
+            size += 1
+
+        with self._lock:
+            self._trie = trie
+            self._fingerprint = fp
+            self.size = size
+        return True
+
+    def find_all(self, text: str) -> list:
+        """왼쪽부터 겹치지 않는 가장 긴 매칭을 (시작, 끝, 개념이름) 리스트로 반환합니다."""
+        s = _compact(text)
+        trie = self._trie
+        matches = []
+        i = 0
+        while i < len(s):
+            node = trie
+            best = None
+            j = i
+            while j < len(s) and s[j] in node:
+                node = node[s[j]]
+                j += 1
+                if _TERMINAL in node:
+                    best = (i, j, node[_TERMINAL])
+            if best:
+                matches.append(best)
+                i = best[1]
+            else:
+                i += 1
+        return matches
+
+    def resolve(self, text: str):
+        """
+        질문이 '개념 이름 + 질문 표현' 형태로 하나의 개념만 가리키면 그 이름을 반환합니다.
+        여러 개념(비교 질문)이나 다른 수식어('~의 부피', '~구하는 법')가 붙어 있으면 None.
+        """
+        s = _compact(text)
+        matches = self.find_all(text)
+        if len(matches) != 1:
+            return None
+
+        start, end, name = matches[0]
+        if not _ALLOWED_PREFIX.match(s[:start]) or not _ALLOWED_SUFFIX.match(s[end:]):
+            return None
+        return name
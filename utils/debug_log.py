@@ -0,0 +1,10 @@
+# 디버그 로그 설정 (app.py, 06_tutor_rag.py, utils 모듈이 함께 사용)
+# 끄려면 debug_log.DEBUG_MODE = False 로 바꾸거나 환경 변수 TUTOR_DEBUG=0 으로 실행합니다.
+import os
+
+DEBUG_MODE = os.getenv("TUTOR_DEBUG", "1") != "0" # True로 설정하면 상세 로그 출력
+
+def log_debug(message: str, source: str = None):
+    """디버그 모드가 활성화된 경우에만 메시지를 출력합니다. (source: 로그를 남긴 모듈 이름)"""
+    if DEBUG_MODE:
+        print(f"🐛 DEBUG{f' ({source})' if source else ''}: {message}")
@@ -0,0 +1,243 @@
+import os
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import threading
+from functools import partial
+from utils.debug_log import log_debug as shared_log_debug
+
+# 개념 설명 캐시 (SQLite)
+# 키: (개념 이름, 설명 횟수 구간, 변형 번호, 프롬프트 버전)
+# - 처음 설명(count == 0)은 모든 학생이 같은 설명을 공유합니다.
+# - 재설명(count > 0)은 변형 번호를 돌려가며 사용하여 매번 다른 설명이 나오도록 합니다.
+# 캐시 적중 시 저장된 텍스트를 조각(chunk) 단위 제너레이터로 재생하므로
+# app.py의 write_stream 경로는 그대로 동작합니다.
+
+DATA_DIR = "data"
+CACHE_FILE = os.path.join(DATA_DIR, "explanation_cache.sqlite3")
+PREBUILT_FILE = os.path.join(DATA_DIR, "explanation_variants.json")
+
+DEFAULT_MAX_ENTRIES = 5000
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60 # 30일
+REPLAY_CHUNK_SIZE = 12
+PREBUILT_CHECK_SECONDS = 30 # 사전 생성 설명 파일의 수정 시각을 확인하는 주기
+
+log_debug = partial(shared_log_debug, source="ExplanationCache") # 공용 DEBUG_MODE를 따름
+
+
+def count_bucket(count: int) -> str:
+    """설명 횟수 구간: 처음 설명(first) / 재설명(retry)"""
+    return "first" if count <= 0 else "retry"
+
+
+def variant_for(count: int, num_variants: int) -> int:
+    """설명 횟수에 따른 변형 번호 (재설명은 1회차부터 0, 1, 2, ... 순환)"""
+    if count <= 0 or num_variants <= 1:
+        return 0
+    return (count - 1) % num_variants
+
+
+def replay_stream(text: str, chunk_size: int = REPLAY_CHUNK_SIZE):
+    """저장된 텍스트를 스트림처럼 조각 단위로 내보냅니다."""
+    for i in range(0, len(text), chunk_size):
+        yield text[i:i + chunk_size]
+
+
+def record_stream(stream, on_complete):
+    """스트림을 그대로 전달하면서 내용을 모아, 끝까지 소비되면 on_complete(전체 텍스트)를 호출합니다."""
+    chunks = []
+    for chunk in stream:
+        chunks.append(chunk)
+        yield chunk
+    text = "".join(chunks)
+    if text.strip():
+        on_complete(text)
+
+
+class ExplanationCache:
+    """LRU + TTL 제거 정책을 가진 SQLite 설명 캐시"""
+
+    def __init__(self, db_path: str = CACHE_FILE, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            dirname = os.path.dirname(self.db_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS explanations (
+                    key TEXT PRIMARY KEY,
+                    concept TEXT NOT NULL,
+                    bucket TEXT NOT NULL,
+                    variant INTEGER NOT NULL,
+                    prompt_version TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON explanations(last_access)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(concept: str, bucket: str, variant: int, prompt_version: str) -> str:
+        raw = f"{concept}\x1f{bucket}\x1f{variant}\x1f{prompt_version}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, concept: str, bucket: str, variant: int, prompt_version: str):
+        """캐시된 설명 텍스트를 반환합니다. 없거나 만료되었으면 None."""
+        key = self.make_key(concept, bucket, variant, prompt_version)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT text, created_at FROM explanations WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl_seconds:
+                    conn.execute("UPDATE explanations SET last_access = ? WHERE key = ?", (now, key))
+                    conn.commit()
+                    self.hits += 1
+                    return row[0]
+                if row:
+                    conn.execute("DELETE FROM explanations WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+        except sqlite3.Error as e:
+            print(f"⚠️ 설명 캐시 조회 오류: {e}")
+        return None
+
+    def put(self, concept: str, bucket: str, variant: int, prompt_version: str, text: str):
+        """설명을 저장하고, 만료 항목과 오래 안 쓰인 항목(LRU)을 정리합니다."""
+        key = self.make_key(concept, bucket, variant, prompt_version)
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO explanations "
+                    "(key, concept, bucket, variant, prompt_version, text, created_at, last_access) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, concept, bucket, variant, prompt_version, text, now, now),
+                )
+                conn.execute("DELETE FROM explanations WHERE created_at < ?", (now - self.ttl_seconds,))
+                (total,) = conn.execute("SELECT count(*) FROM explanations").fetchone()
+                if total > self.max_entries:
+                    conn.execute(
+                        "DELETE FROM explanations WHERE key IN "
+                        "(SELECT key FROM explanations ORDER BY last_access ASC LIMIT ?)",
+                        (total - self.max_entries,),
+                    )
+                conn.commit()
+            log_debug(f"'{concept}' ({bucket}/{variant}) 설명 저장")
+        except sqlite3.Error as e:
+            print(f"⚠️ 설명 캐시 저장 오류: {e}")
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def content_hash(concept_info: dict, prompt_version: str) -> str:
+    """설명 생성 입력(개념 이름, 정의, 예시, 프롬프트 버전)의 해시"""
+    payload = json.dumps(
+        [concept_info["name"], concept_info.get("definition"), concept_info.get("examples", []), prompt_version],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def _mtime_ns(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class PrebuiltExplanations:
+    """
+    07_pregenerate_explanations.py가 만든 설명 변형 파일을 읽어 제공합니다.
+    개념 정의/예시나 프롬프트가 바뀐 항목(해시 불일치)은 사용하지 않습니다.
+    check_seconds마다 파일 수정 시각을 확인하여, 다시 생성된 파일은 튜터를 재시작하지 않아도 다시 읽습니다.
+    """
+
+    def __init__(self, path: str = PREBUILT_FILE, check_seconds: float = PREBUILT_CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.prompt_version = None
+        self.concepts = {}
+        self.hits = 0
+        self.misses = 0
+        self._mtime_ns = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def load(self) -> bool:
+        self._checked_at = time.monotonic()
+        self._mtime_ns = _mtime_ns(self.path) # 읽기 전에 기록 (읽는 중에 교체되면 다음 확인 때 다시 읽음)
+        if self._mtime_ns is None:
+            log_debug(f"사전 생성 설명 파일이 없습니다: {self.path}")
+            self.prompt_version = None
+            self.concepts = {}
+            return False
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.prompt_version = data.get("prompt_version")
+            self.concepts = data.get("concepts", {})
+            log_debug(f"사전 생성 설명 로드 완료 (개념 {len(self.concepts)}개)")
+            return True
+        except Exception as e:
+            print(f"⚠️ 사전 생성 설명 로드 실패: {e}")
+            return False
+
+    def refresh(self) -> bool:
+        """파일이 바뀌었으면 다시 읽습니다. (check_seconds에 한 번만 stat)"""
+        if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_seconds:
+            return False
+        with self._lock:
+            if self._checked_at is not None and time.monotonic() - self._checked_at < self.check_seconds:
+                return False
+            if self._checked_at is not None and _mtime_ns(self.path) == self._mtime_ns:
+                self._checked_at = time.monotonic()
+                return False
+            if self._checked_at is not None:
+                log_debug(f"사전 생성 설명 파일이 바뀌어 다시 읽습니다: {self.path}")
+            return self.load()
+
+    def get(self, concept_info: dict, count: int, prompt_version: str):
+        """설명 횟수에 맞는 사전 생성 설명을 반환합니다. 없으면 None."""
+        self.refresh()
+        entry = self.concepts.get(concept_info["name"])
+        if (not entry or self.prompt_version != prompt_version
+                or entry.get("hash") != content_hash(concept_info, prompt_version)):
+            self.misses += 1
+            return None
+
+        variants = entry.get(count_bucket(count)) or []
+        if not variants:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        if count <= 0:
+            return random.choice(variants)
+        return variants[(count - 1) % len(variants)]
@@ -0,0 +1,61 @@
+import os
+import json
+import time
+import hashlib
+
+# 핵심 개념 추출 결과 캐시 (03_extract_and_merge_concepts.py용, JSON 파일)
+# 키: (프롬프트 버전, 모델, 정렬한 Concept 문장들)의 해시
+# 성취기준의 문장이 바뀌지 않았고 프롬프트/모델도 같으면 LLM을 다시 부르지 않고 저장된 결과로 그래프 쓰기만 다시 합니다.
+# (성취기준 코드는 키에 넣지 않으므로 같은 문장 묶음은 코드가 바뀌어도 재사용)
+
+EXTRACTION_CACHE_FILE = os.path.join("data", "concept_extraction_cache.json")
+
+
+def extraction_key(texts: list, prompt_version: str, model: str) -> str:
+    payload = json.dumps([prompt_version, model, sorted(texts)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ExtractionCache:
+    def __init__(self, path: str = EXTRACTION_CACHE_FILE, prompt_version: str = "v1", model: str = "gpt-4o-mini"):
+        self.path = path
+        self.prompt_version = prompt_version
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f).get("entries", {})
+
+    def key(self, texts: list) -> str:
+        return extraction_key(texts, self.prompt_version, self.model)
+
+    def get(self, texts: list):
+        """저장된 핵심 개념 리스트 (없으면 None)"""
+        entry = self._entries.get(self.key(texts))
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["concepts"]
+
+    def put(self, texts: list, concepts: list, code: str = None):
+        """추출 결과를 저장하고 바로 파일에 기록합니다. (중간에 멈춰도 완료된 결과는 남음)"""
+        self._entries[self.key(texts)] = {
+            "concepts": concepts,
+            "code": code, # 참고용 (키에는 포함되지 않음)
+            "prompt_version": self.prompt_version,
+            "model": self.model,
+            "extracted_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.save()
+
+    def save(self):
+        dirname = os.path.dirname(self.path)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entries": self._entries}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,162 @@
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import partial
+from utils.debug_log import log_debug as shared_log_debug
+
+# LLM 마스터 라우터 앞단의 규칙 기반 빠른 분류기
+# 정규화된 입력에 어휘 사전(lexicon)과 정규식 규칙을 적용하여
+# 인사 / 문제 요청 / 명백한 개념 질문을 LLM 호출 없이 분류합니다.
+# (문제 답변은 call_master_router가 WAITING_PROBLEM_ANSWER 모드에서 먼저 solve_problem으로 보내므로 규칙이 없음)
+# 확신도가 낮으면 None을 반환하여 기존 LLM 라우터로 넘깁니다.
+
+log_debug = partial(shared_log_debug, source="FastRouter") # 공용 DEBUG_MODE를 따름
+
+# 이 값 이상의 확신도를 가진 규칙만 LLM 라우터를 건너뜁니다.
+CONFIDENCE_THRESHOLD = 0.8
+
+# ============ 어휘 사전 ============
+GREETINGS = {
+    "안녕", "안녕하세요", "안녕하세용", "안녕하세여", "안뇽", "ㅎㅇ", "하이", "하이루",
+    "반가워", "반가워요", "반갑습니다", "hi", "hello", "헬로",
+}
+
+CHITCHAT = {
+    "고마워", "고마워요", "고맙습니다", "감사합니다", "감사해요", "땡큐", "thanks", "thank you",
+    "수고했어", "수고했어요", "수고하셨습니다", "너는 누구야", "넌 누구야", "누구세요",
+}
+
+# 개념 질문으로 확신하기 위한 수학 용어 어간 (한 글자 어간은 오분류가 많아 제외)
+MATH_STEMS = (
+    "방정식", "부등식", "등식", "항등식", "일차", "이차", "다항", "단항", "동류항", "상수항", "계수", "이항",
+    "분배법칙", "문자", "대입", "함수", "정비례", "반비례", "좌표", "사분면", "순서쌍", "그래프",
+    "자연수", "정수", "유리수", "소수", "합성수", "절댓값", "절대값", "양수", "음수", "역수", "분수",
+    "약수", "배수", "공약수", "공배수", "소인수", "거듭제곱",
+    "도형", "직선", "반직선", "선분", "교점", "교선", "평행", "수선", "수직", "꼬인 위치", "맞꼭지각",
+    "동위각", "엇각", "내각", "외각", "대각선", "삼각형", "사각형", "다각형", "합동", "작도",
+    "부채꼴", "중심각", "호의 길이", "원주", "원기둥", "원뿔", "각기둥", "각뿔", "다면체", "회전체",
+    "입체", "넓이", "부피", "겉넓이", "둘레",
+    "도수", "계급", "히스토그램", "줄기와 잎", "대푯값", "평균", "중앙값", "최빈값", "상대도수", "자료",
+)
+
+# ============ 정규식 규칙 ============
+_TRAILING_NOISE = re.compile(r"[\s?？!！.~…ㅋㅎㅠㅜ^]+$")
+_LEADING_NOISE = re.compile(r"^[\s~…]+")
+
+# "문제 내줘", "일차식 문제 내줘", "퀴즈 풀어볼래"
+_ASK_PROBLEM = re.compile(
+    r"^(?:(?P<topic>.+?)\s*(?:에 대한|에대한|관련된|관련|의)?\s*)?"
+    r"(?:문제|퀴즈)\s*(?:하나|한 개|한개|좀|더|다시)?\s*"
+    r"(?:내줘|내 줘|내주세요|내 주세요|내봐|내 봐|낼래|내줄래|줘|주세요|풀래|풀어볼래|풀어 볼래|"
+    r"풀어볼게|풀어볼게요|풀어 볼게요|풀고 싶어|풀고싶어|풀어보고 싶어)$"
+)
+# "다른 문제 내줘"처럼 특정 개념이 아닌 수식어
+_NON_TOPIC_WORDS = {"다른", "새로운", "새", "또", "하나 더", "비슷한", "다음", "쉬운", "어려운", "아무"}
+
+# "일차방정식이 뭐야", "계수 설명해줘"
+_CONCEPT_QUESTION = re.compile(
+    r"^(?P<topic>.+?)\s*(?:이란|란|이|가|은|는|을|를|에 대해|에 대해서)?\s*"
+    r"(?:뭐야|뭐예요|뭐에요|뭔가요|뭐지|뭔데|뭐임|무엇인가요|무엇이에요|뭐였더라|뭐더라|"
+    r"설명해줘|설명해 줘|설명해주세요|설명해 주세요|알려줘|알려 줘|알려주세요|알려 주세요|"
+    r"가르쳐줘|가르쳐 줘|가르쳐주세요)$"
+)
+
+# 설명 직후(POST_EXPLANATION) 재설명 요청
+_REEXPLAIN = re.compile(
+    r"(?:다른|다시|더)\s*(?:예시|예제|설명)|이해\s*(?:가\s*)?안\s*(?:돼|되|가)|무슨\s*말|뭐라는"
+)
+
+_stats = Counter()
+_stats_lock = threading.Lock()
+
+
+def normalize_input(text: str) -> str:
+    """유니코드(NFC) 정규화, 소문자 변환, 공백 정리, 앞뒤 문장부호/ㅋㅋ 등 제거"""
+    text = unicodedata.normalize("NFC", text or "").lower()
+    text = re.sub(r"\s+", " ", text)
+    text = _TRAILING_NOISE.sub("", text)
+    text = _LEADING_NOISE.sub("", text)
+    return text
+
+
+def _strip_particle(topic: str) -> str:
+    """주제 끝의 조사를 떼어냅니다. (예: '일차식의' -> '일차식')"""
+    return re.sub(r"\s*(?:의|에 대한|에대한|관련)$", "", topic).strip()
+
+
+def _looks_like_math(topic: str) -> bool:
+    return any(stem in topic for stem in MATH_STEMS)
+
+
+def _apply_rules(text: str, mode: str):
+    """정규화된 입력에 규칙을 적용하여 (task, topic, confidence, rule)을 반환합니다."""
+    if text in GREETINGS:
+        return "greeting", "none", 1.0, "greeting"
+
+    if text in CHITCHAT:
+        return "chitchat", "none", 0.95, "chitchat"
+
+    m = _ASK_PROBLEM.match(text)
+    if m:
+        topic = _strip_particle(m.group("topic") or "")
+        if not topic or topic in _NON_TOPIC_WORDS:
+            topic = "none"
+        return "ask_problem", topic, 0.9, "ask_problem"
+
+    if mode == "POST_EXPLANATION" and _REEXPLAIN.search(text):
+        return "tutor_flow", "none", 0.85, "re_explain"
+
+    m = _CONCEPT_QUESTION.match(text)
+    if m:
+        topic = m.group("topic").strip()
+        if len(topic) <= 20 and _looks_like_math(topic):
+            return "tutor_flow", topic, 0.85, "concept_question"
+        return "tutor_flow", topic, 0.5, "concept_question_weak"
+
+    return None
+
+
+def fast_route(user_input: str, mode: str = "IDLE"):
+    """
+    규칙 기반으로 라우팅을 시도합니다.
+    확신도가 충분하면 (task, topic)을, 아니면 None을 반환합니다. (None이면 LLM 라우터 사용)
+    """
+    text = normalize_input(user_input)
+    result = _apply_rules(text, mode) if text else None
+
+    with _stats_lock:
+        if result and result[2] >= CONFIDENCE_THRESHOLD:
+            _stats["hits"] += 1
+            _stats[f"rule:{result[3]}"] += 1
+        else:
+            _stats["misses"] += 1
+
+    if not result or result[2] < CONFIDENCE_THRESHOLD:
+        log_debug(f"규칙 분류 실패 → LLM 라우터 사용 (입력: '{text}')")
+        return None
+
+    task, topic, confidence, rule = result
+    log_debug(f"규칙 '{rule}' 적중: task={task}, topic={topic}, 확신도={confidence}")
+    return task, topic
+
+
+def get_fast_router_stats() -> dict:
+    """빠른 분류기의 적중/실패 횟수를 반환합니다. (적중 1회 = LLM 라우터 호출 1회 절약)"""
+    with _stats_lock:
+        hits = _stats["hits"]
+        misses = _stats["misses"]
+        by_rule = {k[len("rule:"):]: v for k, v in _stats.items() if k.startswith("rule:")}
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+        "by_rule": by_rule,
+    }
+
+
+def reset_fast_router_stats():
+    """통계를 초기화합니다."""
+    with _stats_lock:
+        _stats.clear()
@@ -0,0 +1,183 @@
+import os
+import json
+import time
+from collections import defaultdict
+
+# 선수 관계 그래프 분석 (메모리, 선형 시간)
+# ConceptGraph(utils/concept_graph.py)의 간선 목록과 RELATED_TO 쌍을 한 번 읽어
+#   - 강연결 요소(Tarjan): 순환 참조 묶음
+#   - 최장 선수 관계 사슬: 강연결 요소를 하나로 줄인 DAG에서 위상 순서 DP
+#   - 영역(domain)별 커버리지와 고립된 개념
+# 을 모두 O(V + E)로 계산하고, CI에서 판정할 수 있는 JSON 보고서로 저장합니다.
+
+REPORT_FILE = os.path.join("data", "graph_report.json")
+
+RELATED_PAIRS_QUERY = """
+MATCH (a:CoreConcept)-[:RELATED_TO]-(b:CoreConcept)
+RETURN DISTINCT a.name AS a, b.name AS b
+"""
+
+
+def fetch_related_pairs(query_fn) -> list:
+    """RELATED_TO로 연결된 (이름, 이름) 쌍 (방향 무시, 쿼리 한 번)"""
+    return [(r["a"], r["b"]) for r in query_fn(RELATED_PAIRS_QUERY, {})]
+
+
+def strongly_connected_components(n: int, succs: list) -> list:
+    """
+    Tarjan 알고리즘 (재귀 없이). 강연결 요소 목록을 역위상 순서로 반환합니다.
+    (요소 A에서 B로 가는 간선이 있으면 B가 A보다 먼저 나옴)
+    """
+    index = [None] * n
+    lowlink = [0] * n
+    on_stack = [False] * n
+    stack = []
+    components = []
+    counter = 0
+
+    for root in range(n):
+        if index[root] is not None:
+            continue
+        work = [(root, 0)]
+        while work:
+            v, child = work[-1]
+            if child == 0:
+                index[v] = lowlink[v] = counter
+                counter += 1
+                stack.append(v)
+                on_stack[v] = True
+            if child < len(succs[v]):
+                work[-1] = (v, child + 1)
+                w = succs[v][child]
+                if index[w] is None:
+                    work.append((w, 0))
+                elif on_stack[w]:
+                    lowlink[v] = min(lowlink[v], index[w])
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[v])
+            if lowlink[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                components.append(sorted(component))
+    return components
+
+
+def longest_chains(n: int, succs: list, components: list, limit: int = 5) -> list:
+    """
+    가장 긴 선수 관계 사슬들 (간선 수 기준, 순환 묶음은 한 칸으로 계산).
+    반환: [(길이, [요소 번호, ...]), ...] 긴 순서로 최대 limit개 (서로 다른 끝 요소)
+    """
+    component_of = [0] * n
+    for c, members in enumerate(components):
+        for v in members:
+            component_of[v] = c
+
+    # components는 역위상 순서이므로 뒤에서부터가 위상 순서: 선수 요소를 먼저 처리
+    length = [0] * len(components)
+    parent = [None] * len(components)
+    for c in reversed(range(len(components))):
+        for v in components[c]:
+            for w in succs[v]:
+                d = component_of[w]
+                if d != c and length[c] + 1 > length[d]:
+                    length[d] = length[c] + 1
+                    parent[d] = c
+
+    ends = sorted(range(len(components)), key=lambda c: (-length[c], c))[:limit]
+    chains = []
+    for end in ends:
+        if length[end] == 0:
+            break
+        path = [end]
+        while parent[path[-1]] is not None:
+            path.append(parent[path[-1]])
+        chains.append((length[end], path[::-1]))
+    return chains
+
+
+def analyze_graph(engine, related_pairs=(), chain_limit: int = 5) -> dict:
+    """ConceptGraph와 RELATED_TO 쌍으로 분석 보고서(dict)를 만듭니다."""
+    started = time.perf_counter()
+    n = len(engine)
+    names = engine.names
+
+    components = strongly_connected_components(n, engine.succs)
+    self_loops = {a for a, b in engine.edges if a == b}
+    cycles = [members for members in components if len(members) > 1 or members[0] in self_loops]
+
+    def component_label(members):
+        return " ↔ ".join(names[v] for v in members)
+
+    chains = [
+        {"length": length, "path": [component_label(components[c]) for c in path]}
+        for length, path in longest_chains(n, engine.succs, components, chain_limit)
+    ]
+
+    related = [False] * n
+    related_edges = set()
+    for a, b in related_pairs:
+        if a in engine.ids and b in engine.ids and a != b:
+            related[engine.ids[a]] = related[engine.ids[b]] = True
+            related_edges.add(tuple(sorted((a, b))))
+
+    domains = defaultdict(lambda: {"total": 0, "with_prerequisite": 0, "with_related": 0, "isolated": []})
+    for v in range(n):
+        stats = domains[engine.domains[v] or "기타"]
+        has_prereq = bool(engine.preds[v] or engine.succs[v])
+        stats["total"] += 1
+        stats["with_prerequisite"] += has_prereq
+        stats["with_related"] += related[v]
+        if not has_prereq and not related[v]:
+            stats["isolated"].append(names[v])
+
+    total_isolated = sum(len(stats["isolated"]) for stats in domains.values())
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "generation": engine.generation,
+        "concepts": n,
+        "prerequisite_edges": len(engine.edges),
+        "related_edges": len(related_edges),
+        "roots": sum(1 for v in range(n) if not engine.preds[v] and engine.succs[v]),
+        "cycles": [[names[v] for v in members] for members in cycles],
+        "max_chain_length": chains[0]["length"] if chains else 0,
+        "longest_chains": chains,
+        "coverage": {
+            "with_prerequisite": sum(s["with_prerequisite"] for s in domains.values()),
+            "with_related": sum(s["with_related"] for s in domains.values()),
+            "isolated": total_isolated,
+            "isolated_ratio": round(total_isolated / n, 4) if n else 0.0,
+        },
+        "domains": {domain: domains[domain] for domain in sorted(domains)},
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+
+
+def check_report(report: dict, max_cycles: int = 0, max_isolated_ratio: float = None, max_chain_length: int = None) -> list:
+    """CI 판정: 기준을 넘은 항목의 설명 목록 (비어 있으면 통과)"""
+    failures = []
+    if len(report["cycles"]) > max_cycles:
+        failures.append(f"순환 참조 {len(report['cycles'])}개 (허용 {max_cycles}개)")
+    ratio = report["coverage"]["isolated_ratio"]
+    if max_isolated_ratio is not None and ratio > max_isolated_ratio:
+        failures.append(f"고립된 개념 비율 {ratio:.1%} (허용 {max_isolated_ratio:.1%})")
+    if max_chain_length is not None and report["max_chain_length"] > max_chain_length:
+        failures.append(f"최장 선수 관계 사슬 {report['max_chain_length']}단계 (허용 {max_chain_length}단계)")
+    return failures
+
+
+def write_report(report: dict, path: str = REPORT_FILE):
+    dirname = os.path.dirname(path)
+    if dirname:
+        os.makedirs(dirname, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
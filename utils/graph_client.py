@@ -0,0 +1,147 @@
+import os
+import re
+import time
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from neo4j import GraphDatabase, RoutingControl, READ_ACCESS, WRITE_ACCESS
+
+from utils.metrics import METRICS
+
+# 공용 Neo4j 클라이언트 (파이프라인 스크립트 02~04, 07과 튜터 06이 함께 사용)
+# - 드라이버 하나(프로세스당)의 연결 풀을 재사용 (호출마다 세션/연결을 새로 만들지 않음)
+# - 읽기/쓰기 라우팅: 쿼리에 쓰기 절이 있으면 쓰기, 아니면 읽기 (클러스터에서는 읽기를 팔로워로 보냄)
+# - 모든 호출은 관리형 트랜잭션: 일시적 오류(리더 변경, 연결 끊김, 교착)는 드라이버가 재시도
+# - 클라이언트 쪽 캐시는 쿼리 문자열별 읽기/쓰기 판단(is_write_query의 lru_cache)뿐입니다. 쿼리 결과는 캐시하지 않고,
+#   값은 항상 파라미터로 보내 같은 쿼리 문자열에 대해 서버의 실행 계획 캐시가 재사용되도록 합니다.
+# - 이 클라이언트를 통해 실행 중인 쿼리/세션 수(현재/최고치)와 설정된 최대 연결 수, 쿼리 지연 시간을
+#   utils/metrics.py로 노출 (/metrics). 드라이버 연결 풀 내부의 실제 연결 수가 아니라 클라이언트가 센 값입니다.
+#
+# 환경 변수
+#   NEO4J_URI / NEO4J_USER / NEO4J_PASSWORD / NEO4J_DATABASE
+#   NEO4J_MAX_POOL_SIZE        : 최대 연결 수 (기본 20)
+#   NEO4J_POOL_ACQUIRE_TIMEOUT : 풀에서 연결을 기다리는 최대 시간(초, 기본 30)
+#   NEO4J_TX_RETRY_SECONDS     : 관리형 트랜잭션 재시도 최대 시간(초, 기본 15)
+
+DEFAULT_MAX_POOL_SIZE = 20
+DEFAULT_ACQUIRE_TIMEOUT = 30.0
+DEFAULT_TX_RETRY_SECONDS = 15.0
+MAX_CONNECTION_LIFETIME = 30 * 60 # 방화벽/로드밸런서의 유휴 연결 종료보다 먼저 교체
+LIVENESS_CHECK_SECONDS = 60 # 이보다 오래 쉰 연결은 쓰기 전에 확인
+
+_WRITE_CLAUSE = re.compile(r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def is_write_query(query: str) -> bool:
+    """쓰기 절(CREATE/MERGE/SET/DELETE/...)이 있는 쿼리인지 (쿼리 문자열별로 캐시)"""
+    return _WRITE_CLAUSE.search(query) is not None
+
+
+class GraphClient:
+    """
+    graph.query(query, params) (langchain_neo4j.Neo4jGraph와 같은 형태)와
+    run_query(query, parameters) (파이프라인 스크립트의 기존 형태)를 모두 제공합니다. 결과는 dict 리스트.
+    """
+
+    def __init__(self, uri: str = None, user: str = None, password: str = None, database: str = None,
+                 max_pool_size: int = None, acquire_timeout: float = None, tx_retry_seconds: float = None,
+                 name: str = "default"):
+        self.name = name # 메트릭 라벨 (프로세스에 클라이언트가 여럿일 때 구분)
+        self.database = database or os.getenv("NEO4J_DATABASE") or None
+        self.max_pool_size = max_pool_size or int(os.getenv("NEO4J_MAX_POOL_SIZE", DEFAULT_MAX_POOL_SIZE))
+        self._driver = GraphDatabase.driver(
+            uri or os.getenv("NEO4J_URI"),
+            auth=(user or os.getenv("NEO4J_USER"), password or os.getenv("NEO4J_PASSWORD")),
+            max_connection_pool_size=self.max_pool_size,
+            connection_acquisition_timeout=acquire_timeout or float(os.getenv("NEO4J_POOL_ACQUIRE_TIMEOUT", DEFAULT_ACQUIRE_TIMEOUT)),
+            max_transaction_retry_time=tx_retry_seconds or float(os.getenv("NEO4J_TX_RETRY_SECONDS", DEFAULT_TX_RETRY_SECONDS)),
+            max_connection_lifetime=MAX_CONNECTION_LIFETIME,
+            liveness_check_timeout=LIVENESS_CHECK_SECONDS,
+            keep_alive=True,
+        )
+        self._lock = threading.Lock()
+        self.in_flight = 0 # 이 클라이언트로 실행 중인 쿼리/세션 수 (동시에 필요한 연결 수의 근사치)
+        self.peak_in_flight = 0
+        self.started = 0
+        self._publish_in_flight()
+
+    def close(self):
+        self._driver.close()
+
+    # ============ 실행 중인 쿼리 수 ============
+    @contextmanager
+    def _track_in_flight(self):
+        with self._lock:
+            self.in_flight += 1
+            self.started += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        self._publish_in_flight()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._publish_in_flight()
+
+    def _publish_in_flight(self):
+        METRICS.set_gauge("tutor_graph_in_flight_queries", self.in_flight, client=self.name)
+        METRICS.set_gauge("tutor_graph_peak_in_flight_queries", self.peak_in_flight, client=self.name)
+        METRICS.set_gauge("tutor_graph_max_pool_size", self.max_pool_size, client=self.name)
+
+    def in_flight_stats(self) -> dict:
+        """이 클라이언트가 센 실행 중인 쿼리/세션 수 (드라이버 연결 풀의 내부 상태는 아님)"""
+        with self._lock:
+            return {
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "max_pool_size": self.max_pool_size,
+                "started": self.started,
+            }
+
+    # ============ 쿼리 ============
+    def _execute(self, query: str, params: dict, write: bool) -> list:
+        return self._execute_with_summary(query, params, write)[0]
+
+    def _execute_with_summary(self, query: str, params: dict, write: bool) -> tuple:
+        started = time.perf_counter()
+        with self._track_in_flight():
+            records, summary, _ = self._driver.execute_query(
+                query, params or {},
+                routing_=RoutingControl.WRITE if write else RoutingControl.READ,
+                database_=self.database,
+            )
+        METRICS.observe("tutor_graph_query_ms", (time.perf_counter() - started) * 1000,
+                        client=self.name, access="write" if write else "read")
+        return [record.data() for record in records], summary
+
+    def read(self, query: str, params: dict = None) -> list:
+        return self._execute(query, params, write=False)
+
+    def write(self, query: str, params: dict = None) -> list:
+        return self._execute(query, params, write=True)
+
+    def write_with_counters(self, query: str, params: dict = None) -> tuple:
+        """쓰기 쿼리를 실행하고 (결과, 서버가 센 변경 수 dict)를 반환합니다. (예: counters["relationships_created"])"""
+        records, summary = self._execute_with_summary(query, params, write=True)
+        counters = summary.counters
+        return records, {
+            "nodes_created": counters.nodes_created,
+            "relationships_created": counters.relationships_created,
+            "properties_set": counters.properties_set,
+        }
+
+    def query(self, query: str, params: dict = None) -> list:
+        """쿼리 내용으로 읽기/쓰기를 골라 실행"""
+        return self._execute(query, params, write=is_write_query(query))
+
+    def run_query(self, query: str, parameters: dict = None) -> list:
+        return self.query(query, parameters)
+
+    @contextmanager
+    def session(self, write: bool = True):
+        """여러 트랜잭션을 한 세션에서 보낼 때 (예: 02의 배치 적재 -> session.execute_write(fn, ...))"""
+        with self._track_in_flight(), self._driver.session(
+            database=self.database, default_access_mode=WRITE_ACCESS if write else READ_ACCESS
+        ) as session:
+            yield session
@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 턴 단계별 지연 시간 측정
+# - 단계 타이머: 라우터, 개념 추출, 그래프 조회, 의도 분류, 튜터 흐름 등 각 단계의 소요 시간
+# - 스트림 타이머: 모든 LLM .stream() 결과의 첫 토큰까지 시간(TTFT)과 전체 스트리밍 시간
+# 측정값은 프로세스 내 히스토그램에 쌓이고, Prometheus 텍스트 형식이나 JSONL(턴당 한 줄)로 내보냅니다.
+#
+# 환경 변수
+#   TUTOR_METRICS_JSONL : 턴 요약을 JSONL로 기록할 파일 경로 (없으면 기록 안 함)
+#   TUTOR_METRICS_PORT  : 설정하면 해당 포트에서 /metrics (Prometheus 텍스트)를 제공
+#   TUTOR_METRICS_HOST  : /metrics를 열 주소 (기본 127.0.0.1, 인증이 없으므로 외부 수집기가 필요할 때만 0.0.0.0 등으로)
+
+DEFAULT_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+DEFAULT_METRICS_HOST = "127.0.0.1"
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 구조)"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1) # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float):
+        """버킷 경계 기준 근사 분위수 (관측값이 없으면 None)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.buckets[i] if i < len(self.buckets) else float("inf")
+        return float("inf")
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum, 3),
+            "mean_ms": round(self.sum / self.count, 3) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+        }
+
+
+class MetricsRegistry:
+    """(메트릭 이름, 라벨) -> Histogram, 그리고 현재 값만 유지하는 게이지 (실행 중인 그래프 쿼리 수 등)"""
+
+    def __init__(self, jsonl_path: str = None):
+        self._histograms = {}
+        self._gauges = {}
+        self._lock = threading.Lock()
+        self.jsonl_path = jsonl_path
+
+    def observe(self, metric: str, value_ms: float, **labels):
+        key = (metric, tuple(sorted(labels.items())))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = Histogram()
+            hist.observe(value_ms)
+
+    def set_gauge(self, metric: str, value: float, **labels):
+        with self._lock:
+            self._gauges[(metric, tuple(sorted(labels.items())))] = value
+
+    def snapshot(self) -> dict:
+        """{"metric{label=...}": {...}} 형태의 요약 (게이지는 값만)"""
+        with self._lock:
+            items = list(self._histograms.items())
+            gauges = list(self._gauges.items())
+        summary = {_series_name(metric, labels): hist.snapshot() for (metric, labels), hist in sorted(items)}
+        summary.update({_series_name(metric, labels): value for (metric, labels), value in sorted(gauges)})
+        return summary
+
+    def to_prometheus(self) -> str:
+        """Prometheus 텍스트 노출 형식"""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            gauges = sorted(self._gauges.items())
+        lines = []
+        declared = set()
+        for (metric, labels), hist in items:
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} histogram")
+                declared.add(metric)
+            cumulative = 0
+            for bound, c in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                cumulative += c
+                lines.append(f"{_series_name(metric + '_bucket', labels + (('le', str(bound)),))} {cumulative}")
+            lines.append(f"{_series_name(metric + '_sum', labels)} {hist.sum:.3f}")
+            lines.append(f"{_series_name(metric + '_count', labels)} {hist.count}")
+        for (metric, labels), value in gauges:
+            if metric not in declared:
+                lines.append(f"# TYPE {metric} gauge")
+                declared.add(metric)
+            lines.append(f"{_series_name(metric, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_jsonl(self, record: dict):
+        if not self.jsonl_path:
+            return
+        try:
+            dirname = os.path.dirname(self.jsonl_path)
+            if dirname:
+                os.makedirs(dirname, exist_ok=True)
+            with self._lock, open(self.jsonl_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except OSError as e:
+            print(f"⚠️ 메트릭 JSONL 기록 오류: {e}")
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._gauges.clear()
+
+
+def _series_name(metric: str, labels: tuple) -> str:
+    if not labels:
+        return metric
+    return metric + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+# 프로세스 전역 메트릭 저장소
+METRICS = MetricsRegistry(jsonl_path=os.getenv("TUTOR_METRICS_JSONL"))
+
+
+def timed_stream(name: str, stream, on_done=None, started_at: float = None, registry: MetricsRegistry = METRICS):
+    """
+    스트림을 그대로 전달하면서 첫 조각까지 시간(TTFT)과 전체 스트리밍 시간을 기록합니다.
+    started_at이 없으면 소비자가 처음 값을 요청한 시점부터 잽니다.
+    on_done(ttft_ms, total_ms)는 스트림이 끝나면(중간에 닫혀도) 한 번 호출됩니다.
+    """
+    iterator = iter(stream)
+    start = started_at
+    ttft_ms = None
+    try:
+        while True:
+            if start is None:
+                start = time.perf_counter()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - start) * 1000
+                registry.observe("tutor_llm_ttft_ms", ttft_ms, stream=name)
+            yield chunk
+    finally:
+        if start is not None:
+            total_ms = (time.perf_counter() - start) * 1000
+            registry.observe("tutor_llm_stream_ms", total_ms, stream=name)
+            if on_done:
+                on_done(ttft_ms, total_ms)
+
+
+class TurnMetrics:
+    """한 턴의 단계별 소요 시간 요약 (반환 dict의 "metrics"로 전달)"""
+
+    def __init__(self, registry: MetricsRegistry = METRICS):
+        self.registry = registry
+        self.started_at = time.perf_counter()
+        self.summary = {"stages": {}, "total_ms": None, "ttft_ms": None, "stream_ms": None}
+        self._lock = threading.Lock()
+        self._stream_pending = False
+        self._finished = False
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def record(self, name: str, elapsed_ms: float):
+        self.registry.observe("tutor_stage_ms", elapsed_ms, stage=name)
+        with self._lock:
+            stages = self.summary["stages"]
+            stages[name] = round(stages.get(name, 0.0) + elapsed_ms, 3)
+
+    def wrap_response_stream(self, stream):
+        """최종 응답 스트림: 턴 시작부터 첫 조각까지(사용자가 체감하는 TTFT)와 스트리밍 시간을 기록"""
+        self._stream_pending = True
+        return timed_stream("response", stream, on_done=self._on_stream_done, registry=self.registry)
+
+    def _on_stream_done(self, ttft_ms, stream_ms):
+        if ttft_ms is not None:
+            # 스트림 안의 TTFT + 턴 본체 처리 시간 = 학생이 입력 후 첫 글자를 보기까지의 시간
+            self.summary["ttft_ms"] = round((self.summary["total_ms"] or 0.0) + ttft_ms, 3)
+            self.registry.observe("tutor_turn_ttft_ms", self.summary["ttft_ms"])
+        self.summary["stream_ms"] = round(stream_ms, 3)
+        self._stream_pending = False
+        self._flush()
+
+    def finish(self, **fields):
+        """턴 본체 처리 완료 (응답 스트림이 있으면 스트림이 끝난 뒤 JSONL 기록)"""
+        self.summary["total_ms"] = round((time.perf_counter() - self.started_at) * 1000, 3)
+        self.summary.update(fields)
+        self.registry.observe("tutor_turn_ms", self.summary["total_ms"])
+        if not self._stream_pending:
+            self._flush()
+        return self.summary
+
+    def _flush(self):
+        with self._lock:
+            if self._finished:
+                return
+            self._finished = True
+        self.registry.write_jsonl({"ts": time.time(), **self.summary})
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = METRICS
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.to_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port: int = None, host: str = None):
+    """
+    /metrics 엔드포인트를 백그라운드 스레드로 제공합니다. (포트가 없으면 TUTOR_METRICS_PORT 사용, 둘 다 없으면 무시)
+    host가 없으면 TUTOR_METRICS_HOST, 그것도 없으면 로컬(127.0.0.1)에서만 받습니다.
+    """
+    global _server
+    port = port or os.getenv("TUTOR_METRICS_PORT")
+    if not port:
+        return None
+    host = host or os.getenv("TUTOR_METRICS_HOST") or DEFAULT_METRICS_HOST
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                print(f"⚠️ 메트릭 서버 시작 실패 ({host}:{port}): {e}")
+                return None
+            threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+            print(f"📈 메트릭 서버 시작: http://{host}:{port}/metrics")
+    return _server
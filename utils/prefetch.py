@@ -0,0 +1,153 @@
+import time
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from utils.debug_log import log_debug as shared_log_debug
+
+# 다음 설명 미리 가져오기 (speculative prefetch)
+# "다음으로 'X'(을)를 설명해드릴까요?"라고 물은 뒤 학생이 답을 읽고 쓰는 동안,
+# 백그라운드 스레드가 X의 그래프 조회와 설명 스트림을 미리 시작해 버퍼에 쌓아둡니다.
+# 학생이 "네"라고 하면 버퍼부터 바로 스트리밍하고, 건너뛰기/새 질문이면 취소합니다.
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_PER_SESSION = 1
+DEFAULT_TTL_SECONDS = 600 # 이 시간 동안 사용되지 않은 미리 가져오기 결과는 버림
+
+log_debug = partial(shared_log_debug, source="Prefetch") # 공용 DEBUG_MODE를 따름
+
+
+class BufferedStream:
+    """백그라운드에서 스트림을 읽어 버퍼에 쌓고, 소비자는 버퍼에 쌓인 것부터 이어서 읽습니다."""
+
+    def __init__(self):
+        self.created_at = time.monotonic()
+        self._chunks = []
+        self._done = False
+        self._error = None
+        self._cancelled = threading.Event()
+        self._cond = threading.Condition()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def fill(self, stream_factory):
+        """(백그라운드 스레드) stream_factory()가 만든 스트림을 끝까지 또는 취소될 때까지 읽습니다."""
+        stream = None
+        try:
+            if self.cancelled:
+                return
+            stream = stream_factory()
+            for chunk in stream:
+                if self.cancelled:
+                    break
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+        except Exception as e:
+            self._error = e
+        finally:
+            if self.cancelled and hasattr(stream, "close"):
+                stream.close()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def cancel(self):
+        self._cancelled.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait(self, timeout: float = None) -> bool:
+        """채우기가 끝날 때까지 기다립니다. (끝났으면 True)"""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._done or self.cancelled, timeout)
+
+    def __iter__(self):
+        i = 0
+        while True:
+            with self._cond:
+                while i >= len(self._chunks) and not self._done:
+                    self._cond.wait()
+                if i < len(self._chunks):
+                    chunk = self._chunks[i]
+                elif self._error is not None:
+                    raise self._error
+                else:
+                    return
+            i += 1
+            yield chunk
+
+
+class ExplanationPrefetcher:
+    """튜터 모듈이 소유하는 미리 가져오기 스레드 풀 (세션별 개수 제한)"""
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, max_per_session: int = DEFAULT_MAX_PER_SESSION,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self.max_per_session = max_per_session
+        self.ttl_seconds = ttl_seconds
+        self._jobs = {} # session_id -> OrderedDict(key -> BufferedStream)
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def _purge_expired(self):
+        now = time.monotonic()
+        for session_id in list(self._jobs):
+            jobs = self._jobs[session_id]
+            for key in [k for k, buf in jobs.items() if now - buf.created_at > self.ttl_seconds]:
+                jobs.pop(key).cancel()
+                self.stats["expired"] += 1
+            if not jobs:
+                del self._jobs[session_id]
+
+    def schedule(self, session_id: str, key, stream_factory):
+        """key에 해당하는 스트림을 백그라운드에서 미리 시작합니다."""
+        with self._lock:
+            self._purge_expired()
+            jobs = self._jobs.setdefault(session_id, OrderedDict())
+            if key in jobs:
+                return
+            while len(jobs) >= self.max_per_session:
+                _, old = jobs.popitem(last=False)
+                old.cancel()
+                self.stats["evicted"] += 1
+            buffer = BufferedStream()
+            jobs[key] = buffer
+            self.stats["scheduled"] += 1
+        self._executor.submit(buffer.fill, stream_factory)
+        log_debug(f"미리 가져오기 시작: {key}")
+
+    def take(self, session_id: str, key):
+        """미리 가져온 스트림이 있으면 반환하고(버퍼부터 재생), 없으면 None."""
+        with self._lock:
+            jobs = self._jobs.get(session_id)
+            buffer = jobs.pop(key, None) if jobs else None
+        if buffer is None or buffer.cancelled:
+            self.stats["missed"] += 1
+            return None
+        self.stats["used"] += 1
+        log_debug(f"미리 가져온 설명 사용: {key}")
+        return iter(buffer)
+
+    def wait_idle(self, timeout: float = None) -> bool:
+        """진행 중인 미리 가져오기가 모두 끝날 때까지 기다립니다. (벤치마크에서 턴 사이 대기용)"""
+        with self._lock:
+            buffers = [buf for jobs in self._jobs.values() for buf in jobs.values()]
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for buf in buffers:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not buf.wait(remaining):
+                return False
+        return True
+
+    def cancel(self, session_id: str):
+        """세션의 미리 가져오기 작업을 모두 취소합니다."""
+        with self._lock:
+            jobs = self._jobs.pop(session_id, None)
+        if jobs:
+            for buffer in jobs.values():
+                buffer.cancel()
+            self.stats["cancelled"] += len(jobs)
+            log_debug(f"미리 가져오기 취소: {list(jobs)}")
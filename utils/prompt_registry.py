@@ -0,0 +1,78 @@
+import threading
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from utils.prompts import prompt_version
+from utils.metrics import timed_stream
+from utils.usage import STEP_TAG_PREFIX, bind_usage
+
+# 프롬프트 체인 등록소
+# 프롬프트마다 ChatPromptTemplate과 `prompt | llm | 파서` 체인을 처음 사용할 때 한 번만 만들고,
+# 이후에는 같은 체인 객체를 재사용합니다. (값은 모두 invoke/stream 시점에 변수로 전달)
+# 프롬프트 문구의 해시(version)를 함께 제공하므로 캐시 키에 사용할 수 있습니다.
+
+
+class PromptRegistry:
+    """이름 -> (메시지 템플릿, 출력 형식) 등록 및 체인 지연 생성"""
+
+    def __init__(self, llm, prompts: dict = None):
+        self.llm = llm
+        self._specs = {}
+        self._chains = {}
+        self._lock = threading.Lock()
+        self.compiled = 0 # 실제로 체인을 만든 횟수 (프롬프트당 1회)
+        for name, messages in (prompts or {}).items():
+            self.register(name, messages)
+
+    def register(self, name: str, messages: list, schema=None):
+        """
+        messages: [(role, template), ...]
+        schema가 주어지면 llm.with_structured_output(schema)로, 아니면 문자열(StrOutputParser)로 출력합니다.
+        """
+        with self._lock:
+            self._specs[name] = (list(messages), schema)
+            self._chains.pop(name, None)
+
+    def chain(self, name: str):
+        """등록된 프롬프트의 체인 (처음 호출 시 생성)"""
+        chain = self._chains.get(name)
+        if chain is not None:
+            return chain
+        with self._lock:
+            if name not in self._chains:
+                messages, schema = self._specs[name]
+                prompt = ChatPromptTemplate.from_messages(messages)
+                if schema is not None:
+                    chain = prompt | self.llm.with_structured_output(schema)
+                else:
+                    chain = prompt | self.llm | StrOutputParser()
+                # 태그는 LLM 콜백까지 전달되어 단계별 토큰 사용량 집계에 쓰임 (utils/usage.py)
+                self._chains[name] = chain.with_config(tags=[f"{STEP_TAG_PREFIX}{name}"])
+                self.compiled += 1
+            return self._chains[name]
+
+    def stream(self, name: str, inputs: dict):
+        """
+        chain(name).stream(inputs) + 첫 토큰까지 시간/전체 스트리밍 시간 기록 (utils/metrics.py)
+        스트림을 소비하는 스레드에서도 지금 턴의 토큰 사용량 장부에 기록되도록 묶어 둡니다. (utils/usage.py)
+        """
+        return timed_stream(name, bind_usage(self.chain(name).stream(inputs)))
+
+    def version(self, name: str) -> str:
+        """프롬프트 문구(+ 출력 스키마 이름)의 해시"""
+        messages, schema = self._specs[name]
+        parts = [f"{role}:{template}" for role, template in messages]
+        if schema is not None:
+            parts.append(f"schema:{schema.__name__}")
+        return prompt_version(*parts)
+
+    def versions(self) -> dict:
+        return {name: self.version(name) for name in sorted(self._specs)}
+
+    def warm_up(self):
+        """모든 체인을 미리 생성합니다. (시작 시 호출하면 첫 턴의 생성 비용도 없앰)"""
+        for name in list(self._specs):
+            self.chain(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._specs
@@ -0,0 +1,61 @@
+import time
+import random
+import threading
+
+# LLM 배치 작업용 호출 속도 제한 / 재시도
+# 여러 스레드가 같은 TokenBucket을 공유하면 전체 호출 속도가 rate(초당)를 넘지 않고,
+# 잠시 쉬었다면 burst개까지는 바로 보낼 수 있습니다.
+
+
+class TokenBucket:
+    """스레드 안전 토큰 버킷 (acquire()는 토큰이 생길 때까지 기다림)"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate는 0보다 커야 합니다.")
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.waited_seconds = 0.0 # 속도 제한 때문에 기다린 누적 시간 (진행 보고용)
+
+    @classmethod
+    def per_minute(cls, requests_per_minute: float, burst: int = None):
+        rate = requests_per_minute / 60
+        return cls(rate, burst if burst is not None else max(int(rate), 1))
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, tokens: float = 1):
+        tokens = min(tokens, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+                self.waited_seconds += wait
+            time.sleep(wait)
+
+
+def retry_with_backoff(fn, retries: int = 3, retry_on: tuple = (Exception,), base_delay: float = 1.0,
+                       max_delay: float = 30.0, on_retry=None):
+    """
+    fn()을 실행하고 retry_on 예외면 지수 백오프(+지터) 후 최대 retries번 다시 시도합니다.
+    on_retry(attempt, error, wait)는 재시도 직전에 호출됩니다. 마지막 실패는 그대로 raise.
+    """
+    for attempt in range(1, retries + 2):
+        try:
+            return fn()
+        except retry_on as e:
+            if attempt > retries:
+                raise
+            wait = min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            if on_retry:
+                on_retry(attempt, e, wait)
+            time.sleep(wait)
@@ -0,0 +1,143 @@
+# 선수 관계 도달 가능성(전이 폐쇄) 인덱스
+# 각 CoreConcept마다 "거리 d 이내의 모든 선수 개념" 집합을 비트셋(파이썬 int)으로 저장합니다.
+#   within[i][d-1] : 개념 i에서 거리 d 이하인 선수 개념들의 비트셋 (d = 1, 2, ..., 가장 먼 선수 개념까지)
+# 따라서
+#   - "depth 단계 이내의 선수 개념"   -> within[i][depth-1]
+#   - "A는 B의 선수 개념인가"         -> ancestors(B)의 A 비트 확인
+#   - "이 중 학생이 아직 모르는 개념" -> within & ~mask(explained_concepts)
+# 이 모두 비트 연산 한두 번으로 끝나고, 각 선수 개념까지의 최단 거리는 비트가 처음 켜지는 단계입니다.
+#
+# 04_create_prerequisite_links.py가 그래프를 만든 뒤 인덱스를 빌드하고 Cypher 결과와 대조 검증하여
+# 그래프 스냅샷(utils/concept_graph.py)에 함께 저장합니다.
+
+
+def iter_bits(bits: int):
+    """켜진 비트의 위치(노드 ID)를 오름차순으로 반환합니다."""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class ReachabilityIndex:
+    """노드별 누적 선수 개념 비트셋 목록"""
+
+    def __init__(self, within: list):
+        self.within = within
+
+    @classmethod
+    def build(cls, preds: list):
+        """
+        preds[i] (직접 선수 개념 ID 목록)으로 인덱스를 만듭니다.
+        거리 d 이내 집합 = 직접 선수 개념 | (직접 선수 개념들의 거리 d-1 이내 집합)
+        을 모든 노드에 대해 동시에 한 단계씩 확장하고, 더 이상 바뀌지 않으면 멈춥니다. (순환이 있어도 종료)
+        """
+        n = len(preds)
+        direct = [0] * n
+        for i, ps in enumerate(preds):
+            for p in ps:
+                direct[i] |= 1 << p
+
+        within = [[d] if d else [] for d in direct]
+        current = list(direct)
+        while True:
+            nxt = list(direct)
+            changed = False
+            for i, ps in enumerate(preds):
+                for p in ps:
+                    nxt[i] |= current[p]
+                if nxt[i] != current[i]:
+                    within[i].append(nxt[i])
+                    changed = True
+            if not changed:
+                break
+            current = nxt
+        return cls(within)
+
+    def __len__(self):
+        return len(self.within)
+
+    @property
+    def max_depth(self) -> int:
+        """가장 먼 선수 개념까지의 최단 거리 중 최댓값"""
+        return max((len(levels) for levels in self.within), default=0)
+
+    # ============ 조회 ============
+    def ancestors(self, i: int) -> int:
+        """i의 모든 선수 개념 (전이 폐쇄)"""
+        levels = self.within[i]
+        return levels[-1] if levels else 0
+
+    def within_depth(self, i: int, depth: int) -> int:
+        """i에서 depth 단계 이내의 선수 개념"""
+        levels = self.within[i]
+        if depth <= 0 or not levels:
+            return 0
+        return levels[min(depth, len(levels)) - 1]
+
+    def distance(self, ancestor: int, i: int):
+        """ancestor에서 i까지의 최단 거리 (선수 개념이 아니면 None)"""
+        bit = 1 << ancestor
+        for d, bits in enumerate(self.within[i], start=1):
+            if bits & bit:
+                return d
+        return None
+
+    def is_prerequisite(self, a: int, b: int) -> bool:
+        """a가 b의 (직접 또는 간접) 선수 개념인지"""
+        return bool(self.ancestors(b) >> a & 1)
+
+    def distances(self, i: int, depth: int = None) -> dict:
+        """{선수 개념 ID: 최단 거리} (depth가 주어지면 그 단계까지)"""
+        result = {}
+        seen = 0
+        for d, bits in enumerate(self.within[i], start=1):
+            if depth is not None and d > depth:
+                break
+            for p in iter_bits(bits & ~seen):
+                result[p] = d
+            seen = bits
+        return result
+
+    def in_cycle(self) -> list:
+        """자기 자신이 선수 개념에 포함되는(순환 참조에 속한) 노드 ID 목록"""
+        return [i for i in range(len(self.within)) if self.ancestors(i) >> i & 1]
+
+    # ============ 직렬화 ============
+    def to_list(self) -> list:
+        return [[format(bits, "x") for bits in levels] for levels in self.within]
+
+    @classmethod
+    def from_list(cls, data: list):
+        return cls([[int(bits, 16) for bits in levels] for levels in data])
+
+
+def mask_of(ids: dict, names) -> int:
+    """개념 이름 집합 -> 비트셋 (그래프에 없는 이름은 무시)"""
+    bits = 0
+    for name in names:
+        i = ids.get(name)
+        if i is not None:
+            bits |= 1 << i
+    return bits
+
+
+def compare_with_rows(index: ReachabilityIndex, ids: dict, rows) -> list:
+    """
+    Cypher로 구한 (target, prereq, dist) 결과와 인덱스를 대조합니다.
+    rows의 각 항목은 target(개념), prereq(선수 개념), dist(최단 거리)를 가져야 합니다.
+    불일치 목록 [(target, prereq, cypher 거리, 인덱스 거리), ...]를 반환합니다.
+    """
+    expected = [{} for _ in range(len(index))]
+    for r in rows:
+        if r["target"] in ids and r["prereq"] in ids:
+            expected[ids[r["target"]]][ids[r["prereq"]]] = r["dist"]
+
+    names = {i: name for name, i in ids.items()}
+    mismatches = []
+    for i in range(len(index)):
+        actual = index.distances(i)
+        for p in sorted(set(actual) | set(expected[i])):
+            if expected[i].get(p) != actual.get(p):
+                mismatches.append((names[i], names[p], expected[i].get(p), actual.get(p)))
+    return mismatches
@@ -0,0 +1,64 @@
+# 응답 스트림 결합기 (prefix + 본문 스트림 + suffix)
+# suffix(후속 질문)는 본문 스트림이 이미 같은 문장으로 끝나면 덧붙이지 않습니다.
+# 이 판단은 공백을 정규화한 본문의 끝부분만 필요하므로, 본문 전체를 문자열로 이어 붙이고 다시 나누는 대신
+#   - 조각은 리스트에 추가만 하고 (조각당 작업량 일정)
+#   - 스트림이 끝나면 뒤쪽 조각 중 suffix 길이만큼만 모아 정규화해 비교하며
+#   - 전체 텍스트는 필요할 때 조각 리스트를 한 번만 join
+# 합니다. (끝에서의 작업량도 suffix 길이에만 비례, 전체 스트림 길이와 무관)
+
+
+def normalize_whitespace(text: str) -> str:
+    """" ".join(text.split())와 같은 결과"""
+    return " ".join(text.split())
+
+
+def normalized_tail(chunks: list, size: int) -> str:
+    """
+    조각 리스트 전체를 공백 정규화했을 때의 끝부분 (길이 size 이상, 전체가 더 짧으면 전체).
+    뒤에서부터 공백이 아닌 글자가 size개가 될 때까지만 조각을 모아 정규화하므로 스트림 길이와 무관합니다.
+    (공백 정규화는 공백 묶음만 바꾸므로, 중간에서 자른 뒷부분을 정규화해도 끝 size글자는 같음)
+    """
+    visible = 0
+    start = len(chunks)
+    while start > 0 and visible < size:
+        start -= 1
+        visible += sum(len(word) for word in chunks[start].split())
+    return normalize_whitespace("".join(chunks[start:]))
+
+
+class StreamCombiner:
+    """
+    prefix -> stream -> (필요하면) suffix 순서로 내보내는 반복자.
+    소비가 끝나면 text(본문 스트림 전체), suffix_appended로 결과를 확인할 수 있습니다.
+    """
+
+    def __init__(self, stream, prefix: str = "", suffix: str = "", on_suffix=None):
+        self.stream = stream
+        self.prefix = prefix
+        self.suffix = suffix
+        self.on_suffix = on_suffix # on_suffix(appended: bool) - 로그용
+        self._normalized_suffix = normalize_whitespace(suffix) if suffix else ""
+        self._chunks = []
+        self.suffix_appended = None
+
+    @property
+    def text(self) -> str:
+        """지금까지 받은 본문 스트림 전체 (캐시/로그용)"""
+        return "".join(self._chunks)
+
+    def __iter__(self):
+        if self.prefix:
+            yield self.prefix
+
+        if self.stream is not None:
+            for chunk in self.stream:
+                self._chunks.append(chunk)
+                yield chunk
+
+        if self._normalized_suffix:
+            tail = normalized_tail(self._chunks, len(self._normalized_suffix))
+            self.suffix_appended = not tail.endswith(self._normalized_suffix)
+            if self.on_suffix:
+                self.on_suffix(self.suffix_appended)
+            if self.suffix_appended:
+                yield self.suffix
@@ -1,14 +1,15 @@
 import json
 import os
 import traceback
+from utils.usage import new_usage, snapshot_usage
+from functools import partial
+from utils.debug_log import log_debug as shared_log_debug
 
 # 프로필을 저장할 경로 설정
 DATA_DIR = "data"
 PROFILE_FILE = os.path.join(DATA_DIR, "user_profile.json")
 
-def log_debug(message: str):
-    """디버그용 로그 출력 (06_tutor_rag.py의 것을 임시로 사용)"""
-    print(f"🐛 DEBUG (Profile): {message}")
+log_debug = partial(shared_log_debug, source="Profile") # 공용 DEBUG_MODE를 따름
 
 def load_profile() -> dict:
     """
@@ -18,7 +19,7 @@ def load_profile() -> dict:
     if not os.path.exists(PROFILE_FILE):
         log_debug("프로필 파일이 없어 새 프로필을 시작합니다.")
         # (중요) explained_concepts는 set으로 반환
-        return {"explained_concepts": set(), "explanation_count": {}, "learning_path": {"nodes": [], "edges": []}}
+        return {"explained_concepts": set(), "explanation_count": {}, "learning_path": {"nodes": [], "edges": []}, "usage": new_usage()}
     
     try:
         with open(PROFILE_FILE, "r", encoding="utf-8") as f:
@@ -28,6 +29,7 @@ def load_profile() -> dict:
             data["explained_concepts"] = set(data.get("explained_concepts", []))
             data.setdefault("explanation_count", {}) # 키가 없을 경우 대비
             data.setdefault("learning_path", {"nodes": [], "edges": []})
+            data.setdefault("usage", new_usage()) # 누적 LLM 토큰 사용량/비용 (utils/usage.py)
             
             log_debug(f"프로필 로드 성공. (학습 개념 {len(data['explained_concepts'])}개)")
             return data
@@ -36,7 +38,7 @@ def load_profile() -> dict:
         print(f"⚠️ 프로필 로드 실패: {e}")
         traceback.print_exc()
         # 로드 실패 시 안전하게 기본값 반환
-        return {"explained_concepts": set(), "explanation_count": {}, "learning_path": {"nodes": [], "edges": []}}
+        return {"explained_concepts": set(), "explanation_count": {}, "learning_path": {"nodes": [], "edges": []}, "usage": new_usage()}
     
 def save_profile(state: dict):
     """
@@ -46,7 +48,9 @@ def save_profile(state: dict):
     profile_data = {
         "explained_concepts": list(state.get("explained_concepts", set())),
         "explanation_count": state.get("explanation_count", {}),
-        "learning_path": state.get("learning_path", {"nodes": [], "edges": []}) # <-- 이 줄 추가
+        "learning_path": state.get("learning_path", {"nodes": [], "edges": []}), # <-- 이 줄 추가
+        # 응답 스트림의 사용량은 스트림이 끝난 뒤 더해지므로 process_turn이 그때 한 번 더 저장함
+        "usage": snapshot_usage(state.get("usage"))
     }
 
     try:
@@ -0,0 +1,73 @@
+from collections import Counter
+from contextlib import nullcontext
+
+# 한 턴(process_turn 1회) 동안의 계산 결과를 기억하는 컨텍스트
+# 같은 턴 안에서 개념 추출, 그래프 조회, 의도 분류 등이 같은 인자로 여러 번 호출되면
+# 첫 결과를 재사용하여 각 단계가 턴당 최대 1번만 실행되도록 합니다.
+# metrics(utils.metrics.TurnMetrics)가 주어지면 실제로 실행된 단계의 소요 시간도 기록합니다.
+
+
+class TurnContext:
+    """턴 단위 메모이제이션 저장소 + 실행/재사용 횟수 카운터"""
+
+    def __init__(self, metrics=None):
+        self._memo = {}
+        self.metrics = metrics   # 단계별 소요 시간 (없으면 측정 안 함)
+        self.calls = Counter()   # 실제로 실행된 횟수
+        self.hits = Counter()    # 기억된 결과를 재사용한 횟수
+
+    @staticmethod
+    def _key(name: str, args: tuple):
+        # list/set 인자는 해시 가능한 형태로 변환
+        frozen = tuple(
+            tuple(a) if isinstance(a, list) else frozenset(a) if isinstance(a, set) else a
+            for a in args
+        )
+        return (name, frozen)
+
+    def memo(self, name: str, fn, *args):
+        """(name, args)에 대해 fn(*args)를 한 번만 실행하고 결과를 재사용합니다."""
+        key = self._key(name, args)
+        if key in self._memo:
+            self.hits[name] += 1
+            return self._memo[key]
+        self.calls[name] += 1
+        with self.stage(name):
+            value = fn(*args)
+        self._memo[key] = value
+        return value
+
+    def stage(self, name: str):
+        """단계 타이머 (metrics가 없으면 아무것도 하지 않음)"""
+        if self.metrics is None:
+            return nullcontext()
+        return self.metrics.stage(name)
+
+    def seed(self, name: str, args: tuple, value):
+        """미리 계산된 결과를 저장합니다. (이후 memo 호출 시 실행 없이 재사용)"""
+        self.calls[name] += 1
+        self._memo[self._key(name, args)] = value
+
+    def has(self, name: str, *args) -> bool:
+        return self._key(name, args) in self._memo
+
+    def summary(self) -> dict:
+        """턴 동안의 단계별 실행/재사용 횟수"""
+        return {
+            "calls": dict(self.calls),
+            "reused": dict(self.hits),
+        }
+
+
+def memoized(ctx, name: str, fn, *args):
+    """ctx가 있으면 턴 단위로 기억하고, 없으면 그냥 실행합니다."""
+    if ctx is None:
+        return fn(*args)
+    return ctx.memo(name, fn, *args)
+
+
+def timed_stage(ctx, name: str):
+    """ctx가 있으면 단계 소요 시간을 기록하고, 없으면 아무것도 하지 않습니다."""
+    if ctx is None:
+        return nullcontext()
+    return ctx.stage(name)
@@ -0,0 +1,148 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from langchain_core.callbacks import BaseCallbackHandler
+
+# LLM 토큰 사용량 / 비용 집계
+# LLM 객체에 UsageCallbackHandler를 달아 두면 invoke/ainvoke/stream 모든 호출이 끝날 때 사용량이 기록됩니다.
+# (스트리밍 호출은 ChatOpenAI(stream_usage=True)여야 마지막 조각에 사용량이 실려 옴)
+# 기록은 "현재 턴의 장부(UsageLedger)"로 가고, 장부는 턴 합계와 함께 상위 합계들
+# (대화 세션 state["session_usage"], 학생 프로필 state["usage"], 프로세스 전체 PROCESS_USAGE)에 동시에 더합니다.
+# 단계별(by_step) 합계는 PromptRegistry가 체인에 붙인 "prompt:<이름>" 태그로 구분합니다.
+
+# 1M 토큰당 USD (입력, 캐시된 입력, 출력) - 모델 이름 접두사로 찾음
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.075, 0.60),
+    "gpt-4o": (2.50, 1.25, 10.00),
+}
+DEFAULT_MODEL = "gpt-4o-mini"
+STEP_TAG_PREFIX = "prompt:"
+
+_lock = threading.Lock()
+_current_ledger = ContextVar("tutor_usage_ledger", default=None)
+
+
+def new_usage() -> dict:
+    return {"calls": 0, "input_tokens": 0, "cached_input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0, "by_step": {}}
+
+
+def price_of(model: str, input_tokens: int, cached_input_tokens: int, output_tokens: int) -> float:
+    model = model or DEFAULT_MODEL
+    # 가장 긴 접두사 우선 ("gpt-4o-mini-2024-07-18" -> gpt-4o-mini)
+    key = next((k for k in sorted(MODEL_PRICES, key=len, reverse=True) if model.startswith(k)), DEFAULT_MODEL)
+    price_in, price_cached, price_out = MODEL_PRICES[key]
+    uncached = max(input_tokens - cached_input_tokens, 0)
+    return (uncached * price_in + cached_input_tokens * price_cached + output_tokens * price_out) / 1_000_000
+
+
+def _accumulate(totals: dict, input_tokens: int, cached: int, output_tokens: int, cost: float):
+    totals["calls"] = totals.get("calls", 0) + 1
+    totals["input_tokens"] = totals.get("input_tokens", 0) + input_tokens
+    totals["cached_input_tokens"] = totals.get("cached_input_tokens", 0) + cached
+    totals["output_tokens"] = totals.get("output_tokens", 0) + output_tokens
+    totals["cost_usd"] = round(totals.get("cost_usd", 0.0) + cost, 8)
+
+
+def snapshot_usage(totals: dict) -> dict:
+    """저장/출력용 복사본 (다른 스레드가 더하는 중에도 안전)"""
+    if not totals:
+        return new_usage()
+    with _lock:
+        copied = {k: v for k, v in totals.items() if k != "by_step"}
+        copied["by_step"] = {step: dict(t) for step, t in totals.get("by_step", {}).items()}
+    return copied
+
+
+# 프로세스 전체 합계 (여러 학생 세션 합산)
+PROCESS_USAGE = new_usage()
+
+
+class UsageLedger:
+    """한 턴의 사용량 장부 (totals) + 함께 더할 상위 합계들 (PROCESS_USAGE는 항상 포함)"""
+
+    def __init__(self, *parents: dict):
+        self.totals = new_usage()
+        self._targets = [self.totals, PROCESS_USAGE] + [p for p in parents if p is not None]
+
+    def add(self, step: str, model: str, input_tokens: int, cached_input_tokens: int, output_tokens: int):
+        cost = price_of(model, input_tokens, cached_input_tokens, output_tokens)
+        with _lock:
+            for totals in self._targets:
+                _accumulate(totals, input_tokens, cached_input_tokens, output_tokens, cost)
+                step_totals = totals.setdefault("by_step", {}).setdefault(step, {})
+                _accumulate(step_totals, input_tokens, cached_input_tokens, output_tokens, cost)
+
+
+def current_ledger() -> UsageLedger:
+    return _current_ledger.get()
+
+
+@contextmanager
+def usage_scope(ledger: UsageLedger):
+    """이 블록 안에서(그리고 여기서 만든 스레드/태스크에서) 일어나는 LLM 호출을 ledger에 기록"""
+    token = _current_ledger.set(ledger)
+    try:
+        yield ledger
+    finally:
+        _current_ledger.reset(token)
+
+
+def bind_usage(stream, ledger: UsageLedger = None):
+    """
+    스트림은 만든 곳이 아니라 소비하는 곳(app.py, 미리 가져오기 스레드)에서 LLM 호출이 끝나므로,
+    만들 때의 장부를 기억해 두었다가 조각을 읽을 때마다 다시 설정합니다.
+    """
+    ledger = ledger or current_ledger()
+    if ledger is None:
+        return stream
+    return _bound_stream(stream, ledger)
+
+
+def _bound_stream(stream, ledger: UsageLedger):
+    iterator = iter(stream)
+    while True:
+        token = _current_ledger.set(ledger)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            _current_ledger.reset(token)
+        yield chunk
+
+
+def _extract_usage(response) -> tuple:
+    """LLMResult -> (모델, 입력 토큰, 캐시된 입력 토큰, 출력 토큰) 또는 None"""
+    llm_output = response.llm_output or {}
+    model = llm_output.get("model_name")
+    for generations in response.generations:
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            usage = getattr(message, "usage_metadata", None)
+            if usage:
+                model = model or (message.response_metadata or {}).get("model_name")
+                cached = (usage.get("input_token_details") or {}).get("cache_read", 0) or 0
+                return model, usage.get("input_tokens", 0), cached, usage.get("output_tokens", 0)
+    token_usage = llm_output.get("token_usage")
+    if token_usage:
+        cached = (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0
+        return model, token_usage.get("prompt_tokens", 0), cached, token_usage.get("completion_tokens", 0)
+    return None
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """LLM 호출이 끝날 때마다 사용량을 현재 턴 장부(없으면 프로세스 합계)에 기록"""
+
+    run_inline = True # 비동기 호출에서도 같은 컨텍스트(현재 턴 장부)에서 실행
+
+    def __init__(self):
+        self.unattributed = UsageLedger() # 턴 밖에서 일어난 호출 (예: 시작 시 준비 작업)
+
+    def on_llm_end(self, response, *, tags=None, **kwargs):
+        usage = _extract_usage(response)
+        if usage is None:
+            return
+        model, input_tokens, cached, output_tokens = usage
+        step = next((t[len(STEP_TAG_PREFIX):] for t in (tags or []) if t.startswith(STEP_TAG_PREFIX)), "other")
+        ledger = current_ledger() or self.unattributed
+        ledger.add(step, model, input_tokens, cached, output_tokens)